@@ -1,29 +1,73 @@
 from datamart.es_managers.query_manager import QueryManager
+from datamart.es_managers.query_cache import QueryCache
+from datamart.es_managers.async_query_manager import AsyncQueryManager
 from datamart.profiler import Profiler
 import pandas as pd
 import typing
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from datamart.utilities.utils import Utils
-from datamart.joiners.joiner_base import JoinerPrepare
+from datamart.utilities.minhash import MinHash
+from datamart.joiners.joiner_base import JoinerPrepare, DefaultJoiner
+from datamart.joiners.join_planner import JoinPlanner
+from datamart.joiners.join_estimator import JoinEstimator
 import warnings
 
 
 class Augment(object):
 
-    def __init__(self, es_index: str, es_host: str = "dsbox02.isi.edu", es_port: int = 9200) -> None:
+    def __init__(self,
+                 es_index: str,
+                 es_host: str = "dsbox02.isi.edu",
+                 es_port: int = 9200,
+                 query_cache: QueryCache = None
+                 ) -> None:
         """Init method of QuerySystem, set up connection to elastic search.
 
         Args:
             es_index: elastic search index.
             es_host: es_host.
             es_port: es_port.
+            query_cache: QueryCache for query results, no caching if None.
 
         Returns:
 
         """
 
-        self.qm = QueryManager(es_host=es_host, es_port=es_port, es_index=es_index)
+        self.qm = QueryManager(es_host=es_host, es_port=es_port, es_index=es_index, query_cache=query_cache)
+        self._aqm = None
         self.joiners = dict()
         self.profiler = Profiler()
+        self.minhash = MinHash()
+
+    @property
+    def aqm(self) -> AsyncQueryManager:
+        """AsyncQueryManager used by aquery, created on first use so sync only users never start its worker pool.
+
+        Returns:
+            AsyncQueryManager wrapping self.qm
+        """
+
+        if self._aqm is None:
+            self._aqm = AsyncQueryManager(query_manager=self.qm)
+        return self._aqm
+
+    def close(self) -> None:
+        """Shut down the worker pool of the async query manager, if aquery started one.
+
+        Returns:
+
+        """
+
+        if self._aqm is not None:
+            self._aqm.close()
+            self._aqm = None
+
+    def __enter__(self) -> 'Augment':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def query(self,
               col: pd.Series = None,
@@ -54,43 +98,258 @@ class Augment(object):
             matching docs of metadata
         """
 
+        queries = self._build_queries(col=col,
+                                      minimum_should_match_ratio_for_col=minimum_should_match_ratio_for_col,
+                                      query_string=query_string,
+                                      temporal_coverage_start=temporal_coverage_start,
+                                      temporal_coverage_end=temporal_coverage_end,
+                                      global_datamart_id=global_datamart_id,
+                                      variable_datamart_id=variable_datamart_id,
+                                      key_value_pairs=key_value_pairs)
+
+        hits = self.qm.search(body=self._form_query(queries), **kwargs)
+        if col is None:
+            return hits
+        return self._merge_hits(hits, self.qm.search_with_variables(
+            **self._separate_variables_queries(queries, col, minimum_should_match_ratio_for_col), **kwargs))
+
+    async def aquery(self,
+                     col: pd.Series = None,
+                     minimum_should_match_ratio_for_col: float = None,
+                     query_string: str = None,
+                     temporal_coverage_start: str = None,
+                     temporal_coverage_end: str = None,
+                     global_datamart_id: int = None,
+                     variable_datamart_id: int = None,
+                     key_value_pairs: typing.List[tuple] = None,
+                     **kwargs
+                     ) -> typing.Optional[typing.List[dict]]:
+
+        """Asyncio version of query, the search does not block the event loop.
+
+        Args:
+            same as query
+
+        Returns:
+            matching docs of metadata
+        """
+
+        queries = self._build_queries(col=col,
+                                      minimum_should_match_ratio_for_col=minimum_should_match_ratio_for_col,
+                                      query_string=query_string,
+                                      temporal_coverage_start=temporal_coverage_start,
+                                      temporal_coverage_end=temporal_coverage_end,
+                                      global_datamart_id=global_datamart_id,
+                                      variable_datamart_id=variable_datamart_id,
+                                      key_value_pairs=key_value_pairs)
+
+        hits = await self.aqm.search(body=self._form_query(queries), **kwargs)
+        if col is None:
+            return hits
+        return self._merge_hits(hits, await self.aqm.search_with_variables(
+            **self._separate_variables_queries(queries, col, minimum_should_match_ratio_for_col), **kwargs))
+
+    def query_intersection(self,
+                           queries: typing.List[dict],
+                           names: typing.List[str] = None,
+                           **kwargs
+                           ) -> typing.Optional[typing.List[dict]]:
+
+        """Query metadata matching all of several queries, intersected by elasticsearch in a single request.
+
+        Each query is a dict of arguments of query. Inner hits of the nested parts of query i are named
+        "<names[i]>_<argument>", eg. "query0_col", use Utils.get_inner_hits_info(hit, nested_key=...) to read them.
+
+        Args:
+            queries: list of dict of query arguments.
+            names: names of the queries, default to query0, query1, ...
+
+        Returns:
+            matching docs of metadata
+        """
+
+        if not names:
+            names = ["query{}".format(idx) for idx in range(len(queries))]
+        if len(names) != len(queries):
+            raise ValueError("Every query should have one name")
+
+        named_queries = list()
+        variable_queries = list()
+        for name, query_args in zip(names, queries):
+            for argument, query in self._build_queries(**query_args):
+                named_queries.append(("{}_{}".format(name, argument), query))
+            if query_args.get("col") is not None:
+                variable_queries.append(("{}_col".format(name), self.qm.match_some_terms_from_variables(
+                    terms=query_args["col"].unique().tolist(),
+                    minimum_should_match=query_args.get("minimum_should_match_ratio_for_col"))))
+
+        if not named_queries:
+            return self._query_all(**kwargs)
+
+        hits = self.qm.search(body=self.qm.form_intersection_query(named_queries), **kwargs)
+        if not variable_queries:
+            return hits
+        variable_names = set(name for name, _ in variable_queries)
+        return self._merge_hits(hits, self.qm.search_with_variables(
+            queries=[self.qm.name_inner_hits(query, name) for name, query in named_queries
+                     if name not in variable_names],
+            variable_queries=variable_queries,
+            **kwargs))
+
+    def query_joinable(self,
+                       col: pd.Series,
+                       minimum_containment: float = 0.5,
+                       minimum_should_match: int = 1,
+                       **kwargs
+                       ) -> typing.Optional[typing.List[dict]]:
+
+        """Query metadata with variables joinable with a column, by LSH lookups of its MinHash signature.
+
+        Every hit gets a "containment" list of (variable offset, estimated share of the column values in the variable),
+        best first, hits without a variable above minimum_containment are dropped.
+
+        Args:
+            col: pandas Dataframe column.
+            minimum_containment: minimum estimated share of distinct values of col found in a variable.
+            minimum_should_match: minimum number of LSH bands shared with a variable.
+
+        Returns:
+            matching docs of metadata, best containment first
+        """
+
+        signature, size = self.minhash.signature(col)
+        if not signature:
+            return None
+
+        body = self.qm.form_conjunction_query([
+            self.qm.match_lsh_bands(bands=self.minhash.lsh(signature), minimum_should_match=minimum_should_match)
+        ])
+        hits = self.qm.search(body=body, **kwargs)
+        if not hits:
+            return hits
+
+        result = list()
+        for hit in hits:
+            containment = list()
+            for inner_hit in hit.get("inner_hits", {}).get("variables", {}).get("hits", {}).get("hits", []):
+                minhash = inner_hit["_source"].get("minhash", {})
+                estimate = self.minhash.containment(signature, size, minhash.get("signature"), minhash.get("size", 0))
+                if estimate >= minimum_containment:
+                    containment.append((inner_hit["_nested"]["offset"], estimate))
+            if containment:
+                hit["containment"] = sorted(containment, key=lambda x: -x[1])
+                result.append(hit)
+        return sorted(result, key=lambda x: -x["containment"][0][1])
+
+    def _build_query(self, **kwargs) -> str:
+        """Build es query body from the query arguments, see query for the arguments.
+
+        Returns:
+            query body, match all if no argument is given
+        """
+
+        return self._form_query(self._build_queries(**kwargs))
+
+    def _form_query(self, queries: typing.List[typing.Tuple[str, dict]]) -> str:
+        if not queries:
+            return self.qm.match_all()
+
+        return self.qm.form_conjunction_query([query for _, query in queries])
+
+    def _separate_variables_queries(self,
+                                    queries: typing.List[typing.Tuple[str, dict]],
+                                    col: pd.Series,
+                                    minimum_should_match_ratio_for_col: float = None
+                                    ) -> dict:
+        """Arguments of QueryManager.search_with_variables for the same query on datasets indexed with separate
+        variables, whose named entities are only in variable documents.
+
+        Args:
+            queries: list of (argument name, query) tuples, from _build_queries
+            col: pandas Dataframe column.
+            minimum_should_match_ratio_for_col: see query
+
+        Returns:
+            dict of arguments
+        """
+
+        return {
+            "queries": [query for argument, query in queries if argument != "col"],
+            "variable_queries": [("variables", self.qm.match_some_terms_from_variables(
+                terms=col.unique().tolist(), minimum_should_match=minimum_should_match_ratio_for_col))]
+        }
+
+    @staticmethod
+    def _merge_hits(hits: typing.Optional[typing.List[dict]],
+                    other_hits: typing.Optional[typing.List[dict]]
+                    ) -> typing.Optional[typing.List[dict]]:
+        """Merge hits of the nested and separate variables layouts, best score first.
+
+        """
+
+        if not other_hits:
+            return hits
+        hits = list(hits or [])
+        ids = set(hit["_id"] for hit in hits)
+        hits.extend(hit for hit in other_hits if hit["_id"] not in ids)
+        return sorted(hits, key=lambda hit: hit.get("_score") or 0, reverse=True)
+
+    def _build_queries(self,
+                       col: pd.Series = None,
+                       minimum_should_match_ratio_for_col: float = None,
+                       query_string: str = None,
+                       temporal_coverage_start: str = None,
+                       temporal_coverage_end: str = None,
+                       global_datamart_id: int = None,
+                       variable_datamart_id: int = None,
+                       key_value_pairs: typing.List[tuple] = None
+                       ) -> typing.List[typing.Tuple[str, dict]]:
+
+        """Build es queries from the query arguments, see query for the arguments.
+
+        Returns:
+            list of (argument name, query) tuples
+        """
+
         queries = list()
 
         if query_string:
             queries.append(
-                self.qm.match_any(query_string=query_string)
+                ("query_string", self.qm.match_any(query_string=query_string))
             )
 
         if temporal_coverage_start or temporal_coverage_end:
+            # one sided queries do not use the date_range field, no need to check the index for it
+            date_range = bool(temporal_coverage_start and temporal_coverage_end) and self.qm.date_range_indexed()
             queries.append(
-                self.qm.match_temporal_coverage(start=temporal_coverage_start, end=temporal_coverage_end)
+                ("temporal_coverage",
+                 self.qm.match_temporal_coverage(start=temporal_coverage_start, end=temporal_coverage_end,
+                                                 date_range=date_range))
             )
 
         if global_datamart_id:
             queries.append(
-                self.qm.match_global_datamart_id(datamart_id=global_datamart_id)
+                ("global_datamart_id", self.qm.match_global_datamart_id(datamart_id=global_datamart_id))
             )
 
         if variable_datamart_id:
             queries.append(
-                self.qm.match_variable_datamart_id(datamart_id=variable_datamart_id)
+                ("variable_datamart_id", self.qm.match_variable_datamart_id(datamart_id=variable_datamart_id))
             )
 
         if key_value_pairs:
             queries.append(
-                self.qm.match_key_value_pairs(key_value_pairs=key_value_pairs)
+                ("key_value_pairs", self.qm.match_key_value_pairs(key_value_pairs=key_value_pairs))
             )
 
         if col is not None:
             queries.append(
-                self.qm.match_some_terms_from_variables_array(terms=col.unique().tolist(),
-                                                              minimum_should_match=minimum_should_match_ratio_for_col)
+                ("col", self.qm.match_some_terms_from_variables_array(
+                    terms=col.unique().tolist(),
+                    minimum_should_match=minimum_should_match_ratio_for_col))
             )
 
-        if not queries:
-            return self._query_all()
-
-        return self.qm.search(body=self.qm.form_conjunction_query(queries), **kwargs)
+        return [(argument, query) for argument, query in queries if query]
 
     def _query_by_es_query(self, body: str, **kwargs) -> typing.Optional[typing.List[dict]]:
         """Query metadata by an elastic search query
@@ -114,6 +373,85 @@ class Augment(object):
 
         return self.qm.search(body=self.qm.match_all(), **kwargs)
 
+    def estimate_join(self,
+                      left_df: pd.DataFrame,
+                      right_metadata: dict,
+                      left_columns: typing.List[typing.List[int]],
+                      right_columns: typing.List[typing.List[int]]
+                      ) -> dict:
+        """Estimate match rate and row count of joining a dataset from its metadata, without materializing it.
+
+        Args:
+            left_df: pandas Dataframe to be augmented
+            right_metadata: metadata of the dataset, eg. "_source" of a search result
+            left_columns: list of list of integers from left df for join
+            right_columns: list of list of integers from the dataset for join
+
+        Returns:
+            dict, see JoinEstimator.estimate
+        """
+
+        right_metadata = self._with_variables(metadata=right_metadata,
+                                              offsets=[offset for column in right_columns for offset in column])
+        return JoinEstimator.estimate(left_df=left_df,
+                                      right_metadata=right_metadata,
+                                      left_columns=left_columns,
+                                      right_columns=right_columns)
+
+    def plan_constrains(self,
+                        left_df: pd.DataFrame,
+                        right_metadata: dict,
+                        left_columns: typing.List[typing.List[int]],
+                        right_columns: typing.List[typing.List[int]],
+                        left_metadata: dict = None,
+                        constrains: dict = None
+                        ) -> dict:
+        """Plan constrains for materializing a dataset to join with left_df, see JoinPlanner.
+
+        Args:
+            left_df: pandas Dataframe to be augmented
+            right_metadata: metadata of the dataset to materialize
+            left_columns: list of list of integers from left df for join
+            right_columns: list of list of integers from the materialized dataset for join
+            left_metadata: metadata of left dataframe
+            constrains: constrains given by the user, kept as they are
+
+        Returns:
+            constrains dict
+        """
+
+        return JoinPlanner.plan(left_df=left_df,
+                                right_metadata=right_metadata,
+                                left_columns=left_columns,
+                                right_columns=right_columns,
+                                left_metadata=left_metadata,
+                                constrains=constrains)
+
+    def get_dataset_for_join(self,
+                             left_df: pd.DataFrame,
+                             right_metadata: dict,
+                             left_columns: typing.List[typing.List[int]],
+                             right_columns: typing.List[typing.List[int]],
+                             left_metadata: dict = None,
+                             constrains: dict = None
+                             ) -> typing.Optional[pd.DataFrame]:
+        """Materialize a dataset, only fetching rows which can join with left_df.
+
+        Args:
+            same as plan_constrains
+
+        Returns:
+            pandas Dataframe
+        """
+
+        constrains = self.plan_constrains(left_df=left_df,
+                                          right_metadata=right_metadata,
+                                          left_columns=left_columns,
+                                          right_columns=right_columns,
+                                          left_metadata=left_metadata,
+                                          constrains=constrains)
+        return Utils.get_dataset(metadata=right_metadata, constrains=constrains)
+
     def join(self,
              left_df: pd.DataFrame,
              right_df: pd.DataFrame,
@@ -126,6 +464,9 @@ class Augment(object):
 
         """Join two dataframes based on different joiner.
 
+        The whole result is built in memory, even with the "partitioned" joiner. Use join_partitions to join inputs
+        given as chunks with memory bounded by the largest partition.
+
           Args:
               left_df: pandas Dataframe
               right_df: pandas Dataframe
@@ -146,13 +487,17 @@ class Augment(object):
             warnings.warn("No suitable joiner, return original dataframe")
             return left_df
 
-        if not left_metadata:
+        features = self.joiners[joiner].METADATA_FEATURES
+
+        if not left_metadata and features:
             # Left df is the user provided one.
-            # We will generate metadata just based on the data itself, profiling and so on
-            left_metadata = Utils.generate_metadata_from_dataframe(data=left_df)
+            # We will generate metadata just based on the data itself, only profiling the join columns
+            left_metadata = Utils.generate_metadata_from_dataframe(
+                data=left_df, columns=[offset for column in left_columns for offset in column])
 
-        left_metadata = Utils.calculate_dsbox_features(data=left_df, metadata=left_metadata)
-        right_metadata = Utils.calculate_dsbox_features(data=right_df, metadata=right_metadata)
+        if "dsbox" in features:
+            left_metadata = self._dsbox_features(data=left_df, metadata=left_metadata)
+            right_metadata = self._dsbox_features(data=right_df, metadata=right_metadata)
 
         return self.joiners[joiner].join(left_df=left_df,
                                          right_df=right_df,
@@ -161,3 +506,140 @@ class Augment(object):
                                          left_metadata=left_metadata,
                                          right_metadata=right_metadata,
                                          )
+
+    def join_partitions(self,
+                        left_df: typing.Union[pd.DataFrame, typing.Iterable[pd.DataFrame]],
+                        right_df: typing.Union[pd.DataFrame, typing.Iterable[pd.DataFrame]],
+                        left_columns: typing.List[typing.List[int]],
+                        right_columns: typing.List[typing.List[int]],
+                        left_metadata: dict = None,
+                        right_metadata: dict = None
+                        ) -> typing.Iterator[pd.DataFrame]:
+        """Out of core join, yields the joined Dataframe of every hash partition of the join key.
+
+        Both sides can be Dataframes or iterables of Dataframe chunks, eg. pd.read_csv(..., chunksize=...). They are
+        spilled to disk by PartitionedJoiner, so memory is bounded by the largest partition as long as the caller
+        writes out every yielded partition instead of collecting them. Rows are grouped by partition, not in left order.
+
+        Args:
+            left_df: pandas Dataframe or iterable of Dataframe chunks
+            right_df: pandas Dataframe or iterable of Dataframe chunks
+            left_columns: list of list of integers from left df for join
+            right_columns: list of list of integers from right df for join
+            left_metadata: metadata of left dataframe, profiled from its first chunk if not given
+            right_metadata: metadata of right dataframe
+
+        Returns:
+            iterator of Dataframe
+        """
+
+        if "partitioned" not in self.joiners:
+            self.joiners["partitioned"] = JoinerPrepare.prepare_joiner(joiner="partitioned")
+
+        if not left_metadata:
+            left_chunks = iter([left_df]) if isinstance(left_df, pd.DataFrame) else iter(left_df)
+            first_left = next(left_chunks, None)
+            if first_left is not None:
+                left_metadata = Utils.generate_metadata_from_dataframe(
+                    data=first_left, columns=[offset for column in left_columns for offset in column])
+                left_df = left_df if isinstance(left_df, pd.DataFrame) else itertools.chain([first_left], left_chunks)
+            else:
+                left_df = []
+
+        return self.joiners["partitioned"].join_partitions(left_df=left_df,
+                                                           right_df=right_df,
+                                                           left_columns=left_columns,
+                                                           right_columns=right_columns,
+                                                           left_metadata=left_metadata,
+                                                           right_metadata=right_metadata)
+
+    def augment_pipeline(self,
+                         left_df: pd.DataFrame,
+                         selections: typing.List[dict],
+                         left_metadata: dict = None,
+                         max_workers: int = 4
+                         ) -> pd.DataFrame:
+        """Augment a dataframe with several selected datasets at once.
+
+        All datasets are materialized concurrently, with join keys pushed down (see get_dataset_for_join), then joined
+        to left_df by DefaultJoiner.join_many, which builds the left index once and concatenates columns once.
+        Datasets failed to materialize are skipped with a warning.
+
+        Args:
+            left_df: pandas Dataframe to be augmented
+            selections: list of dict with keys
+                metadata: metadata of the selected dataset, eg. "_source" of a search result
+                left_columns: list of list of integers from left df for join
+                right_columns: list of list of integers from the selected dataset for join
+                constrains: optional constrains for materialization
+            left_metadata: metadata of left dataframe
+            max_workers: max number of datasets materialized at the same time
+
+        Returns:
+            augmented Dataframe, same rows as left_df
+        """
+
+        if not left_metadata:
+            left_metadata = Utils.generate_metadata_from_dataframe(
+                data=left_df,
+                columns=[offset for selection in selections for column in selection["left_columns"]
+                         for offset in column])
+
+        def fetch(selection):
+            try:
+                return self.get_dataset_for_join(left_df=left_df,
+                                                 right_metadata=selection["metadata"],
+                                                 left_columns=selection["left_columns"],
+                                                 right_columns=selection["right_columns"],
+                                                 left_metadata=left_metadata,
+                                                 constrains=selection.get("constrains"))
+            except Exception as e:
+                warnings.warn("Failed to materialize dataset {}: {}".format(
+                    selection["metadata"].get("datamart_id"), e))
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            right_dfs = list(executor.map(fetch, selections))
+
+        rights = [{"right_df": right_df,
+                   "left_columns": selection["left_columns"],
+                   "right_columns": selection["right_columns"],
+                   "right_metadata": selection["metadata"]}
+                  for selection, right_df in zip(selections, right_dfs) if right_df is not None]
+
+        return DefaultJoiner.join_many(left_df=left_df, rights=rights, left_metadata=left_metadata)
+
+    def _with_variables(self, metadata: dict, offsets: typing.List[int]) -> dict:
+        """Fill the variables of a dataset indexed with separate variables, their summary has no named entities.
+
+        Args:
+            metadata: metadata of a dataset, eg. "_source" of a search result
+            offsets: offsets of the variables needed
+
+        Returns:
+            metadata dict, a copy if any variable was filled
+        """
+
+        variables = metadata.get("variables") or []
+        missing = {variables[offset]["datamart_id"]: offset for offset in set(offsets)
+                   if offset < len(variables) and "datamart_id" in variables[offset]
+                   and "named_entity" not in variables[offset]}
+        if not missing:
+            return metadata
+        found = self.qm.get_variables(list(missing))
+        if not found:
+            return metadata
+        variables = list(variables)
+        for datamart_id, variable in found.items():
+            variables[missing[datamart_id]] = variable
+        return dict(metadata, variables=variables)
+
+    @staticmethod
+    def _dsbox_features(data: pd.DataFrame, metadata: dict) -> dict:
+        """Calculate dsbox features, unless every variable of metadata already has them.
+
+        """
+
+        if metadata and all("dsbox_profiled" in variable for variable in metadata.get("variables", [])):
+            return metadata
+        return Utils.calculate_dsbox_features(data=data, metadata=metadata)
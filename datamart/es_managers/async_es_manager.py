@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import typing
+from datamart.es_managers.es_manager import ESManager
+
+
+class AsyncESManager(object):
+    """Base class of asyncio managers, wraps a synchronous ESManager.
+
+    The elasticsearch client we use has no asyncio transport, so requests run on a pool of worker threads sharing
+    the pooled connections of the wrapped manager's client. The wrapped client should be built with a connection pool
+    (maxsize) at least as large as max_workers. The pool is created on the first request and shut down by close(),
+    managers can also be used as context managers.
+
+    """
+
+    DEFAULT_MAX_WORKERS = 10
+
+    def __init__(self, manager: ESManager, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        """Init method of AsyncESManager.
+
+        Args:
+            manager: the synchronous ESManager doing the actual requests.
+            max_workers: max number of requests in flight.
+
+        Returns:
+
+        """
+
+        self.manager = manager
+        self.max_workers = max_workers
+        self._executor = None
+
+    def __enter__(self) -> 'AsyncESManager':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def _run(self, func: typing.Callable, *args, **kwargs) -> typing.Any:
+        """Run a blocking call on the worker pool and wait for it without blocking the event loop.
+
+        Args:
+            func: blocking callable
+            args: positional arguments of func
+            kwargs: keyword arguments of func
+
+        Returns:
+            return value of func
+        """
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self) -> None:
+        """Shut down the worker pool if it was started, a later request starts a new one.
+
+        Returns:
+
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,104 @@
+from datamart.es_managers.async_es_manager import AsyncESManager
+from datamart.es_managers.index_manager import IndexManager
+
+
+class AsyncIndexManager(AsyncESManager):
+
+    def __init__(self, index_manager: IndexManager, max_workers: int = AsyncESManager.DEFAULT_MAX_WORKERS) -> None:
+        """Init method of AsyncIndexManager.
+
+        Args:
+            index_manager: IndexManager doing the writes, its client is shared.
+            max_workers: max number of requests in flight.
+
+        Returns:
+
+        """
+
+        super().__init__(manager=index_manager, max_workers=max_workers)
+
+    async def check_exists(self, index: str) -> bool:
+        """check if index exist, see IndexManager.check_exists
+
+        Args:
+            index: str, Elasticsearch index
+
+        Returns:
+            Boolean
+        """
+
+        return await self._run(self.manager.check_exists, index=index)
+
+    async def create_index(self, **kwargs) -> None:
+        """create index, see IndexManager.create_index
+
+        Args:
+            kwargs
+
+        Returns:
+
+        """
+
+        await self._run(self.manager.create_index, **kwargs)
+
+    async def delete_index(self, **kwargs) -> None:
+        """delete index, see IndexManager.delete_index
+
+        Args:
+            kwargs
+
+        Returns:
+
+        """
+
+        await self._run(self.manager.delete_index, **kwargs)
+
+    async def create_doc(self, **kwargs) -> None:
+        """create doc, see IndexManager.create_doc
+
+        Args:
+            kwargs
+
+        Returns:
+
+        """
+
+        await self._run(self.manager.create_doc, **kwargs)
+
+    async def update_doc(self, **kwargs) -> None:
+        """update doc, see IndexManager.update_doc
+
+        Args:
+            kwargs
+
+        Returns:
+
+        """
+
+        await self._run(self.manager.update_doc, **kwargs)
+
+    async def create_doc_bulk(self, file: str, index: str, **kwargs) -> dict:
+        """bulk create doc, see IndexManager.create_doc_bulk
+
+        Args:
+            file: str, path to the metadata dump
+            index: str, elastic search index
+            kwargs: parallel bulk arguments, see IndexManager.create_doc_bulk
+
+        Returns:
+            report dict
+        """
+
+        return await self._run(self.manager.create_doc_bulk, file=file, index=index, **kwargs)
+
+    async def current_global_datamart_id(self, **kwargs) -> int:
+        """get current_global_datamart_id, see IndexManager.current_global_datamart_id
+
+        Args:
+            kwargs
+
+        Returns:
+            integer
+        """
+
+        return await self._run(self.manager.current_global_datamart_id, **kwargs)
@@ -0,0 +1,67 @@
+from datamart.es_managers.async_es_manager import AsyncESManager
+from datamart.es_managers.query_manager import QueryManager
+import asyncio
+import typing
+
+
+class AsyncQueryManager(AsyncESManager):
+
+    def __init__(self, query_manager: QueryManager, max_workers: int = AsyncESManager.DEFAULT_MAX_WORKERS) -> None:
+        """Init method of AsyncQueryManager.
+
+        Args:
+            query_manager: QueryManager used for querying, its client and query cache are shared.
+            max_workers: max number of searches in flight.
+
+        Returns:
+
+        """
+
+        super().__init__(manager=query_manager, max_workers=max_workers)
+
+    async def search(self, body: str, size: int = 5000, from_index: int = 0, **kwargs) -> typing.Optional[
+            typing.List[dict]]:
+        """Entry point for querying, see QueryManager.search.
+
+        Args:
+            body: query body.
+            size: query return size.
+            from_index: from index.
+
+        Returns:
+            match result
+        """
+
+        return await self._run(self.manager.search, body=body, size=size, from_index=from_index, **kwargs)
+
+    async def search_with_variables(self,
+                                    queries: typing.List[dict],
+                                    variable_queries: typing.List[typing.Tuple[str, dict]],
+                                    size: int = 5000,
+                                    **kwargs
+                                    ) -> typing.Optional[typing.List[dict]]:
+        """Query datasets indexed with separate variables, see QueryManager.search_with_variables.
+
+        Args:
+            queries: queries on summary documents.
+            variable_queries: list of (inner hits name, query on variable documents) tuples.
+            size: max number of variables matched by each variable query.
+
+        Returns:
+            match result
+        """
+
+        return await self._run(self.manager.search_with_variables, queries=queries,
+                               variable_queries=variable_queries, size=size, **kwargs)
+
+    async def search_many(self, bodies: typing.List[str], **kwargs) -> typing.List[typing.Optional[typing.List[dict]]]:
+        """Run many searches concurrently.
+
+        Args:
+            bodies: list of query bodies.
+
+        Returns:
+            list of match results, in the same order as bodies
+        """
+
+        return await asyncio.gather(*[self.search(body=body, **kwargs) for body in bodies])
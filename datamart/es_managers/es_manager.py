@@ -1,21 +1,77 @@
 from abc import ABC, abstractmethod
 from elasticsearch import Elasticsearch
+import threading
 
 
 class ESManager(ABC):
     """Abstract class of ESManager, should be extended for every elasticsearch manager.
 
+    Clients are shared: every manager talking to the same host, port and settings reuses one Elasticsearch client,
+    so the pooled (kept alive) connections stay warm across Augment, QueryManager and IndexManager instances.
+
     """
 
+    # Default transport settings, can be overwritten per manager by kwargs.
+    #   maxsize: number of kept alive connections in the pool per node
+    #   max_retries, retry_on_timeout: retrying failed requests on other connections
+    #   sniff_on_start, sniff_on_connection_fail, sniffer_timeout: discovering the nodes of the cluster
+    DEFAULT_CLIENT_SETTINGS = {
+        "maxsize": 25,
+        "timeout": 30,
+        "max_retries": 3,
+        "retry_on_timeout": True,
+        "sniff_on_start": False,
+        "sniff_on_connection_fail": False,
+        "sniffer_timeout": None
+    }
+
+    _clients = dict()
+    _clients_lock = threading.Lock()
+
     @abstractmethod
-    def __init__(self, es_host, es_port) -> None:
+    def __init__(self, es_host, es_port, **kwargs) -> None:
         """Init method for index manager
 
         Args:
             es_host: str, Elasticsearch host
             es_port: int, Elasticsearch port
+            kwargs: transport settings overwriting DEFAULT_CLIENT_SETTINGS, eg. maxsize for the connection pool size
+
+        Returns:
+
+        """
+        self.es = self.get_client(es_host=es_host, es_port=es_port, **kwargs)
+
+    @classmethod
+    def get_client(cls, es_host: str, es_port: int, **kwargs) -> Elasticsearch:
+        """Get the shared client for a host and port, create it on first use.
+
+        Args:
+            es_host: str, Elasticsearch host
+            es_port: int, Elasticsearch port
+            kwargs: transport settings overwriting DEFAULT_CLIENT_SETTINGS
+
+        Returns:
+            Elasticsearch client
+        """
+
+        settings = dict(cls.DEFAULT_CLIENT_SETTINGS)
+        settings.update(kwargs)
+        key = (es_host, int(es_port), tuple(sorted((k, repr(v)) for k, v in settings.items())))
+        with cls._clients_lock:
+            if key not in cls._clients:
+                cls._clients[key] = Elasticsearch([{'host': es_host, 'port': es_port}], **settings)
+            return cls._clients[key]
+
+    @classmethod
+    def close_clients(cls) -> None:
+        """Close all shared clients and their connection pools.
 
         Returns:
 
         """
-        self.es = Elasticsearch([{'host': es_host, 'port': es_port}])
+
+        with cls._clients_lock:
+            for client in cls._clients.values():
+                client.transport.close()
+            cls._clients.clear()
@@ -0,0 +1,67 @@
+import threading
+from elasticsearch.exceptions import NotFoundError
+from datamart.es_managers.index_manager import IndexManager
+
+
+class IdAllocator(object):
+    """Hand out global datamart ids to concurrent indexers without collisions.
+
+    Ids are reserved in blocks from a sequence stored in es (see IndexManager.increment_sequence), the increment is
+    atomic on es side so every worker, process or host gets its own blocks. Ids of a block are then handed out locally,
+    one round trip to es per block_size datasets. The sequence counts datasets, ids are multiples of interval, and it
+    starts after the largest datamart_id already in the index. It only ever grows, so an id is never handed out twice.
+
+    """
+
+    def __init__(self, index_manager: IndexManager, es_index: str, interval: int = 10000, block_size: int = 100) -> None:
+        """Init method of IdAllocator.
+
+        Args:
+            index_manager: IndexManager of the es holding the sequence.
+            es_index: es index the ids are for, one sequence per es index.
+            interval: step between two global datamart ids, leaves room for the variable ids.
+            block_size: number of ids reserved at once.
+
+        Returns:
+
+        """
+
+        self.im = index_manager
+        self.es_index = es_index
+        self.interval = interval
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        """Next global datamart id.
+
+        Returns:
+            int
+        """
+
+        with self._lock:
+            if self._next >= self._end:
+                self._end = self._reserve_block()
+                self._next = self._end - self.block_size
+            self._next += 1
+            return self._next * self.interval
+
+    def reset(self) -> None:
+        """Move the sequence after the largest datamart_id in the index, eg. after documents were loaded without the
+        allocator. The sequence is never lowered, blocks reserved by other workers but not written yet stay reserved.
+
+        """
+
+        with self._lock:
+            start = self.im.current_global_datamart_id(index=self.es_index) // self.interval
+            self.im.raise_sequence(name=self.es_index, value=start)
+            self._next = self._end = 0
+
+    def _reserve_block(self) -> int:
+        try:
+            return self.im.increment_sequence(name=self.es_index, count=self.block_size)
+        except NotFoundError:
+            start = self.im.current_global_datamart_id(index=self.es_index) // self.interval
+            return self.im.increment_sequence(name=self.es_index, count=self.block_size, start=start)
@@ -1,22 +1,60 @@
-from elasticsearch.helpers import bulk
+from elasticsearch.exceptions import RequestError
+from elasticsearch.helpers import bulk, parallel_bulk
+from contextlib import contextmanager
 import json
+import time
 import typing
 from datamart.es_managers.es_manager import ESManager
+from datamart.es_managers.query_cache import QueryCache
+from datamart.utilities.metadata_dump import MetadataDumpReader
 
 
 class IndexManager(ESManager):
 
-    def __init__(self, es_host: str = "dsbox02.isi.edu", es_port: int = 9200) -> None:
+    SEQUENCE_INDEX = "datamart_sequence"
+
+    # separate variables layout, see split_variables
+    VARIABLE_INDEX_SUFFIX = "_variables"
+    PARENT_FIELDS = ("title", "keywords", "url")
+    SUMMARY_VARIABLE_FIELDS = ("datamart_id", "name", "semantic_type", "temporal_coverage", "date_range", "minhash")
+
+    VARIABLE_MAPPING = {
+        "mappings": {
+            "_doc": {
+                "properties": {
+                    "date_range": {
+                        "type": "date_range",
+                        "format": "yyyy-MM-dd'T'HH:mm:ss"
+                    },
+                    "minhash": {
+                        "properties": {
+                            "lsh": {"type": "keyword"},
+                            "signature": {"type": "long", "index": False},
+                            "size": {"type": "long"}
+                        }
+                    },
+                    "dataset": {
+                        "properties": {
+                            "datamart_id": {"type": "long"}
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    def __init__(self, es_host: str = "dsbox02.isi.edu", es_port: int = 9200, **kwargs) -> None:
         """Init method for index manager
 
         Args:
             es_host: str, Elasticsearch host
             es_port: int, Elasticsearch port
+            kwargs: extra transport arguments for Elasticsearch
 
         Returns:
 
         """
-        super().__init__(es_host=es_host, es_port=es_port)
+        super().__init__(es_host=es_host, es_port=es_port, **kwargs)
 
     def check_exists(self, index: str) -> bool:
         """check if index exist
@@ -32,28 +70,48 @@ class IndexManager(ESManager):
             return True
         return False
 
-    def create_index(self, **kwargs) -> None:
+    def create_index(self, variables: bool = False, **kwargs) -> None:
         """create index
 
         Args:
+            variables: bool, create an index of variable documents, see split_variables
             kwargs
 
         Returns:
 
         """
+
+        if variables:
+            self.es.indices.create(**kwargs, body=self.VARIABLE_MAPPING)
+            QueryCache.bump_generation(kwargs.get("index"))
+            return
         mapping = '''
         {  
           "mappings":{  
             "_doc": { 
               "properties": { 
                 "variables": {
-                  "type": "nested"
+                  "type": "nested",
+                  "properties": {
+                    "date_range": {
+                      "type": "date_range",
+                      "format": "yyyy-MM-dd'T'HH:mm:ss"
+                    },
+                    "minhash": {
+                      "properties": {
+                        "lsh": {"type": "keyword"},
+                        "signature": {"type": "long", "index": false},
+                        "size": {"type": "long"}
+                      }
+                    }
+                  }
                 }
               }
             }
           }
         }'''
         self.es.indices.create(**kwargs, body=mapping)
+        QueryCache.bump_generation(kwargs.get("index"))
 
     def delete_index(self, **kwargs) -> None:
         """delete index
@@ -66,6 +124,7 @@ class IndexManager(ESManager):
         """
 
         self.es.indices.delete(**kwargs)
+        QueryCache.bump_generation(kwargs.get("index"))
 
     def create_doc(self, **kwargs) -> None:
         """create doc
@@ -78,6 +137,33 @@ class IndexManager(ESManager):
         """
 
         self.es.create(**kwargs, ignore=[404])
+        QueryCache.bump_generation(kwargs.get("index"))
+
+    def index_doc(self, **kwargs) -> None:
+        """create doc, or replace it if a doc with the same id exists
+
+        Args:
+            kwargs
+
+        Returns:
+
+        """
+
+        self.es.index(**kwargs)
+        QueryCache.bump_generation(kwargs.get("index"))
+
+    def delete_doc(self, **kwargs) -> None:
+        """delete doc
+
+        Args:
+            kwargs
+
+        Returns:
+
+        """
+
+        self.es.delete(**kwargs, ignore=[404])
+        QueryCache.bump_generation(kwargs.get("index"))
 
     def update_doc(self, **kwargs) -> None:
         """create doc
@@ -90,20 +176,247 @@ class IndexManager(ESManager):
         """
 
         self.es.update(**kwargs)
+        QueryCache.bump_generation(kwargs.get("index"))
+
+    def index_dataset(self, metadata: dict, index: str, variable_index: str) -> None:
+        """create or replace the documents of a dataset in the separate variables layout, see split_variables
+
+        Args:
+            metadata: metadata dict
+            index: str, es index of dataset summaries
+            variable_index: str, es index of variable documents
+
+        Returns:
+
+        """
+
+        summary, variables = self.split_variables(metadata)
+        self.delete_variable_docs(index=variable_index, datamart_id=metadata["datamart_id"])
+        bulk(self.es, ({'_index': variable_index, '_type': "_doc", '_id': variable["datamart_id"],
+                        '_source': variable} for variable in variables))
+        self.es.index(index=index, doc_type="_doc", id=metadata["datamart_id"], body=summary)
+        QueryCache.bump_generation([index, variable_index])
+
+    def delete_variable_docs(self, index: str, datamart_id: int) -> None:
+        """delete the variable documents of a dataset
+
+        Args:
+            index: str, es index of variable documents
+            datamart_id: int, datamart_id of the dataset
+
+        Returns:
+
+        """
+
+        self.es.delete_by_query(index=index, body={"query": {"term": {"dataset.datamart_id": datamart_id}}},
+                                conflicts="proceed", ignore=[404])
+        QueryCache.bump_generation(index)
+
+    def create_doc_bulk(self,
+                        file: str,
+                        index: str,
+                        variable_index: str = None,
+                        chunk_size: int = 500,
+                        max_chunk_bytes: int = 100 * 1024 * 1024,
+                        thread_count: int = 4,
+                        queue_size: int = 4,
+                        optimize_settings: bool = True,
+                        max_errors: int = 10
+                        ) -> dict:
+        """bulk create doc by streaming a metadata dump produced by index builder, see MetadataDumpReader
+
+        Args:
+            file: str, path to the metadata dump
+            index: str, elastic search index
+            variable_index: str, load variables as separate documents to this index, see split_variables
+            chunk_size: int, max number of docs in one bulk request
+            max_chunk_bytes: int, max size of one bulk request in bytes
+            thread_count: int, number of bulk requests in flight
+            queue_size: int, number of chunks prepared ahead
+            optimize_settings: bool, disable refresh and replicas during the load, see bulk_load_settings
+            max_errors: int, max number of failed items kept in the report
+
+        Returns:
+            report dict with docs, failed, errors, seconds and docs_per_second
+
+        Raises:
+            ValueError if the dump does not match its checksum, nothing is loaded then
+        """
+
+        # verify before streaming, a corrupted dump would only be detected once loaded
+        MetadataDumpReader(file).verify_checksum()
+        indices = [index, variable_index] if variable_index else [index]
+        report = {"docs": 0, "failed": 0, "errors": []}
+        start = time.time()
+        try:
+            documents = self.make_documents(MetadataDumpReader(file, verify=False), index,
+                                            variable_index=variable_index)
+            with self.bulk_load_settings(index=",".join(indices), enabled=optimize_settings):
+                for ok, item in parallel_bulk(self.es, documents,
+                                              chunk_size=chunk_size, max_chunk_bytes=max_chunk_bytes,
+                                              thread_count=thread_count, queue_size=queue_size,
+                                              raise_on_error=False, raise_on_exception=False):
+                    report["docs"] += 1
+                    if not ok:
+                        report["failed"] += 1
+                        if len(report["errors"]) < max_errors:
+                            report["errors"].append(item)
+        finally:
+            QueryCache.bump_generation(indices)
+
+        report["seconds"] = time.time() - start
+        report["docs_per_second"] = report["docs"] / report["seconds"] if report["seconds"] else 0.0
+        print("==== Bulk loaded {docs} docs to {index} in {seconds:.1f}s, {docs_per_second:.0f} docs/s, "
+              "{failed} failed".format(index=index, **report))
+        return report
+
+    @contextmanager
+    def bulk_load_settings(self, index: str, enabled: bool = True) -> typing.Iterator[None]:
+        """Disable refresh and replicas of an index for a bulk load, restore them and refresh afterwards.
+
+        Args:
+            index: str, elastic search index
+            enabled: bool, do nothing if False
+
+        Returns:
+
+        """
+
+        if not enabled:
+            yield
+            return
+
+        # keyed by concrete index, index may be an alias
+        original = {
+            name: {
+                "refresh_interval": value["settings"]["index"].get("refresh_interval", "1s"),
+                "number_of_replicas": value["settings"]["index"].get("number_of_replicas", 1)
+            } for name, value in self.es.indices.get_settings(index=index).items()
+        }
+        for name in original:
+            self.es.indices.put_settings(index=name, body={"index": {"refresh_interval": "-1",
+                                                                     "number_of_replicas": 0}})
+        try:
+            yield
+        finally:
+            for name, settings in original.items():
+                self.es.indices.put_settings(index=name, body={"index": settings})
+            self.es.indices.refresh(index=index)
+
+    @staticmethod
+    def versioned_index_name(alias: str) -> str:
+        """name of a new concrete index behind an alias, eg. datamart_v1538000000000
+
+        Args:
+            alias: str, alias the index will be served under
+
+        Returns:
+            str
+        """
+
+        return "{}_v{}".format(alias, int(time.time() * 1000))
+
+    @staticmethod
+    def first_index_name(alias: str) -> str:
+        """name of the first concrete index behind an alias, the same for every worker so only one creates it
+
+        Args:
+            alias: str, alias the index will be served under
+
+        Returns:
+            str
+        """
+
+        return "{}_v0".format(alias)
 
-    def create_doc_bulk(self, file: str, index: str) -> None:
-        """bulk create doc by taking the metadata.out file produced by index builder
+    def create_index_if_missing(self, index: str, variables: bool = False) -> bool:
+        """create index unless it exists, index creation is atomic in es so concurrent calls create it once
 
         Args:
-            file: str, path to metadata.out file
             index: str, elastic search index
+            variables: bool, create an index of variable documents, see create_index
+
+        Returns:
+            True if this call created the index
+        """
+
+        try:
+            self.create_index(index=index, variables=variables)
+        except RequestError as e:
+            if e.error not in ("resource_already_exists_exception", "index_already_exists_exception"):
+                raise
+            return False
+        return True
+
+    def add_alias(self, alias: str, index: str) -> None:
+        """point an alias to index, idempotent, indices the alias already points to are neither removed nor deleted
+
+        Args:
+            alias: str, alias
+            index: str, concrete index
 
         Returns:
 
         """
 
-        with open(file, "r") as f:
-            bulk(self.es, self.make_documents(f, index))
+        self.es.indices.put_alias(index=index, name=alias)
+        QueryCache.bump_generation([alias, index])
+
+    def get_alias_indices(self, alias: str) -> typing.List[str]:
+        """concrete indices an alias points to
+
+        Args:
+            alias: str, alias
+
+        Returns:
+            list of index names, empty if the alias does not exist
+        """
+
+        if not self.es.indices.exists_alias(name=alias):
+            return []
+        return sorted(self.es.indices.get_alias(name=alias).keys())
+
+    def swap_alias(self, alias: str, index: str) -> typing.List[str]:
+        """atomically point an alias to index only, searches through the alias never see a missing or partial index
+
+        A concrete index predating aliases and holding the alias name is removed in the same atomic action.
+
+        Args:
+            alias: str, alias
+            index: str, concrete index
+
+        Returns:
+            list of indices the alias pointed to before, not deleted
+        """
+
+        old_indices = [name for name in self.get_alias_indices(alias) if name != index]
+        actions = [{"add": {"index": index, "alias": alias}}]
+        actions.extend({"remove": {"index": name, "alias": alias}} for name in old_indices)
+        if not old_indices and self.es.indices.exists(index=alias) and not self.es.indices.exists_alias(name=alias):
+            actions.append({"remove_index": {"index": alias}})
+        self.es.indices.update_aliases(body={"actions": actions})
+        QueryCache.bump_generation([alias, index])
+        return old_indices
+
+    def warm_up(self, index: str, queries: typing.List[dict] = None) -> None:
+        """refresh an index and run queries against it, so caches and nested structures are loaded before it serves
+
+        Args:
+            index: str, elastic search index
+            queries: list of search bodies, default to a match all and a nested match all on variables
+
+        Returns:
+
+        """
+
+        if queries is None:
+            queries = [
+                {"query": {"match_all": {}}, "size": 10},
+                {"query": {"nested": {"path": "variables", "query": {"match_all": {}}}}, "size": 10}
+            ]
+        self.es.indices.refresh(index=index)
+        for body in queries:
+            self.es.search(index=index, body=body)
 
     def current_global_datamart_id(self, **kwargs) -> int:
         """get current_global_datamart_id from the count of doc in es index
@@ -131,28 +444,131 @@ class IndexManager(ESManager):
         return int(result["aggregations"]["max_id"]["value"]) if result["aggregations"]["max_id"][
             "value"] else 0
 
-    @staticmethod
-    def make_documents(f, index: str) -> typing.Iterator[dict]:
+    def increment_sequence(self, name: str, count: int, start: int = None) -> int:
+        """Atomically add count to a sequence stored in es, concurrent increments are serialized by es.
+
+        Args:
+            name: str, name of the sequence
+            count: int, value to add
+            start: int, create the sequence with this value if it does not exist, raise NotFoundError if not given
+
+        Returns:
+            value of the sequence after the increment
+        """
+
+        body = {
+            "script": {
+                "source": "ctx._source.value += params.count",
+                "lang": "painless",
+                "params": {"count": count}
+            }
+        }
+        if start is not None:
+            body["upsert"] = {"value": start}
+            body["scripted_upsert"] = True
+        result = self.es.update(index=self.SEQUENCE_INDEX, doc_type="_doc", id=name, body=body,
+                                retry_on_conflict=10, _source=True, refresh="true")
+        return result["get"]["_source"]["value"]
+
+    def raise_sequence(self, name: str, value: int) -> None:
+        """Atomically set a sequence stored in es to value if it is lower or does not exist, it is never lowered.
+
+        Args:
+            name: str, name of the sequence
+            value: int, minimum value of the sequence
+
+        Returns:
+
+        """
+
+        body = {
+            "script": {
+                "source": "if (ctx._source.value < params.value) { ctx._source.value = params.value } "
+                          "else { ctx.op = 'noop' }",
+                "lang": "painless",
+                "params": {"value": value}
+            },
+            "upsert": {"value": value}
+        }
+        self.es.update(index=self.SEQUENCE_INDEX, doc_type="_doc", id=name, body=body, retry_on_conflict=10,
+                       refresh="true")
+
+    def delete_sequence(self, name: str) -> None:
+        """delete a sequence, it is created again on next increment
+
+        Args:
+            name: str, name of the sequence
+
+        Returns:
+
+        """
+
+        self.es.delete(index=self.SEQUENCE_INDEX, doc_type="_doc", id=name, ignore=[404])
+
+    @classmethod
+    def make_documents(cls,
+                       metadata_lst: typing.Iterable[dict],
+                       index: str,
+                       variable_index: str = None
+                       ) -> typing.Iterator[dict]:
         """make documents for bulk load to es
 
         Args:
-            f: file io
+            metadata_lst: iterable of metadata, eg. a MetadataDumpReader
             index: es index
+            variable_index: es index of variable documents, see split_variables, variables stay nested if None
 
         Returns:
 
         """
 
-        while True:
-            line = f.readline()
-            if not line:
-                break
-            idx = int(line.strip())
-            line = f.readline()
-            doc = {
+        for metadata in metadata_lst:
+            if variable_index:
+                metadata, variables = cls.split_variables(metadata)
+                for variable in variables:
+                    yield {
+                        '_index': variable_index,
+                        '_type': "_doc",
+                        '_source': variable,
+                        '_id': variable["datamart_id"],
+                    }
+            yield {
                 '_index': index,
                 '_type': "_doc",
-                '_source': line.strip(),
-                '_id': idx,
+                '_source': metadata,
+                '_id': metadata["datamart_id"],
             }
-            yield doc
+
+    @classmethod
+    def split_variables(cls, metadata: dict) -> typing.Tuple[dict, typing.List[dict]]:
+        """Split a metadata for the separate variables layout, for datasets with many or large variables.
+
+        Every variable becomes its own document, with the datamart_id and PARENT_FIELDS of its dataset under "dataset",
+        so matching a variable (eg. on a long named_entity list) does not need a nested query, and re-indexing one
+        dataset does not rewrite one huge document. The dataset document keeps a summary of each variable,
+        SUMMARY_VARIABLE_FIELDS only, so temporal, name and LSH queries on nested variables still work on it. Named
+        entities are only in variable documents, see QueryManager.search_variables.
+
+        Args:
+            metadata: metadata dict
+
+        Returns:
+            Tuple of (dataset summary, list of variable documents)
+        """
+
+        parent = {"datamart_id": metadata["datamart_id"]}
+        for field in cls.PARENT_FIELDS:
+            if field in metadata:
+                parent[field] = metadata[field]
+
+        summary = {key: value for key, value in metadata.items() if key != "variables"}
+        summary["variables"] = list()
+        variables = list()
+        for variable in metadata.get("variables", []):
+            summary["variables"].append({key: variable[key] for key in cls.SUMMARY_VARIABLE_FIELDS if key in variable})
+            variables.append(dict(variable, dataset=parent))
+        return summary, variables
+
+    @classmethod
+    def variable_index_name(cls, index: str) -> str:
+        return index + cls.VARIABLE_INDEX_SUFFIX
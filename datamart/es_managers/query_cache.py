@@ -0,0 +1,216 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import typing
+import uuid
+
+
+class QueryCache(object):
+    """Cache of search results, in memory LRU with an optional on-disk layer.
+
+    Every cached entry remembers the generation of the es index it was computed against. Whenever the index is
+    written through IndexManager, the generation of that index is bumped and older entries are no longer served.
+    Generations are kept in small files under GENERATION_DIR so that indexers running in another process on the same
+    host invalidate this cache as well. GENERATION_DIR is created by the first enabled QueryCache on the host, until
+    then bump_generation does nothing, so indexers on hosts without a cache never touch the file system.
+
+    This invalidation is single host only. Writes from other hosts or containers, or made to es directly, do not bump
+    the generation, so a cache shared with remote indexers can serve stale results until entries expire ttl seconds
+    after they were computed. Keep ttl short in that setup, or do not share the cache.
+
+    """
+
+    DEFAULT_MAX_SIZE = 256
+    DEFAULT_TTL = 60.0
+
+    GENERATION_DIR = os.path.join(tempfile.gettempdir(), "datamart_index_generation")
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, cache_dir: str = None, ttl: float = DEFAULT_TTL) -> None:
+        """Init method of QueryCache.
+
+        Args:
+            max_size: max number of entries kept in memory.
+            cache_dir: directory for the on-disk cache, no on-disk cache if None.
+            ttl: seconds an entry is served for, entries never expire if None, only when every writer of the index
+                goes through IndexManager on this host.
+
+        Returns:
+
+        """
+
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        if self.max_size > 0 or self.cache_dir:
+            os.makedirs(self.GENERATION_DIR, exist_ok=True)
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """Check if a QueryCache was enabled on this host, only then generations need to be bumped.
+
+        Returns:
+            boolean
+        """
+
+        return os.path.isdir(cls.GENERATION_DIR)
+
+    @classmethod
+    def generation(cls, index: str) -> str:
+        """Get current generation of an es index.
+
+        Args:
+            index: str, es index
+
+        Returns:
+            generation string, empty string if the index was never written through IndexManager
+        """
+
+        try:
+            with open(cls._generation_file(index), "r") as f:
+                return f.read()
+        except (IOError, OSError):
+            return ""
+
+    @classmethod
+    def bump_generation(cls, index: typing.Union[str, typing.List[str]]) -> None:
+        """Mark an es index as changed, all entries cached for it on this host become stale.
+
+        Does nothing if no QueryCache was enabled on this host, see enabled.
+
+        Args:
+            index: str or list of str, es index
+
+        Returns:
+
+        """
+
+        if not index or not cls.enabled():
+            return
+        if not isinstance(index, (list, tuple)):
+            index = str(index).split(",")
+        for idx in index:
+            generation_file = cls._generation_file(idx)
+            tmp_file = "{}.{}.tmp".format(generation_file, uuid.uuid4().hex)
+            with open(tmp_file, "w") as f:
+                f.write(uuid.uuid4().hex)
+            os.replace(tmp_file, generation_file)
+
+    @classmethod
+    def _generation_file(cls, index: str) -> str:
+        return os.path.join(cls.GENERATION_DIR, "{}.generation".format(index))
+
+    @staticmethod
+    def make_key(index: str, body: typing.Union[str, dict], **params) -> str:
+        """Make cache key from the canonical form of a search request.
+
+        Args:
+            index: str, es index
+            body: query body, json string or dict
+            params: other search parameters, eg. size, from_index
+
+        Returns:
+            hex digest string
+        """
+
+        if isinstance(body, str):
+            body = json.loads(body)
+        canonical = json.dumps({"index": index, "body": body, "params": params}, sort_keys=True)
+        return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, index: str) -> typing.Tuple[bool, typing.Optional[typing.List[dict]]]:
+        """Get cached result.
+
+        Args:
+            key: cache key from make_key
+            index: str, es index the result belongs to
+
+        Returns:
+            Tuple of (hit or not, cached result)
+        """
+
+        generation = self.generation(index)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._valid(entry, generation):
+                    self._entries.move_to_end(key)
+                    return True, json.loads(entry[2])
+                del self._entries[key]
+
+        entry = self._read_disk(key)
+        if entry is not None and self._valid(entry, generation):
+            self._put_memory(key, entry)
+            return True, json.loads(entry[2])
+        return False, None
+
+    def put(self, key: str, index: str, result: typing.Optional[typing.List[dict]]) -> None:
+        """Cache a search result.
+
+        Args:
+            key: cache key from make_key
+            index: str, es index the result belongs to
+            result: search result
+
+        Returns:
+
+        """
+
+        entry = (self.generation(index), time.time(), json.dumps(result))
+        self._put_memory(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self) -> None:
+        """Drop all cached entries, in memory and on disk.
+
+        Returns:
+
+        """
+
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir:
+            for file_name in os.listdir(self.cache_dir):
+                if file_name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, file_name))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _valid(self, entry: typing.Tuple[str, float, str], generation: str) -> bool:
+        return entry[0] == generation and (self.ttl is None or time.time() - entry[1] < self.ttl)
+
+    def _put_memory(self, key: str, entry: typing.Tuple[str, float, str]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str) -> typing.Optional[typing.Tuple[str, float, str]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, "{}.json".format(key)), "r") as f:
+                generation = f.readline().rstrip("\n")
+                created = float(f.readline())
+                return generation, created, f.read()
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, entry: typing.Tuple[str, float, str]) -> None:
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, "{}.json".format(key))
+        tmp_path = "{}.{}.tmp".format(path, uuid.uuid4().hex)
+        with open(tmp_path, "w") as f:
+            f.write("{}\n{!r}\n".format(entry[0], entry[1]))
+            f.write(entry[2])
+        os.replace(tmp_path, path)
@@ -1,8 +1,11 @@
 from datamart.es_managers.es_manager import ESManager
+from datamart.es_managers.query_cache import QueryCache
 from datamart.utilities.utils import Utils
 import typing
 import math
+import copy
 import json
+import time
 import warnings
 
 
@@ -10,24 +13,69 @@ class QueryManager(ESManager):
 
     MINIMUM_SHOULD_MATCH_RATIO = 0.5
 
-    def __init__(self, es_host: str, es_port: int, es_index: str) -> None:
+    # seconds the result of a check of the indices is kept, see _index_check
+    INDEX_CHECK_TTL = 60.0
+
+    def __init__(self,
+                 es_host: str,
+                 es_port: int,
+                 es_index: str,
+                 query_cache: QueryCache = None,
+                 variable_index: str = None,
+                 **kwargs
+                 ) -> None:
         """Init method of QuerySystem, set up connection to elastic search.
 
         Args:
             es_index: elastic search index.
             es_host: es_host.
             es_port: es_port.
+            query_cache: QueryCache for search results, no caching if None.
+            variable_index: index of variable documents, for datasets indexed with separate variables, default to
+                <es_index>_variables, see IndexManager.split_variables
+            kwargs: extra transport arguments for Elasticsearch.
 
         Returns:
 
         """
 
-        super().__init__(es_host=es_host, es_port=es_port)
+        super().__init__(es_host=es_host, es_port=es_port, **kwargs)
         self.es_index = es_index
+        self.variable_index = variable_index or es_index + "_variables"
+        self._variable_index_exists = False
+        self._index_checks = dict()
+        self.query_cache = query_cache
 
     def search(self, body: str, size: int = 5000, from_index: int = 0, **kwargs) -> typing.Optional[typing.List[dict]]:
         """Entry point for querying.
 
+        With a query cache, results are served from it if the same query was run recently and the index was not
+        written through IndexManager since, see QueryCache.
+
+        Args:
+            body: query body.
+            size: query return size.
+            from_index: from index.
+
+        Returns:
+            match result
+        """
+
+        if self.query_cache is None:
+            return self._search(body=body, size=size, from_index=from_index, **kwargs)
+
+        key = self.query_cache.make_key(self.es_index, body, size=size, from_index=from_index, **kwargs)
+        hit, result = self.query_cache.get(key, index=self.es_index)
+        if hit:
+            return result
+
+        result = self._search(body=body, size=size, from_index=from_index, **kwargs)
+        self.query_cache.put(key, index=self.es_index, result=result)
+        return result
+
+    def _search(self, body: str, size: int, from_index: int, **kwargs) -> typing.Optional[typing.List[dict]]:
+        """Run the query against elastic search.
+
         Args:
             body: query body.
             size: query return size.
@@ -46,6 +94,199 @@ class QueryManager(ESManager):
             return result["hits"]["hits"]
         return self.scroll_search(body=body, size=size, count=count)
 
+    def search_variables(self, body: str, size: int = 5000, **kwargs) -> typing.Optional[typing.List[dict]]:
+        """Query the variable documents and return the matched datasets, in the shape of search results.
+
+        Variables are grouped by dataset, every dataset hit has the summary document of the dataset as _source, with
+        its matched variables in full, and its matched variables as inner hits of "variables", with their offset,
+        matched queries and highlights prefixed by "variables.", so Utils.get_inner_hits_info works on them as on
+        nested results. Datasets are sorted by their best variable score.
+
+        Args:
+            body: query body on variable documents, eg. from match_some_terms_from_variables.
+            size: max number of variables matched.
+
+        Returns:
+            match result
+        """
+
+        if self.query_cache is None:
+            return self._search_variables(body=body, size=size, **kwargs)
+
+        key = self.query_cache.make_key(self.variable_index, body, size=size, **kwargs)
+        hit, result = self.query_cache.get(key, index=self.variable_index)
+        if hit:
+            return result
+
+        result = self._search_variables(body=body, size=size, **kwargs)
+        self.query_cache.put(key, index=self.variable_index, result=result)
+        return result
+
+    def _search_variables(self, body: str, size: int, **kwargs) -> typing.Optional[typing.List[dict]]:
+        response = self.es.search(index=self.variable_index, body=body, size=size, **kwargs)
+        if not response["hits"]["hits"]:
+            return None
+        datasets = self.es.mget(index=self.es_index, doc_type="_doc", body={
+            "ids": sorted({variable["_source"]["dataset"]["datamart_id"] for variable in response["hits"]["hits"]})
+        })
+        return self.group_variable_hits(response["hits"]["hits"], [doc for doc in datasets["docs"]
+                                                                   if doc.get("found")])
+
+    @staticmethod
+    def group_variable_hits(variable_hits: typing.List[dict], dataset_docs: typing.List[dict]) -> typing.List[dict]:
+        """Group hits of variable documents by dataset, see search_variables.
+
+        Args:
+            variable_hits: hits of variable documents.
+            dataset_docs: dataset summary documents.
+
+        Returns:
+            list of dataset hits
+        """
+
+        datasets = {int(doc["_id"]): doc for doc in dataset_docs}
+        results = dict()
+        for variable in variable_hits:
+            dataset_id = variable["_source"]["dataset"]["datamart_id"]
+            if dataset_id not in datasets:
+                continue
+            if dataset_id not in results:
+                source = dict(datasets[dataset_id]["_source"])
+                source["variables"] = list(source.get("variables") or [])
+                results[dataset_id] = {
+                    "_index": datasets[dataset_id]["_index"],
+                    "_id": datasets[dataset_id]["_id"],
+                    "_score": variable["_score"],
+                    "_source": source,
+                    "inner_hits": {"variables": {"hits": {"hits": []}}}
+                }
+            result = results[dataset_id]
+            result["_score"] = max(result["_score"] or 0, variable["_score"] or 0)
+            # variable ids follow the dataset id, see IndexBuilder.construct_variable_metadata
+            offset = variable["_source"]["datamart_id"] - dataset_id - 1
+            if 0 <= offset < len(result["_source"]["variables"]):
+                result["_source"]["variables"][offset] = {key: value for key, value in variable["_source"].items()
+                                                          if key != "dataset"}
+            result["inner_hits"]["variables"]["hits"]["hits"].append({
+                "_nested": {"field": "variables", "offset": offset},
+                "_score": variable["_score"],
+                "_source": variable["_source"],
+                "matched_queries": variable.get("matched_queries", []),
+                "highlight": {"variables." + key: value for key, value in variable.get("highlight", {}).items()}
+            })
+        return sorted(results.values(), key=lambda result: result["_score"] or 0, reverse=True)
+
+    def search_with_variables(self,
+                              queries: typing.List[dict],
+                              variable_queries: typing.List[typing.Tuple[str, dict]],
+                              size: int = 5000,
+                              **kwargs
+                              ) -> typing.Optional[typing.List[dict]]:
+        """Query datasets indexed with separate variables, see search_variables.
+
+        A dataset matches if it has a variable matching each of variable_queries and its summary document matches all
+        queries. Matched variables of variable query i are in the inner hits named by the first element of
+        variable_queries[i], eg. "variables".
+
+        Args:
+            queries: queries on summary documents, eg. temporal coverage or query string.
+            variable_queries: list of (inner hits name, query on variable documents) tuples.
+            size: max number of variables matched by each variable query.
+
+        Returns:
+            match result, None if no dataset is indexed with separate variables
+        """
+
+        if not variable_queries or not self.variable_index_exists():
+            return None
+        # results are grouped by dataset, they are not paged
+        kwargs.pop("from_index", None)
+
+        datasets = None
+        for name, query in variable_queries:
+            hits = self.search_variables(body=self.variable_search_body(query), size=size, **kwargs)
+            if not hits:
+                return None
+            hits = {hit["_id"]: hit for hit in hits}
+            if datasets is None:
+                # hits may be cached, copy what is updated below
+                datasets = {dataset_id: dict(hit, _source=dict(hit["_source"], variables=list(
+                    hit["_source"]["variables"])), inner_hits=dict()) for dataset_id, hit in hits.items()}
+            else:
+                datasets = {dataset_id: dataset for dataset_id, dataset in datasets.items() if dataset_id in hits}
+                for dataset_id, dataset in datasets.items():
+                    dataset["_score"] = (dataset["_score"] or 0) + (hits[dataset_id]["_score"] or 0)
+            for dataset_id, dataset in datasets.items():
+                inner_hits = hits[dataset_id]["inner_hits"]["variables"]
+                dataset["inner_hits"][name] = inner_hits
+                for inner_hit in inner_hits["hits"]["hits"]:
+                    offset = inner_hit["_nested"]["offset"]
+                    if 0 <= offset < len(dataset["_source"]["variables"]):
+                        dataset["_source"]["variables"][offset] = hits[dataset_id]["_source"]["variables"][offset]
+        if not datasets:
+            return None
+
+        if queries:
+            body = self.form_conjunction_query(list(queries) + [{"ids": {"values": list(datasets)}}])
+            hits = self.search(body=body, size=len(datasets), **kwargs) or []
+            for hit in hits:
+                dataset = datasets[hit["_id"]]
+                dataset["_score"] = (dataset["_score"] or 0) + (hit.get("_score") or 0)
+                dataset["inner_hits"] = dict(hit.get("inner_hits") or {}, **dataset["inner_hits"])
+            datasets = {hit["_id"]: datasets[hit["_id"]] for hit in hits}
+
+        return sorted(datasets.values(), key=lambda result: result["_score"] or 0, reverse=True) or None
+
+    def get_variables(self, datamart_ids: typing.List[int]) -> typing.Dict[int, dict]:
+        """Get variable documents of datasets indexed with separate variables.
+
+        Args:
+            datamart_ids: datamart ids of the variables.
+
+        Returns:
+            dict of datamart id to variable document, without its "dataset"
+        """
+
+        if not datamart_ids or not self.variable_index_exists():
+            return dict()
+        docs = self.es.mget(index=self.variable_index, doc_type="_doc", body={"ids": sorted(set(datamart_ids))})
+        return {int(doc["_id"]): {key: value for key, value in doc["_source"].items() if key != "dataset"}
+                for doc in docs["docs"] if doc.get("found")}
+
+    def variable_index_exists(self) -> bool:
+        """Check if datasets were indexed with separate variables, once it exists the index is assumed to stay. A
+        missing index is checked again after INDEX_CHECK_TTL seconds, so queries do not pay a round trip each.
+
+        Returns:
+            boolean
+        """
+
+        if not self._variable_index_exists:
+            self._variable_index_exists = self._index_check(
+                "variable_index", lambda: self.es.indices.exists(index=self.variable_index))
+        return self._variable_index_exists
+
+    def date_range_indexed(self) -> bool:
+        """Check if variables of the index have the date_range field, indices created before it exists are queried
+        on temporal_coverage, see match_temporal_coverage.
+
+        Returns:
+            boolean
+        """
+
+        def check():
+            mappings = self.es.indices.get_field_mapping(index=self.es_index, fields="variables.date_range")
+            return any(fields for index in mappings.values() for fields in (index.get("mappings") or {}).values())
+
+        return self._index_check("date_range", check)
+
+    def _index_check(self, name: str, check: typing.Callable[[], bool]) -> bool:
+        checked = self._index_checks.get(name)
+        if checked is None or time.time() - checked[1] > self.INDEX_CHECK_TTL:
+            checked = (bool(check()), time.time())
+            self._index_checks[name] = checked
+        return checked[0]
+
     def scroll_search(self, body: str, size: int, count: int, scroll: str = '1m', **kwargs) -> typing.List[dict]:
         """Scroll search for the case that the result from es is too long.
 
@@ -139,12 +380,135 @@ class QueryManager(ESManager):
         return body
 
     @classmethod
-    def match_temporal_coverage(cls, start: str = None, end: str = None) -> typing.Optional[dict]:
-        """Generate query body for query by temporal_coverage.
+    def match_some_terms_from_variables(cls, terms: list, key: str = "named_entity", minimum_should_match=None) -> dict:
+        """Generate query body for variable documents matching some terms from an array, see search_variables.
+
+        Same as match_some_terms_from_variables_array, without nested query.
+
+        Args:
+            terms: list of terms for matching.
+            key: which key to match, by default, matches column's named_entity.
+            minimum_should_match: minimum should match terms from the list.
+
+        Returns:
+            dict of query body
+        """
+
+        nested = cls.match_some_terms_from_variables_array(terms=terms, key="variables." + key,
+                                                           minimum_should_match=minimum_should_match)["nested"]
+        body = nested["query"]
+        for should in body["bool"]["should"]:
+            should["match_phrase"] = {key: should["match_phrase"]["variables." + key]}
+        return body
+
+    @staticmethod
+    def variable_search_body(query: dict, highlight_key: str = "named_entity") -> str:
+        """Generate search body on variable documents, with highlights of highlight_key.
+
+        Args:
+            query: dict of query body, eg. from match_some_terms_from_variables.
+            highlight_key: key highlighted, None for no highlight.
+
+        Returns:
+            json string of query body
+        """
+
+        body = {"query": query}
+        if highlight_key:
+            body["highlight"] = {"fields": {highlight_key: {"pre_tags": [""], "post_tags": [""],
+                                                            "number_of_fragments": 0}}}
+        return json.dumps(body)
+
+    @staticmethod
+    def match_lsh_bands(bands: typing.List[str], minimum_should_match: int = 1) -> dict:
+        """Generate query body for variables sharing LSH bands with a column, see MinHash.
+
+        Args:
+            bands: LSH bands of the column.
+            minimum_should_match: minimum number of shared bands.
+
+        Returns:
+            dict of query body
+        """
+
+        return {
+            "nested": {
+                "path": "variables",
+                "inner_hits": {"_source": ["name", "minhash.signature", "minhash.size"], "size": 100},
+                "query": {
+                    "bool": {
+                        "should": [{"term": {"variables.minhash.lsh": band}} for band in bands],
+                        "minimum_should_match": minimum_should_match
+                    }
+                }
+            }
+        }
+
+    @classmethod
+    def match_temporal_coverage(cls,
+                                start: str = None,
+                                end: str = None,
+                                relation: str = "contains",
+                                date_range: bool = True
+                                ) -> typing.Optional[dict]:
+        """Generate query body for query by temporal_coverage, a dataset matches if one of its variables does.
+
+        With both start and end, a variable matches if its temporal coverage has the relation to the queried range,
+        queried on the date_range field created at indexing. With only start, variables starting on or before start
+        match, with only end, variables ending on or after end, whatever the relation.
+
+        Args:
+            start: start of the queried date range.
+            end: end of the queried date range.
+            relation: "contains" for variables covering the whole date range, "intersects" for variables covering any
+                part of it, "within" for variables inside the date range.
+            date_range: False for indices created without the date_range field, see
+                match_temporal_coverage_nested and date_range_indexed.
+
+        Returns:
+            dict of query body
+        """
+
+        start = Utils.date_validate(date_text=start) if start else None
+        end = Utils.date_validate(date_text=end) if end else None
+        if not start and not end:
+            warnings.warn("Start and end are valid")
+            return None
+        if not (start and end and date_range):
+            return cls.match_temporal_coverage_nested(start=start, end=end, relation=relation)
+
+        return {
+            "nested": {
+                "path": "variables",
+                "inner_hits": {
+                    "_source": [
+                        "temporal_coverage"
+                    ]
+                },
+                "query": {
+                    "range": {
+                        "variables.date_range": {
+                            "gte": start[:19],
+                            "lte": end[:19],
+                            "relation": relation,
+                            "format": "yyyy-MM-dd'T'HH:mm:ss"
+                        }
+                    }
+                }
+            }
+        }
+
+    @classmethod
+    def match_temporal_coverage_nested(cls, start: str = None, end: str = None, relation: str = "contains") -> \
+            typing.Optional[dict]:
+        """Generate query body for query by temporal_coverage, on the temporal_coverage of nested variables.
+
+        Slower than the date_range query of match_temporal_coverage, for indices created without date_range field.
 
         Args:
             start: dataset should cover date time earlier than the start date.
             end: dataset should cover date time later than the end date.
+            relation: relation to the range from start to end, see match_temporal_coverage.
 
         Returns:
             dict of query body
@@ -173,29 +537,25 @@ class QueryManager(ESManager):
             }
         }
 
-        if start:
-            body["nested"]["query"]["bool"]["must"].append(
-                {
-                    "range": {
-                        "variables.temporal_coverage.start": {
-                            "lte": start,
-                            "format": "yyyy-MM-dd'T'HH:mm:ss"
-                        }
-                    }
-                }
-            )
-
-        if end:
-            body["nested"]["query"]["bool"]["must"].append(
-                {
-                    "range": {
-                        "variables.temporal_coverage.end": {
-                            "gte": end,
-                            "format": "yyyy-MM-dd'T'HH:mm:ss"
+        # bound of the variable, comparison and queried date of every condition
+        conditions = [("start", "lte", start), ("end", "gte", end)]
+        if start and end and relation == "intersects":
+            conditions = [("start", "lte", end), ("end", "gte", start)]
+        elif start and end and relation == "within":
+            conditions = [("start", "gte", start), ("end", "lte", end)]
+
+        for bound, comparison, date in conditions:
+            if date:
+                body["nested"]["query"]["bool"]["must"].append(
+                    {
+                        "range": {
+                            "variables.temporal_coverage." + bound: {
+                                comparison: date,
+                                "format": "yyyy-MM-dd'T'HH:mm:ss"
+                            }
                         }
                     }
-                }
-            )
+                )
 
         return body
 
@@ -376,6 +736,49 @@ class QueryManager(ESManager):
             }
         )
 
+    @classmethod
+    def name_inner_hits(cls, query: dict, name: str) -> dict:
+        """Give the inner hits of nested queries a name, so that several nested queries can be in one query.
+
+        Args:
+            query: dict of query body.
+            name: name of the inner hits, suffixed by a counter if the query has more than one nested query.
+
+        Returns:
+            dict of query body
+        """
+
+        query = copy.deepcopy(query)
+        nested_queries = list()
+        cls._find_nested_queries(query, nested_queries)
+        for idx, nested in enumerate(nested_queries):
+            nested.setdefault("inner_hits", {})["name"] = name if idx == 0 else "{}_{}".format(name, idx)
+        return query
+
+    @classmethod
+    def _find_nested_queries(cls, query: typing.Any, found: typing.List[dict]) -> None:
+        if isinstance(query, dict):
+            for key, value in query.items():
+                if key == "nested" and isinstance(value, dict) and "path" in value:
+                    found.append(value)
+                cls._find_nested_queries(value, found)
+        elif isinstance(query, list):
+            for value in query:
+                cls._find_nested_queries(value, found)
+
+    @classmethod
+    def form_intersection_query(cls, named_queries: typing.List[typing.Tuple[str, dict]]) -> str:
+        """Generate one query matching docs hit by all the queries, intersection is done by elasticsearch.
+
+        Args:
+            named_queries: list of (name, query) tuples, nested queries get their inner hits named by name.
+
+        Returns:
+            json string of query body
+        """
+
+        return cls.form_conjunction_query([cls.name_inner_hits(query, name) for name, query in named_queries if query])
+
     @staticmethod
     def form_conjunction_query(queries: list):
         body = {
@@ -1,16 +1,23 @@
 import json
 import os
 import pandas as pd
+import tempfile
 import warnings
 from datamart.metadata.global_metadata import GlobalMetadata
 from datamart.metadata.variable_metadata import VariableMetadata
 from datamart.es_managers.index_manager import IndexManager
+from datamart.es_managers.id_allocator import IdAllocator
 from datamart.utilities.utils import Utils
+from datamart.utilities.minhash import MinHash
+from datamart.utilities.local_data import LocalDataReader
+from datamart.utilities.fingerprint_store import FingerprintStore
+from datamart.utilities.metadata_dump import MetadataDumpWriter, MetadataDumpReader
 from datamart.profiler import Profiler
 import typing
 import traceback
 
 GLOBAL_INDEX_INTERVAL = 10000
+FINGERPRINT_SAVE_INTERVAL = 100
 
 
 class IndexBuilder(object):
@@ -24,8 +31,12 @@ class IndexBuilder(object):
             self.index_config = json.load(index_info_f)
         self.current_global_index = None
         self.GLOBAL_INDEX_INTERVAL = GLOBAL_INDEX_INTERVAL
+        self.FINGERPRINT_SAVE_INTERVAL = FINGERPRINT_SAVE_INTERVAL
+        self.id_allocator = None
         self.profiler = Profiler()
         self.im = IndexManager(es_host=self.index_config["es_host"], es_port=self.index_config["es_port"])
+        self.minhash = MinHash()
+        self.data_reader = LocalDataReader()
 
     def indexing(self,
                  description_path: str,
@@ -34,7 +45,11 @@ class IndexBuilder(object):
                  query_data_for_indexing: bool = False,
                  save_to_file: str = None,
                  save_to_file_mode: str = "a+",
-                 delete_old_es_index: bool = False
+                 delete_old_es_index: bool = False,
+                 datamart_id: int = None,
+                 dump_writer: MetadataDumpWriter = None,
+                 load_to_es: bool = True,
+                 separate_variables: bool = False
                  ) -> dict:
         """API for the index builder.
 
@@ -44,13 +59,19 @@ class IndexBuilder(object):
         Args:
             description_path: Path to description json file.
             es_index: str, es index for this dataset
-            data_path: Path to data csv file.
+            data_path: Path to data file, csv, compressed csv or parquet, profiled instead of materializing.
             query_data_for_indexing: Bool. If no data is presented, and query_data_for_indexing is False, will only
                 create metadata according to the description json. If query_data_for_indexing is True and no data is
                 presented, will use Materialize to query data for profiling and indexing
-            save_to_file: str, a path to the json line file
+            save_to_file: str, a path to the metadata dump, see MetadataDumpWriter
             save_to_file_mode: str, mode for saving, default "a+"
             delete_old_es_index: bool, boolean if delete original es index if it exist
+            datamart_id: int, reuse this datamart_id and replace the document if it exists, eg. re-indexing a changed
+                dataset
+            dump_writer: MetadataDumpWriter kept open by the caller, used instead of save_to_file
+            load_to_es: bool, create the document in es, False if the caller bulk loads the dump afterwards
+            separate_variables: bool, index variables as separate documents in <es_index>_variables, for datasets
+                with many or large variables, see IndexManager.split_variables
 
         Returns:
             metadata dictionary
@@ -59,31 +80,88 @@ class IndexBuilder(object):
 
         print("==== Creating metadata and indexing for " + description_path)
 
-        self._check_es_index(es_index=es_index, delete_old_es_index=delete_old_es_index)
+        self._check_es_index(es_index=es_index, delete_old_es_index=delete_old_es_index,
+                             separate_variables=separate_variables and load_to_es)
 
-        if not self.current_global_index or delete_old_es_index:
-            self.current_global_index = self.im.current_global_datamart_id(index=es_index)
+        self._check_id_allocator(es_index=es_index)
+
+        description, data = self.load_dataset(description_path=description_path,
+                                              data_path=data_path,
+                                              query_data_for_indexing=query_data_for_indexing)
+
+        metadata = self.build_metadata(description=description, data=data, datamart_id=datamart_id)
+
+        # serialized once for both the dump and es
+        document = json.dumps(metadata)
+
+        if dump_writer:
+            dump_writer.write(metadata, document=document)
+        elif save_to_file:
+            self._save_data(save_to_file=save_to_file, save_mode=save_to_file_mode, metadata=metadata,
+                            document=document)
+
+        if load_to_es:
+            if separate_variables:
+                self.im.index_dataset(metadata=metadata, index=es_index,
+                                      variable_index=self.im.variable_index_name(es_index))
+            elif datamart_id:
+                self.im.index_doc(index=es_index, doc_type='_doc', body=document, id=metadata['datamart_id'])
+            else:
+                self.im.create_doc(index=es_index, doc_type='_doc', body=document, id=metadata['datamart_id'])
+
+        return metadata
+
+    def load_dataset(self,
+                     description_path: str,
+                     data_path: str = None,
+                     query_data_for_indexing: bool = False,
+                     materialization_warning: bool = True
+                     ) -> typing.Tuple[dict, typing.Optional[pd.DataFrame]]:
+        """I/O stage of indexing, read the description and the data, materialize it if there is no data file.
+
+        Args:
+            description_path: Path to description json file.
+            data_path: Path to data file, see _read_data.
+            query_data_for_indexing: Bool, materialize the data if there is no data file.
+            materialization_warning: Bool, index on the description only if materialization fails, raise otherwise
+
+        Returns:
+            Tuple of (description json, dataframe of data)
+        """
 
         description, data = self._read_data(description_path, data_path)
-        if not data and query_data_for_indexing:
+        if data is None and query_data_for_indexing:
             try:
                 data = Utils.materialize(metadata=description).infer_objects()
             except:
+                if not materialization_warning:
+                    raise
                 traceback.print_exc()
                 warnings.warn("Materialization Failed, index based on schema json only")
+        return description, data
 
-        metadata = self.construct_global_metadata(description=description, data=data)
+    def build_metadata(self, description: dict, data: pd.DataFrame = None, datamart_id: int = None) -> dict:
+        """CPU stage of indexing, construct and profile the metadata of a dataset.
 
-        if data is not None:
-            metadata = self.profile(data=data, metadata=metadata)
+        Args:
+            description: description json.
+            data: dataframe of data, profiled if not None.
+            datamart_id: int, datamart_id of the dataset, allocated if not given
 
-        Utils.validate_schema(metadata)
+        Returns:
+            metadata dictionary
+        """
 
-        if save_to_file:
-            self._save_data(save_to_file=save_to_file, save_mode=save_to_file_mode, metadata=metadata)
+        metadata = self.construct_global_metadata(description=description, data=data,
+                                                  overwrite_datamart_id=datamart_id)
 
-        self.im.create_doc(index=es_index, doc_type='_doc', body=metadata, id=metadata['datamart_id'])
+        if data is not None:
+            metadata = self.profile(data=data, metadata=metadata)
+            metadata = self.add_minhash(metadata=metadata, data=data)
 
+        metadata = self.add_date_range(metadata)
+
+        Utils.validate_schema(metadata)
         return metadata
 
     def updating(self,
@@ -103,7 +181,7 @@ class IndexBuilder(object):
             description_path: Path to description json file.
             es_index: str, es index for this dataset
             document_id: int, document id of document which need to be updated
-            data_path: Path to data csv file.
+            data_path: Path to data file, csv, compressed csv or parquet, profiled instead of materializing.
             query_data_for_updating: Bool. If no data is presented, and query_data_for_updating is False, will only
                 create metadata according to the description json. If query_data_for_updating is True and no data is
                 presented, will use Materialize to query data for profiling and indexing
@@ -119,7 +197,7 @@ class IndexBuilder(object):
         self._check_es_index(es_index=es_index)
 
         description, data = self._read_data(description_path, data_path)
-        if not data and query_data_for_updating:
+        if data is None and query_data_for_updating:
             try:
                 data = Utils.materialize(metadata=description).infer_objects()
             except:
@@ -127,6 +205,7 @@ class IndexBuilder(object):
                 warnings.warn("Materialization Failed, index based on schema json only")
 
         metadata = self.construct_global_metadata(description=description, data=data, overwrite_datamart_id=document_id)
+        metadata = self.add_date_range(metadata)
         Utils.validate_schema(metadata)
 
         self.im.update_doc(index=es_index, doc_type='document', body={"doc": metadata},
@@ -141,94 +220,318 @@ class IndexBuilder(object):
                       query_data_for_indexing: bool = False,
                       save_to_file: str = None,
                       save_to_file_mode: str = "a+",
-                      delete_old_es_index: bool = False
+                      delete_old_es_index: bool = False,
+                      incremental: bool = False,
+                      fingerprint_file: str = None,
+                      separate_variables: bool = False
                       ) -> None:
         """Bulk indexing many dataset by providing a path
 
+        In incremental mode, a fingerprint of every description and data file is stored with its datamart_id (see
+        FingerprintStore). Unchanged datasets are skipped, changed ones are re-profiled and replaced under the same
+        datamart_id, and documents of removed description files are deleted. The store is saved every
+        FINGERPRINT_SAVE_INTERVAL indexed datasets and when the run stops, so an interrupted run resumes close to where
+        it stopped.
+
         Args:
             description_dir: dir of description json files.
             es_index: str, es index for this dataset
-            data_dir: dir of data csv files.
+            data_dir: dir of data files, see _list_descriptions.
             query_data_for_indexing: Bool. If no data is presented, and query_data_for_indexing is False, will only
                 create metadata according to the description json. If query_data_for_indexing is True and no data is
                 presented, will use Materialize to query data for profiling and indexing
-            save_to_file: str, a path to the json line file
+            save_to_file: str, a path to the metadata dump, kept open during the whole run
             save_to_file_mode: str, mode for saving, default "a+"
-            delete_old_es_index: bool, boolean if delete original es index if it exist
+            delete_old_es_index: bool, rebuild the es index from description_dir without downtime, see rebuild_index
+            incremental: bool, only index new and changed datasets
+            fingerprint_file: str, path of the fingerprint store, default to
+                <description_dir>/.<es_index>_fingerprints.json
+            separate_variables: bool, index variables as separate documents, see indexing
 
         Returns:
 
         """
 
-        self._check_es_index(es_index=es_index, delete_old_es_index=delete_old_es_index)
-        for description in os.listdir(description_dir):
-            if description.endswith('.json'):
-                description_path = os.path.join(description_dir, description)
-                data_path = None
-                if data_dir:
-                    data_path = os.path.join(data_dir, description.replace("_description.json", ".csv"))
-                self.indexing(description_path=description_path,
-                              es_index=es_index,
-                              data_path=data_path,
-                              query_data_for_indexing=query_data_for_indexing,
-                              save_to_file=save_to_file,
-                              save_to_file_mode=save_to_file_mode)
+        if incremental:
+            fingerprint_file = fingerprint_file or os.path.join(description_dir,
+                                                                ".{}_fingerprints.json".format(es_index))
+
+        if delete_old_es_index:
+            self.rebuild_index(description_dir=description_dir,
+                               es_index=es_index,
+                               data_dir=data_dir,
+                               query_data_for_indexing=query_data_for_indexing,
+                               save_to_file=save_to_file,
+                               fingerprint_file=fingerprint_file if incremental else None,
+                               separate_variables=separate_variables)
+            return
 
-    def _check_es_index(self, es_index: str, delete_old_es_index: bool = False) -> None:
-        """Check es index, delete or create if necessary
+        self._check_es_index(es_index=es_index, separate_variables=separate_variables)
+
+        store = None
+        if incremental:
+            store = FingerprintStore(path=fingerprint_file)
+
+        dump_writer = None
+        if save_to_file:
+            dump_writer = MetadataDumpWriter(path=save_to_file, mode=self._dump_mode(save_to_file_mode))
+
+        unsaved = 0
+        try:
+            seen = set()
+            for description_path, data_path in self._list_descriptions(description_dir, data_dir):
+                datamart_id = None
+                if store:
+                    seen.add(os.path.abspath(description_path))
+                    fingerprint = store.fingerprint(description_path=description_path, data_path=data_path)
+                    if store.is_unchanged(description_path, fingerprint):
+                        continue
+                    entry = store.get(description_path)
+                    datamart_id = entry["datamart_id"] if entry else None
+
+                metadata = self.indexing(description_path=description_path,
+                                         es_index=es_index,
+                                         data_path=data_path,
+                                         query_data_for_indexing=query_data_for_indexing,
+                                         datamart_id=datamart_id,
+                                         dump_writer=dump_writer,
+                                         separate_variables=separate_variables)
+                if store:
+                    store.set(description_path, fingerprint, metadata["datamart_id"])
+                    unsaved += 1
+                    if unsaved >= self.FINGERPRINT_SAVE_INTERVAL:
+                        store.save()
+                        unsaved = 0
+        finally:
+            if store and unsaved:
+                store.save()
+            if dump_writer:
+                dump_writer.close()
+
+        if store:
+            removed = [path for path in store.entries if path not in seen and
+                       os.path.dirname(path) == os.path.abspath(description_dir)]
+            for description_path in removed:
+                datamart_id = store.remove(description_path)["datamart_id"]
+                self.im.delete_doc(index=es_index, doc_type='_doc', id=datamart_id)
+                if separate_variables:
+                    self.im.delete_variable_docs(index=self.im.variable_index_name(es_index), datamart_id=datamart_id)
+            store.save()
+
+    def rebuild_index(self,
+                      description_dir: str,
+                      es_index: str,
+                      data_dir: str = None,
+                      query_data_for_indexing: bool = False,
+                      save_to_file: str = None,
+                      fingerprint_file: str = None,
+                      keep_old_es_index: bool = False,
+                      warm_up_queries: typing.List[dict] = None,
+                      separate_variables: bool = False
+                      ) -> str:
+        """Rebuild an es index from scratch without downtime.
+
+        es_index is served as an alias. Metadata are built into a new versioned index and bulk loaded with refresh
+        and replicas disabled, then the new index is warmed up and the alias is atomically switched to it. Searches
+        through the alias (eg. Augment) keep hitting the old index for the whole rebuild. If anything fails before the
+        switch, the new index is deleted and the alias is left untouched.
+
+        Args:
+            description_dir: dir of description json files.
+            es_index: str, alias the rebuilt index is served under
+            data_dir: dir of data files, see _list_descriptions.
+            query_data_for_indexing: Bool, see bulk_indexing
+            save_to_file: str, path to keep the metadata dump of the rebuild, a temporary dump is used if not given
+            fingerprint_file: str, path of a fingerprint store to reset with the rebuilt datasets, see bulk_indexing
+            keep_old_es_index: bool, keep the indices the alias pointed to before, deleted otherwise
+            warm_up_queries: list of search bodies run against the new index before the switch
+            separate_variables: bool, index variables as separate documents, the variable index is rebuilt and
+                switched the same way, see indexing
+
+        Returns:
+            name of the new index
+        """
+
+        new_index = self.im.versioned_index_name(es_index)
+        print("==== Rebuilding {} into {}".format(es_index, new_index))
+        self.im.create_index(index=new_index)
+        new_variable_index = None
+        if separate_variables:
+            new_variable_index = self.im.versioned_index_name(self.im.variable_index_name(es_index))
+            self.im.create_index(index=new_variable_index, variables=True)
+
+        dump_path = save_to_file
+        if not dump_path:
+            fd, dump_path = tempfile.mkstemp(suffix=".ndjson")
+            os.close(fd)
+
+        store = None
+        if fingerprint_file:
+            store = FingerprintStore(path=fingerprint_file)
+            store.entries = dict()
+
+        # ids come from the sequence of the alias, so they do not overlap the blocks already reserved by workers
+        # indexing into the alias during the rebuild
+        allocator = IdAllocator(index_manager=self.im, es_index=es_index, interval=self.GLOBAL_INDEX_INTERVAL)
+
+        try:
+            with MetadataDumpWriter(path=dump_path) as dump_writer:
+                for description_path, data_path in self._list_descriptions(description_dir, data_dir):
+                    metadata = self.indexing(description_path=description_path,
+                                             es_index=new_index,
+                                             data_path=data_path,
+                                             query_data_for_indexing=query_data_for_indexing,
+                                             datamart_id=allocator.next_id(),
+                                             dump_writer=dump_writer,
+                                             load_to_es=False)
+                    if store:
+                        store.set(description_path, store.fingerprint(description_path=description_path,
+                                                                      data_path=data_path), metadata["datamart_id"])
+            self._bulk_load_metadata(metadata_out_file=dump_path, es_index=new_index,
+                                     variable_index=new_variable_index)
+            self.im.warm_up(index=new_index, queries=warm_up_queries)
+        except:
+            self.im.delete_index(index=[name for name in [new_index, new_variable_index] if name])
+            raise
+        finally:
+            if not save_to_file:
+                for path in [dump_path, MetadataDumpReader.checksum_path(dump_path)]:
+                    if os.path.exists(path):
+                        os.remove(path)
+
+        if new_variable_index:
+            self._switch_alias(es_index=self.im.variable_index_name(es_index), new_index=new_variable_index,
+                               keep_old_es_index=keep_old_es_index)
+        self._switch_alias(es_index=es_index, new_index=new_index, keep_old_es_index=keep_old_es_index)
+        self.id_allocator = allocator
+        if store:
+            store.save()
+        return new_index
+
+    def _check_id_allocator(self, es_index: str) -> None:
+        if not self.id_allocator or self.id_allocator.es_index != es_index:
+            self.id_allocator = IdAllocator(index_manager=self.im, es_index=es_index,
+                                            interval=self.GLOBAL_INDEX_INTERVAL)
+
+    def _check_es_index(self, es_index: str, delete_old_es_index: bool = False, separate_variables: bool = False
+                        ) -> None:
+        """Check es index, create it if necessary, served as an alias of a versioned index.
+
+        Workers starting together on a missing es index all create and alias the same first index, see
+        IndexManager.first_index_name, so none of them deletes an index another one already writes to.
 
         Args:
             es_index: str, es index for this dataset
-            delete_old_es_index: bool, boolean if delete original es index if it exist
+            delete_old_es_index: bool, switch the alias to a new empty index and delete the old one, see rebuild_index
+                to rebuild without downtime
+            separate_variables: bool, check the index of variable documents as well
 
         Returns:
 
         """
 
-        if not self.im.check_exists(index=es_index):
-            self.im.create_index(index=es_index)
-        elif delete_old_es_index:
-            self.im.delete_index(index=[es_index])
-            self.im.create_index(index=es_index)
+        indices = [(es_index, False)]
+        if separate_variables:
+            indices.append((self.im.variable_index_name(es_index), True))
+        for alias, variables in indices:
+            if delete_old_es_index:
+                new_index = self.im.versioned_index_name(alias)
+                self.im.create_index(index=new_index, variables=variables)
+                self._switch_alias(es_index=alias, new_index=new_index)
+            elif not self.im.check_exists(index=alias):
+                # the id sequence is left as is, another worker may already allocate from it
+                first_index = self.im.first_index_name(alias)
+                if self.im.create_index_if_missing(index=first_index, variables=variables):
+                    print("==== Created {} for {}".format(first_index, alias))
+                self.im.add_alias(alias=alias, index=first_index)
+
+    def _switch_alias(self, es_index: str, new_index: str, keep_old_es_index: bool = False) -> None:
+        """Atomically point the alias es_index to new_index, delete the old indices unless keep_old_es_index.
+
+        Args:
+            es_index: str, alias
+            new_index: str, concrete index
+            keep_old_es_index: bool, keep the indices the alias pointed to before
+
+        Returns:
+
+        """
+
+        old_indices = self.im.swap_alias(alias=es_index, index=new_index)
+        print("==== {} now points to {}".format(es_index, new_index))
+        if old_indices and not keep_old_es_index:
+            self.im.delete_index(index=old_indices)
+        # documents are written through the alias, whose sequence is kept, sequences of concrete indices are unused
+        for name in [new_index] + old_indices:
+            self.im.delete_sequence(name=name)
+        self.id_allocator = None
 
     @staticmethod
-    def _read_data(description_path: str, data_path: str = None) -> typing.Tuple[dict, pd.DataFrame]:
-        """Read dataset description json and dataset if present.
+    def _list_descriptions(description_dir: str,
+                           data_dir: str = None
+                           ) -> typing.Iterator[typing.Tuple[str, typing.Optional[str]]]:
+        """Description files of a dir, in order, with the path of their data file if data_dir is given.
+
+        The data file of <name>_description.json is <data_dir>/<name>.<ext>, ext is any extension supported by
+        LocalDataReader, eg. csv, csv.gz or parquet.
+
+        Args:
+            description_dir: dir of description json files.
+            data_dir: dir of data files.
+
+        Returns:
+            iterator of (description path, data path), data path is None if there is no data file
+        """
+
+        for description in sorted(os.listdir(description_dir)):
+            if description.endswith('.json') and not description.startswith('.'):
+                data_path = None
+                if data_dir:
+                    data_path = LocalDataReader.find(data_dir, description.replace("_description.json", ""))
+                yield os.path.join(description_dir, description), data_path
+
+    def _read_data(self, description_path: str, data_path: str = None) -> typing.Tuple[dict, pd.DataFrame]:
+        """Read dataset description json and dataset if present, see LocalDataReader for the supported formats.
 
         Args:
             description_path: Path to description json file.
-            data_path: Path to data csv file.
+            data_path: Path to data file.
 
         Returns:
-            Tuple of (description json, dataframe of data)
+            Tuple of (description json, dataframe of data), data is None if there is no data file
         """
 
-        description = json.load(open(description_path, 'r'))
+        with open(description_path, 'r') as f:
+            description = json.load(f)
         Utils.validate_schema(description)
+        data = None
         if data_path:
-            data = pd.read_csv(open(data_path), 'r')
-        else:
-            data = None
+            if os.path.isfile(data_path):
+                data = self.data_reader.read(data_path)
+            else:
+                warnings.warn("Data file {} does not exist".format(data_path))
         return description, data
 
-    @staticmethod
-    def _save_data(save_to_file: str, save_mode: str, metadata: dict) -> None:
+    @classmethod
+    def _save_data(cls, save_to_file: str, save_mode: str, metadata: dict, document: str = None) -> None:
         """Save metadata json to file.
 
         Args:
             save_to_file: Path of the saving file.
             save_mode: save mode
             metadata: metadata dict.
+            document: json of metadata if already serialized
 
         Returns:
-            save to file with 2 lines for each metadata, first line is id, second line is metadata json
+            save to the metadata dump, one line for each metadata, see MetadataDumpWriter
         """
 
-        with open(save_to_file, mode=save_mode) as out:
-            out.write(str(metadata["datamart_id"]))
-            out.write("\n")
-            out.write(json.dumps(metadata))
-            out.write("\n")
+        with MetadataDumpWriter(path=save_to_file, mode=cls._dump_mode(save_mode)) as writer:
+            writer.write(metadata, document=document)
+
+    @staticmethod
+    def _dump_mode(save_mode: str) -> str:
+        return "a" if save_mode.startswith("a") else "w"
 
     def construct_global_metadata(self,
                                   description: dict,
@@ -246,11 +549,13 @@ class IndexBuilder(object):
         Returns:
             metadata dict
         """
-        if not overwrite_datamart_id:
+        if overwrite_datamart_id:
+            datamart_id = overwrite_datamart_id
+        elif self.id_allocator:
+            datamart_id = self.id_allocator.next_id()
+        else:
             self.current_global_index += self.GLOBAL_INDEX_INTERVAL
             datamart_id = self.current_global_index
-        else:
-            datamart_id = overwrite_datamart_id
 
         global_metadata = GlobalMetadata.construct_global(description, datamart_id=datamart_id)
 
@@ -309,6 +614,55 @@ class IndexBuilder(object):
 
         return variable_metadata
 
+    @staticmethod
+    def add_date_range(metadata: dict) -> dict:
+        """Add date_range fields built from temporal_coverage, for fast range queries in es.
+
+        Every variable with a temporal_coverage having both start and end gets a date_range, see
+        QueryManager.match_temporal_coverage.
+
+        Args:
+            metadata: metadata dict
+
+        Returns:
+            metadata dictionary
+        """
+
+        for variable in metadata.get("variables") or []:
+            date_range = Utils.date_range_from_temporal_coverage(variable.get("temporal_coverage"))
+            # an open date_range would match queries the temporal_coverage of the variable does not
+            if date_range and "gte" in date_range and "lte" in date_range:
+                variable["date_range"] = date_range
+
+        return metadata
+
+    def add_minhash(self, metadata: dict, data: pd.DataFrame) -> dict:
+        """Add minhash fields to variables, for finding joinable columns by LSH lookups, see MinHash.
+
+        Float columns are skipped, they are rarely join keys.
+
+        Args:
+            metadata: metadata dict
+            data: dataset
+
+        Returns:
+            metadata dictionary
+        """
+
+        for col_offset, variable in enumerate((metadata.get("variables") or [])[:data.shape[1]]):
+            column = data.iloc[:, col_offset]
+            if column.dtype.kind == "f":
+                continue
+            signature, size = self.minhash.signature(column)
+            if signature:
+                variable["minhash"] = {
+                    "signature": signature,
+                    "size": size,
+                    "lsh": self.minhash.lsh(signature)
+                }
+
+        return metadata
+
     def profile(self, data: pd.DataFrame, metadata: dict) -> dict:
         """Any profiler needed should be called here.
 
@@ -330,16 +684,18 @@ class IndexBuilder(object):
 
     def _bulk_load_metadata(self,
                             metadata_out_file: str,
-                            es_index: str
-                            ) -> None:
+                            es_index: str,
+                            **kwargs
+                            ) -> dict:
         """Internal method for bulk loading documents to elasticsearch.
 
         Args:
             metadata_out_file: file of metadata output file produced by index builder
             es_index: str of es index
+            kwargs: bulk load arguments, see IndexManager.create_doc_bulk
 
         Returns:
-
+            report dict
         """
 
-        self.im.create_doc_bulk(file=metadata_out_file, index=es_index)
+        return self.im.create_doc_bulk(file=metadata_out_file, index=es_index, **kwargs)
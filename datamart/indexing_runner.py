@@ -0,0 +1,239 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+import json
+import os
+import shutil
+import tempfile
+import time
+import traceback
+import typing
+import warnings
+from datamart.index_builder import IndexBuilder
+from datamart.utilities.fingerprint_store import FingerprintStore
+from datamart.utilities.job_queue import IndexJobQueue
+from datamart.utilities.metadata_dump import MetadataDumpWriter
+from datamart.utilities.utils import Utils
+
+# IndexBuilder of a cpu worker process, created on its first job
+_worker_index_builder = None
+
+
+def _build_metadata(description: dict, data_path: str, datamart_id: int) -> dict:
+    global _worker_index_builder
+    if _worker_index_builder is None:
+        _worker_index_builder = IndexBuilder()
+    return _read_and_build(_worker_index_builder, description, data_path, datamart_id)
+
+
+def _read_and_build(index_builder: IndexBuilder, description: dict, data_path: str, datamart_id: int) -> dict:
+    data = index_builder.data_reader.read(data_path) if data_path else None
+    return index_builder.build_metadata(description=description, data=data, datamart_id=datamart_id)
+
+
+class IndexingRunner(object):
+    """Index many datasets from a persistent job queue, see IndexJobQueue.
+
+    Each job goes through the two stages of IndexBuilder.indexing on separate pools: reading the description and
+    materializing remote data (I/O bound) on a thread pool, then reading the data file, building and profiling the
+    metadata (CPU bound) on a process pool. Workers get the description and the path of the data file, never the data,
+    materialized data is spilled to a temporary csv file for them. Documents are written to es as jobs complete. Failed
+    jobs are retried with backoff by the queue, and since the queue is persisted after every step, running again after
+    a crash resumes where it stopped. Runners can share a queue, the leases of their jobs are renewed while they work on
+    them, see IndexJobQueue.
+
+    Datasets are indexed as IndexBuilder.indexing does, with separate variable documents if separate_variables. Given a
+    fingerprint_file, the fingerprints of indexed datasets are recorded as IndexBuilder.bulk_indexing does in
+    incremental mode, so a later incremental bulk_indexing skips them. The runner never deletes documents of removed
+    description files, only an incremental bulk_indexing does.
+
+        queue = IndexJobQueue("indexing.sqlite")
+        runner = IndexingRunner(IndexBuilder(), queue)
+        runner.enqueue_dir(description_dir)
+        runner.run(es_index="datamart")
+
+    """
+
+    def __init__(self,
+                 index_builder: IndexBuilder,
+                 queue: IndexJobQueue,
+                 io_workers: int = 8,
+                 cpu_workers: int = None,
+                 use_processes: bool = True,
+                 poll_interval: float = 1.0
+                 ) -> None:
+        """Init method of IndexingRunner.
+
+        Args:
+            index_builder: IndexBuilder loading the data and writing the documents.
+            queue: IndexJobQueue of the jobs.
+            io_workers: number of threads loading data.
+            cpu_workers: number of processes building metadata, default to the number of cpus.
+            use_processes: build metadata on a process pool, on a thread pool if False, eg. for debugging
+            poll_interval: max seconds between two checks of the queue.
+
+        Returns:
+
+        """
+
+        self.ib = index_builder
+        self.queue = queue
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.poll_interval = poll_interval
+
+    def enqueue_dir(self, description_dir: str, data_dir: str = None, reset: bool = False) -> int:
+        """Add a job for every description file of a dir, see IndexBuilder._list_descriptions.
+
+        Args:
+            description_dir: dir of description json files.
+            data_dir: dir of data files.
+            reset: make jobs already in the queue pending again
+
+        Returns:
+            number of description files
+        """
+
+        count = 0
+        for description_path, data_path in self.ib._list_descriptions(description_dir, data_dir):
+            self.queue.add(description_path=description_path, data_path=data_path, reset=reset)
+            count += 1
+        return count
+
+    def run(self,
+            es_index: str,
+            query_data_for_indexing: bool = True,
+            dump_writer: MetadataDumpWriter = None,
+            separate_variables: bool = False,
+            fingerprint_file: str = None
+            ) -> typing.Dict[str, int]:
+        """Run the queue until no job is pending.
+
+        Args:
+            es_index: str, es index for the datasets
+            query_data_for_indexing: Bool, materialize the data of datasets without data file
+            dump_writer: MetadataDumpWriter the metadata are also written to
+            separate_variables: bool, index variables as separate documents, see IndexBuilder.indexing
+            fingerprint_file: str, path of the fingerprint store indexed datasets are recorded in, see FingerprintStore
+
+        Returns:
+            number of jobs per status
+        """
+
+        self.ib._check_es_index(es_index=es_index, separate_variables=separate_variables)
+        self.ib._check_id_allocator(es_index=es_index)
+        requeued = self.queue.requeue_expired()
+        if requeued:
+            print("==== Resuming {} interrupted jobs".format(requeued))
+
+        io_pool = ThreadPoolExecutor(max_workers=self.io_workers)
+        if self.use_processes:
+            cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+            build = _build_metadata
+        else:
+            cpu_pool = ThreadPoolExecutor(max_workers=self.cpu_workers)
+            build = self._build_metadata
+
+        store = FingerprintStore(path=fingerprint_file) if fingerprint_file else None
+        unsaved = 0
+        spill_dir = tempfile.mkdtemp(prefix="datamart_indexing_")
+        renewed = time.time()
+
+        loading = dict()
+        building = dict()
+        try:
+            while True:
+                if time.time() - renewed > self.queue.lease / 3:
+                    self.queue.renew([job["id"] for job in list(loading.values()) + list(building.values())])
+                    renewed = time.time()
+
+                # prepared datasets waiting for a cpu worker may hold spilled data on disk, keep at most two per worker
+                if len(building) < 2 * self.cpu_workers and len(loading) < self.io_workers:
+                    for job in self.queue.claim(limit=self.io_workers - len(loading)):
+                        future = io_pool.submit(self._prepare_dataset, job=job, store=store,
+                                                query_data_for_indexing=query_data_for_indexing, spill_dir=spill_dir)
+                        loading[future] = job
+
+                if not loading and not building:
+                    next_attempt = self.queue.next_attempt()
+                    if next_attempt is None:
+                        break
+                    time.sleep(min(max(next_attempt - time.time(), 0.0), self.poll_interval))
+                    continue
+
+                done, _ = wait(list(loading) + list(building), timeout=self.poll_interval,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in loading:
+                        job = loading.pop(future)
+                        try:
+                            job["fingerprint"], description, data_path, job["spill_path"] = future.result()
+                            if job["datamart_id"] is None:
+                                job["datamart_id"] = self.ib.id_allocator.next_id()
+                                self.queue.set_datamart_id(job["id"], job["datamart_id"])
+                            building[cpu_pool.submit(build, description, data_path, job["datamart_id"])] = job
+                        except Exception:
+                            self._fail(job)
+                    else:
+                        job = building.pop(future)
+                        if job["spill_path"]:
+                            os.remove(job["spill_path"])
+                        try:
+                            metadata = future.result()
+                            document = json.dumps(metadata)
+                            if separate_variables:
+                                self.ib.im.index_dataset(metadata=metadata, index=es_index,
+                                                         variable_index=self.ib.im.variable_index_name(es_index))
+                            else:
+                                self.ib.im.index_doc(index=es_index, doc_type='_doc', body=document,
+                                                     id=metadata['datamart_id'])
+                            if dump_writer:
+                                dump_writer.write(metadata, document=document)
+                            self.queue.complete(job["id"])
+                            if store:
+                                store.set(job["description_path"], job["fingerprint"], metadata["datamart_id"])
+                                unsaved += 1
+                                if unsaved >= self.ib.FINGERPRINT_SAVE_INTERVAL:
+                                    store.save()
+                                    unsaved = 0
+                            print("==== Indexed " + job["description_path"])
+                        except Exception:
+                            self._fail(job)
+        finally:
+            io_pool.shutdown()
+            cpu_pool.shutdown()
+            shutil.rmtree(spill_dir, ignore_errors=True)
+            if store and unsaved:
+                store.save()
+
+        return self.queue.counts()
+
+    def _prepare_dataset(self, job: dict, store: FingerprintStore, query_data_for_indexing: bool, spill_dir: str) -> \
+            tuple:
+        """I/O stage of a job, see IndexBuilder.load_dataset, the data is only read from disk by the cpu worker.
+
+        Returns:
+            Tuple of (fingerprint, description json, path of data file, path of spilled data file)
+        """
+
+        # fingerprinted before reading, a file changed while indexing is indexed again by the next incremental run
+        fingerprint = store.fingerprint(description_path=job["description_path"],
+                                        data_path=job["data_path"]) if store else None
+        description, _ = self.ib._read_data(job["description_path"])
+        data_path = job["data_path"]
+        if data_path and not os.path.isfile(data_path):
+            warnings.warn("Data file {} does not exist".format(data_path))
+            data_path = None
+
+        spill_path = None
+        if data_path is None and query_data_for_indexing:
+            data = Utils.materialize(metadata=description).infer_objects()
+            spill_path = data_path = os.path.join(spill_dir, "{}.csv".format(job["id"]))
+            data.to_csv(spill_path, index=False)
+        return fingerprint, description, data_path, spill_path
+
+    def _build_metadata(self, description: dict, data_path: str, datamart_id: int) -> dict:
+        return _read_and_build(self.ib, description, data_path, datamart_id)
+
+    def _fail(self, job: dict) -> None:
+        retry = self.queue.fail(job["id"], traceback.format_exc())
+        print("==== Failed {}, {}".format(job["description_path"], "will retry" if retry else "giving up"))
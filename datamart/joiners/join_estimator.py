@@ -0,0 +1,127 @@
+import pandas as pd
+from datamart.joiners.temporal_joiner import TemporalJoiner
+from datamart.utilities.utils import Utils
+import typing
+
+
+class JoinEstimator(object):
+    """Estimate join quality from indexed metadata only, before the right dataset is materialized.
+
+    Every key part is estimated from the right variable metadata:
+        named_entity: share of left rows whose normalized value is in the indexed named entities
+        temporal_coverage: share of left rows whose date is in the indexed coverage
+    Other key parts are not estimated and do not lower the match rate. Key parts are assumed independent, so the match
+    rate is the product of the match rates of all parts.
+
+    """
+
+    @classmethod
+    def estimate(cls,
+                 left_df: pd.DataFrame,
+                 right_metadata: dict,
+                 left_columns: typing.List[typing.List[int]],
+                 right_columns: typing.List[typing.List[int]]
+                 ) -> dict:
+        """Estimate match rate and row count of a left join.
+
+        Args:
+            left_df: pandas Dataframe to be augmented
+            right_metadata: indexed metadata of the right dataset
+            left_columns: list of list of integers from left df for join
+            right_columns: list of list of integers from right dataset for join
+
+        Returns:
+            dict with
+                match_rate: estimated share of left rows with a match
+                matched_rows: estimated number of left rows with a match
+                estimated_rows: estimated number of rows of the joined dataframe
+                key_parts: list of dict with method and match_rate of every key part
+        """
+
+        variables = right_metadata.get("variables") or []
+        key_parts = list()
+        match_rate = 1.0
+        for left_column, right_column in zip(left_columns, right_columns):
+            method, rate = "unknown", None
+            if len(left_column) == 1 and len(right_column) == 1 and right_column[0] < len(variables):
+                column = left_df.iloc[:, left_column[0]]
+                variable = variables[right_column[0]]
+                if variable.get("named_entity"):
+                    method, rate = "named_entity", cls.named_entity_match_rate(column, variable["named_entity"])
+                elif variable.get("temporal_coverage"):
+                    method, rate = "temporal_coverage", cls.temporal_match_rate(column, variable["temporal_coverage"])
+            key_parts.append({"method": method, "match_rate": rate})
+            if rate is not None:
+                match_rate *= rate
+
+        matched_rows = int(round(left_df.shape[0] * match_rate))
+        fan_out = cls.fan_out(right_metadata, right_columns)
+        return {
+            "match_rate": match_rate,
+            "matched_rows": matched_rows,
+            "estimated_rows": int(round(left_df.shape[0] - matched_rows + matched_rows * fan_out)),
+            "key_parts": key_parts
+        }
+
+    @staticmethod
+    def named_entity_match_rate(column: pd.Series, named_entity: typing.List[str]) -> float:
+        """Share of rows of a column in named entities, case and surrounding spaces are ignored.
+
+        Args:
+            column: pandas Series
+            named_entity: list of indexed named entities
+
+        Returns:
+            float between 0 and 1
+        """
+
+        if column.empty:
+            return 0.0
+        entities = pd.Index(pd.Series(named_entity).astype(str).str.strip().str.lower().unique())
+        values = column.astype(str).str.strip().str.lower()
+        return float((entities.get_indexer(values.values) >= 0)[column.notnull().values].sum()) / column.shape[0]
+
+    @staticmethod
+    def temporal_match_rate(column: pd.Series, temporal_coverage: dict) -> float:
+        """Share of rows of a column with a date in a temporal coverage.
+
+        Args:
+            column: pandas Series
+            temporal_coverage: dict with start and end, either may be missing
+
+        Returns:
+            float between 0 and 1
+        """
+
+        if column.empty:
+            return 0.0
+        dates = TemporalJoiner.parse_dates(column)
+        start = temporal_coverage.get("start") and Utils.date_validate(temporal_coverage["start"])
+        end = temporal_coverage.get("end") and Utils.date_validate(temporal_coverage["end"])
+        in_coverage = dates.notnull()
+        if start:
+            in_coverage &= dates >= pd.Timestamp(start)
+        if end:
+            in_coverage &= dates <= pd.Timestamp(end)
+        return float(in_coverage.sum()) / column.shape[0]
+
+    @staticmethod
+    def fan_out(right_metadata: dict, right_columns: typing.List[typing.List[int]]) -> float:
+        """Estimated number of right rows for every matched key, from DSbox distinct value ratios when indexed.
+
+        Args:
+            right_metadata: indexed metadata of the right dataset
+            right_columns: list of list of integers from right dataset for join
+
+        Returns:
+            float, 1 when unknown
+        """
+
+        variables = right_metadata.get("variables") or []
+        ratios = [variables[offset].get("dsbox_profiled", {}).get("ratio_of_distinct_values")
+                  for column in right_columns for offset in column if offset < len(variables)]
+        ratios = [ratio for ratio in ratios if ratio]
+        if not ratios:
+            return 1.0
+        # the key is at least as distinct as its most distinct column
+        return 1.0 / max(ratios)
@@ -0,0 +1,139 @@
+import pandas as pd
+from datamart.joiners.joiner_base import DefaultJoiner
+from datamart.joiners.temporal_joiner import TemporalJoiner
+from datamart.utilities.utils import Utils
+import typing
+
+
+class JoinPlanner(object):
+    """Plan materialization for a join, push the left side join keys down to the materializer as constrains.
+
+    Only constrains listed in the materializer's PUSHDOWN_CONSTRAINS are planned, so the materializer fetches only
+    rows which can match the left side.
+
+    """
+
+    # Pushing down too many named entities is often slower than fetching everything
+    MAX_PUSHDOWN_VALUES = 1000
+
+    @classmethod
+    def plan(cls,
+             left_df: pd.DataFrame,
+             right_metadata: dict,
+             left_columns: typing.List[typing.List[int]],
+             right_columns: typing.List[typing.List[int]],
+             left_metadata: dict = None,
+             constrains: dict = None
+             ) -> dict:
+        """Plan constrains for materializing the right side of a join.
+
+        Args:
+            left_df: pandas Dataframe to be augmented
+            right_metadata: metadata of the right dataset, with materialization
+            left_columns: list of list of integers from left df for join
+            right_columns: list of list of integers from the right dataset for join
+            left_metadata: metadata of left dataframe
+            constrains: constrains given by the user, they are kept as they are
+
+        Returns:
+            constrains dict for Utils.get_dataset
+        """
+
+        constrains = dict(constrains or {})
+        if constrains.get("named_entity"):
+            constrains["named_entity"] = dict(constrains["named_entity"])
+        pushdown = cls.pushdown_constrains(right_metadata)
+
+        for left_column, right_column in zip(left_columns, right_columns):
+            if len(left_column) != 1 or len(right_column) != 1:
+                continue
+            left_offset, right_offset = left_column[0], right_column[0]
+            column = left_df.iloc[:, left_offset]
+
+            if DefaultJoiner.is_temporal_column(left_df, left_offset, left_metadata) or \
+                    cls._is_temporal_variable(right_metadata, right_offset):
+                if pushdown.get("date_range") and "date_range" not in constrains:
+                    date_range = cls.date_range(column)
+                    if date_range:
+                        constrains["date_range"] = date_range
+
+            elif right_offset in (pushdown.get("named_entity") or []):
+                named_entity = constrains.setdefault("named_entity", dict())
+                if right_offset not in named_entity:
+                    values = cls.named_entities(column)
+                    if 0 < len(values) <= cls.MAX_PUSHDOWN_VALUES:
+                        named_entity[right_offset] = values
+
+        if not constrains.get("named_entity", True):
+            del constrains["named_entity"]
+        return constrains
+
+    @staticmethod
+    def pushdown_constrains(metadata: dict) -> dict:
+        """Constrains the materializer of a dataset can push down.
+
+        Args:
+            metadata: metadata dict with materialization
+
+        Returns:
+            dict, see MaterializerBase.PUSHDOWN_CONSTRAINS
+        """
+
+        try:
+            materializer_class = Utils.load_materializer_class(metadata["materialization"]["python_path"])
+        except (ImportError, KeyError, ValueError):
+            return dict()
+        return materializer_class.PUSHDOWN_CONSTRAINS
+
+    @staticmethod
+    def named_entities(column: pd.Series) -> typing.List[str]:
+        """Distinct values of a column, compared case insensitively, the first spelling is kept.
+
+        Values are pushed down as they are written since materializers look them up in their own case, eg. WorldBank
+        country names are title cased.
+
+        Args:
+            column: pandas Series
+
+        Returns:
+            list of str, sorted case insensitively
+        """
+
+        values = column.dropna().astype(str).str.strip()
+        values = values[(values != "") & ~values.str.lower().duplicated()]
+        return sorted(values.tolist(), key=lambda value: (value.lower(), value))
+
+    @staticmethod
+    def date_range(column: pd.Series) -> typing.Optional[dict]:
+        """Date range covering all dates of a column.
+
+        Args:
+            column: pandas Series
+
+        Returns:
+            dict with start and end in yyyy-mm-ddTHH:MM:SS, None if no date
+        """
+
+        dates = TemporalJoiner.parse_dates(column).dropna()
+        if dates.empty:
+            return None
+        granularity = TemporalJoiner.detect_granularity(dates)
+        end = dates.max()
+        if granularity == "year":
+            end = end.replace(month=12, day=31)
+        elif granularity == "month":
+            end = end + pd.offsets.MonthEnd(0)
+        return {
+            "start": dates.min().strftime("%Y-%m-%dT%H:%M:%S"),
+            "end": end.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+
+    @staticmethod
+    def _is_temporal_variable(metadata: dict, offset: int) -> bool:
+        variables = (metadata or {}).get("variables") or []
+        if offset >= len(variables):
+            return False
+        variable = variables[offset]
+        if variable.get("temporal_coverage"):
+            return True
+        return any(semantic_type.endswith("/Time") for semantic_type in variable.get("semantic_type") or [])
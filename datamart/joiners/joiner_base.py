@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
 from enum import Enum
 import typing
 
@@ -7,8 +9,14 @@ import typing
 class JoinerBase(ABC):
     """Abstract class of Joiner, should be extended for other joiners.
 
+    METADATA_FEATURES declares the metadata features the joiner reads, Augment.join only computes those:
+        "basic": basic profiling (named_entity, temporal_coverage) of the join columns
+        "dsbox": DSbox features of all columns, in "dsbox_profiled" of every variable
+
     """
 
+    METADATA_FEATURES = []
+
     @abstractmethod
     def join(self, **kwargs) -> pd.DataFrame:
         """Implement join method which returns a pandas Dataframe
@@ -20,36 +28,272 @@ class JoinerBase(ABC):
 class JoinerType(Enum):
     DEFAULT = "default"
     RLTK = "rltk"
+    TEMPORAL = "temporal"
+    PARTITIONED = "partitioned"
 
 
 class DefaultJoiner(JoinerBase):
     """Default join class.
 
+    Exact left join on normalized keys. Key values are trimmed, lower cased and coerced by type, so "2018" and 2018,
+    or " New York" and "new york", are the same key. Columns that metadata marks as temporal are compared as dates.
+    Each element of left_columns/right_columns is a list of columns forming one (possibly multi-column) key part.
+
     """
 
-    @staticmethod
-    def join(left_df: pd.DataFrame,
+    METADATA_FEATURES = ["basic"]
+
+    KEY_PART_SEPARATOR = "\x1f"
+
+    @classmethod
+    def join(cls,
+             left_df: pd.DataFrame,
              right_df: pd.DataFrame,
              left_columns: typing.List[typing.List[int]],
              right_columns: typing.List[typing.List[int]],
+             left_metadata: dict = None,
+             right_metadata: dict = None,
              **kwargs
              ) -> pd.DataFrame:
 
-        left_columns = [x[0] for x in left_columns]
-        right_columns = [x[0] for x in right_columns]
-
         if len(left_columns) != len(right_columns):
-            raise ValueError("Default join only perform on 1-1 mapping")
+            raise ValueError("Default join needs the same number of key parts on both side")
+
+        temporal = [cls.is_temporal_column(left_df, column, left_metadata) or
+                    cls.is_temporal_column(right_df, right_columns[idx][0], right_metadata)
+                    for idx, column in enumerate(x[0] for x in left_columns)]
+
+        left_keys = cls.join_keys(left_df, left_columns, temporal)
+        right_keys = cls.join_keys(right_df, right_columns, temporal)
+
+        left_positions, right_positions = cls.hash_join_indexer(left_keys=left_keys, right_keys=right_keys)
+        return cls.assemble(left_df=left_df,
+                            right_df=right_df,
+                            left_columns=left_columns,
+                            right_columns=right_columns,
+                            left_positions=left_positions,
+                            right_positions=right_positions)
+
+    @staticmethod
+    def assemble(left_df: pd.DataFrame,
+                 right_df: pd.DataFrame,
+                 left_columns: typing.List[typing.List[int]],
+                 right_columns: typing.List[typing.List[int]],
+                 left_positions: np.ndarray,
+                 right_positions: np.ndarray
+                 ) -> pd.DataFrame:
+        """Build the joined dataframe from matched row positions, right key columns are dropped.
+
+        Args:
+            left_df: pandas Dataframe
+            right_df: pandas Dataframe
+            left_columns: list of list of integers from left df for join
+            right_columns: list of list of integers from right df for join
+            left_positions: row positions in left_df
+            right_positions: row positions in right_df, -1 for no match
+
+        Returns:
+             Dataframe
+        """
+
+        right_key_offsets = set(offset for column in right_columns for offset in column)
+        right_values = right_df.iloc[:, [idx for idx in range(right_df.shape[1]) if idx not in right_key_offsets]]
+
+        left_part = left_df.iloc[left_positions].reset_index(drop=True)
+        right_part = right_values.reset_index(drop=True).reindex(right_positions).reset_index(drop=True)
+
+        left_key_names = set(left_df.columns[offset] for column in left_columns for offset in column)
+        overlap = set(left_part.columns).intersection(right_part.columns) - left_key_names
+        left_part.columns = [name + "_x" if name in overlap else name for name in left_part.columns]
+        right_part.columns = [name + "_y" if name in overlap else name for name in right_part.columns]
+
+        return pd.concat([left_part, right_part], axis=1)
+
+    @classmethod
+    def join_many(cls,
+                  left_df: pd.DataFrame,
+                  rights: typing.List[dict],
+                  left_metadata: dict = None
+                  ) -> pd.DataFrame:
+        """Join several right dataframes to the same left dataframe, with one column concatenation.
+
+        The left keys are normalized and factorized once per distinct key definition and reused by every right
+        dataframe joined on it. Each right dataframe contributes the first matching row for every left row, so the
+        result keeps the rows of left_df. Right column names already taken are suffixed with "_<position in rights>".
+
+        Args:
+            left_df: pandas Dataframe
+            rights: list of dict with right_df, left_columns, right_columns and optional right_metadata
+            left_metadata: metadata of left dataframe
+
+        Returns:
+             Dataframe
+        """
+
+        left_index = dict()
+        parts = [left_df.reset_index(drop=True)]
+        names = set(left_df.columns)
+
+        for idx, right in enumerate(rights):
+            right_df = right["right_df"]
+            left_columns, right_columns = right["left_columns"], right["right_columns"]
+            if len(left_columns) != len(right_columns):
+                raise ValueError("Default join needs the same number of key parts on both side")
+
+            temporal = tuple(cls.is_temporal_column(left_df, left_columns[part][0], left_metadata) or
+                             cls.is_temporal_column(right_df, right_columns[part][0], right.get("right_metadata"))
+                             for part in range(len(left_columns)))
+            index_key = (repr(left_columns), temporal)
+            if index_key not in left_index:
+                left_index[index_key] = pd.factorize(cls.join_keys(left_df, left_columns, list(temporal)).values)
+            left_codes, left_uniques = left_index[index_key]
+
+            right_keys = cls.join_keys(right_df, right_columns, list(temporal))
+            first = ~right_keys.duplicated() & right_keys.notnull()
+            first_positions = np.flatnonzero(first.values)
+            if len(first_positions):
+                unique_positions = pd.Index(right_keys[first].values).get_indexer(left_uniques)
+                unique_positions = np.where(unique_positions >= 0, first_positions[unique_positions], -1)
+            else:
+                # empty right dataframe or only null keys, every left row is unmatched
+                unique_positions = np.full(len(left_uniques), -1, dtype=np.int64)
+            # null left keys have code -1, which picks the appended -1
+            right_positions = np.append(unique_positions, -1)[left_codes]
+
+            right_key_offsets = set(offset for column in right_columns for offset in column)
+            right_values = right_df.iloc[:, [offset for offset in range(right_df.shape[1])
+                                             if offset not in right_key_offsets]]
+            right_part = right_values.reset_index(drop=True).reindex(right_positions).reset_index(drop=True)
+            right_part.columns = ["{}_{}".format(name, idx) if name in names else name for name in right_part.columns]
+            names.update(right_part.columns)
+            parts.append(right_part)
+
+        return pd.concat(parts, axis=1)
+
+    @staticmethod
+    def hash_join_indexer(left_keys: pd.Series, right_keys: pd.Series) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """Row positions of a left join, many to many, null keys never match.
+
+        A hash index is built on the distinct keys of the smaller side and probed with the keys of the larger side.
+
+        Args:
+            left_keys: keys of left rows
+            right_keys: keys of right rows
+
+        Returns:
+            Tuple of (left row positions, right row positions), -1 for left rows without match
+        """
+
+        left_is_small = len(left_keys) <= len(right_keys)
+        small, big = (left_keys, right_keys) if left_is_small else (right_keys, left_keys)
+
+        small_codes, uniques = pd.factorize(small.values)
+        if len(uniques) == 0:
+            # one side is empty or has only null keys, nothing matches
+            return np.arange(len(left_keys), dtype=np.int64), np.full(len(left_keys), -1, dtype=np.int64)
+        big_codes = pd.Index(uniques).get_indexer(big.values)
+        big_codes[pd.isnull(big.values)] = -1
+
+        counts = np.bincount(small_codes[small_codes >= 0], minlength=len(uniques))
+        order = np.argsort(small_codes, kind="mergesort")[np.sum(small_codes < 0):]
+        starts = np.cumsum(counts) - counts
+
+        matched = big_codes >= 0
+        big_counts = np.where(matched, counts[np.maximum(big_codes, 0)], 0)
+        big_positions = np.repeat(np.arange(len(big)), big_counts)
+        offsets = np.arange(big_counts.sum()) - np.repeat(np.cumsum(big_counts) - big_counts, big_counts)
+        small_positions = order[np.repeat(starts[np.maximum(big_codes, 0)], big_counts) + offsets]
+
+        if left_is_small:
+            left_positions, right_positions = small_positions, big_positions
+        else:
+            left_positions, right_positions = big_positions, small_positions
+
+        unmatched = np.ones(len(left_keys), dtype=bool)
+        unmatched[left_positions] = False
+        left_positions = np.concatenate([left_positions, np.flatnonzero(unmatched)])
+        right_positions = np.concatenate([right_positions, np.full(unmatched.sum(), -1, dtype=np.int64)])
+
+        sort = np.argsort(left_positions, kind="mergesort")
+        return left_positions[sort], right_positions[sort]
+
+    @classmethod
+    def join_keys(cls, df: pd.DataFrame, columns: typing.List[typing.List[int]], temporal: typing.List[bool]) -> \
+            pd.Series:
+        """Build one normalized key per row from all the key parts.
+
+        Args:
+            df: pandas Dataframe
+            columns: list of key parts, each a list of column offsets
+            temporal: for each key part, if it is compared as dates
+
+        Returns:
+            pandas Series of str, null where any key column is null
+        """
+
+        keys = None
+        for idx, column in enumerate(columns):
+            part = None
+            for offset in column:
+                normalized = cls.normalize_key(df.iloc[:, offset], temporal=temporal[idx] and len(column) == 1)
+                part = normalized if part is None else part + " " + normalized
+            keys = part if keys is None else keys + cls.KEY_PART_SEPARATOR + part
+        return keys.reset_index(drop=True)
+
+    @staticmethod
+    def normalize_key(column: pd.Series, temporal: bool = False) -> pd.Series:
+        """Normalize values of a key column.
+
+        Numbers are canonicalized, so 2018, 2018.0 and "2018" are the same key, but strings with leading zeros like
+        zip codes or padded ids are kept as text, so "00501" never matches 501.
+
+        Args:
+            column: pandas Series
+            temporal: if values should be parsed as dates
+
+        Returns:
+            pandas Series of str, null values stay null
+        """
+
+        null = column.isnull()
+        text = column.astype(str).str.strip().str.lower().str.split().str.join(" ")
 
-        right_df = right_df.rename(columns={
-            right_df.columns[right_columns[idx]]: left_df.columns[left_columns[idx]] for idx in range(len(left_columns))
-        })
+        numeric = pd.to_numeric(column, errors="coerce")
+        zero_padded = column.astype(str).str.strip().str.match(r"[+-]?0\d")
+        is_numeric = numeric.notnull() & ~null & ~zero_padded
+        integral = is_numeric & (numeric % 1 == 0) & (numeric.abs() < 2 ** 63)
+        text[is_numeric] = numeric[is_numeric].astype(str)
+        text[integral] = numeric[integral].astype(np.int64).astype(str)
 
-        return pd.merge(left=left_df,
-                        right=right_df,
-                        left_on=[left_df.columns[idx] for idx in left_columns],
-                        right_on=[right_df.columns[idx] for idx in right_columns],
-                        how='left')
+        if temporal:
+            dates = pd.to_datetime(column.astype(str).where(~null), errors="coerce")
+            is_date = dates.notnull()
+            text[is_date] = dates[is_date].dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+        return text.where(~null)
+
+    @staticmethod
+    def is_temporal_column(df: pd.DataFrame, offset: int, metadata: dict = None) -> bool:
+        """Check if a column should be compared as dates, by dtype or profiled metadata.
+
+        Args:
+            df: pandas Dataframe
+            offset: column offset
+            metadata: metadata dict of the dataframe
+
+        Returns:
+            boolean
+        """
+
+        if is_datetime64_any_dtype(df.iloc[:, offset]):
+            return True
+        variables = (metadata or {}).get("variables") or []
+        if offset >= len(variables):
+            return False
+        variable = variables[offset]
+        if variable.get("temporal_coverage"):
+            return True
+        return any(semantic_type.endswith("/Time") for semantic_type in variable.get("semantic_type") or [])
 
 
 class JoinerPrepare(object):
@@ -77,6 +321,14 @@ class JoinerPrepare(object):
             from datamart.joiners.rltk_joiner import RLTKJoiner
             return RLTKJoiner()
 
+        if JoinerType(joiner) == JoinerType.TEMPORAL:
+            from datamart.joiners.temporal_joiner import TemporalJoiner
+            return TemporalJoiner()
+
+        if JoinerType(joiner) == JoinerType.PARTITIONED:
+            from datamart.joiners.partitioned_joiner import PartitionedJoiner
+            return PartitionedJoiner()
+
         if JoinerType(joiner) == JoinerType.DEFAULT:
             return DefaultJoiner()
 
@@ -0,0 +1,230 @@
+import itertools
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from datamart.joiners.joiner_base import JoinerBase, DefaultJoiner
+import typing
+
+Frames = typing.Union[pd.DataFrame, typing.Iterable[pd.DataFrame]]
+
+
+class PartitionedJoiner(JoinerBase):
+    """Out of core version of DefaultJoiner, for right datasets too large to join in memory.
+
+    Both sides are hash partitioned on the normalized join key and spilled to disk, then joined one partition at a
+    time, so memory is bounded by the largest partition. Each side can be a Dataframe or an iterable of Dataframe
+    chunks, eg. pd.read_csv(..., chunksize=...). Use join_partitions to stream the result partition by partition.
+
+    """
+
+    METADATA_FEATURES = ["basic"]
+
+    DEFAULT_PARTITIONS = 16
+    DEFAULT_CHUNK_SIZE = 100000
+
+    POSITION_COLUMN = "__position"
+
+    def __init__(self,
+                 n_partitions: int = DEFAULT_PARTITIONS,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 tmp_dir: str = None
+                 ) -> None:
+        """Init method of PartitionedJoiner.
+
+        Args:
+            n_partitions: number of hash partitions.
+            chunk_size: rows per chunk when a side is given as one Dataframe.
+            tmp_dir: directory for spilled partitions, default to system temp dir.
+
+        Returns:
+
+        """
+
+        self.n_partitions = n_partitions
+        self.chunk_size = chunk_size
+        self.tmp_dir = tmp_dir
+
+    def join(self,
+             left_df: Frames,
+             right_df: Frames,
+             left_columns: typing.List[typing.List[int]],
+             right_columns: typing.List[typing.List[int]],
+             left_metadata: dict = None,
+             right_metadata: dict = None,
+             **kwargs
+             ) -> pd.DataFrame:
+        """Join and collect all partitions in left order, same result as DefaultJoiner.
+
+        Only the partitioned join itself is out of core, the collected result is held in memory. Iterate
+        join_partitions (or Augment.join_partitions) and write out every partition to keep memory bounded.
+
+        Args:
+            left_df: pandas Dataframe or iterable of Dataframe chunks
+            right_df: pandas Dataframe or iterable of Dataframe chunks
+            left_columns: list of list of integers from left df for join
+            right_columns: list of list of integers from right df for join
+            left_metadata: metadata of left dataframe
+            right_metadata: metadata of right dataframe
+
+        Returns:
+             Dataframe
+        """
+
+        parts = list(self.join_partitions(left_df=left_df,
+                                          right_df=right_df,
+                                          left_columns=left_columns,
+                                          right_columns=right_columns,
+                                          left_metadata=left_metadata,
+                                          right_metadata=right_metadata,
+                                          keep_position=True))
+        joined = pd.concat(parts, axis=0)
+        joined = joined.sort_values(by=self.POSITION_COLUMN, kind="mergesort")
+        return joined.drop(self.POSITION_COLUMN, axis=1).reset_index(drop=True)
+
+    def join_partitions(self,
+                        left_df: Frames,
+                        right_df: Frames,
+                        left_columns: typing.List[typing.List[int]],
+                        right_columns: typing.List[typing.List[int]],
+                        left_metadata: dict = None,
+                        right_metadata: dict = None,
+                        keep_position: bool = False
+                        ) -> typing.Iterator[pd.DataFrame]:
+        """Join partition by partition, yields the joined Dataframe of every partition.
+
+        Args:
+            left_df: pandas Dataframe or iterable of Dataframe chunks
+            right_df: pandas Dataframe or iterable of Dataframe chunks
+            left_columns: list of list of integers from left df for join
+            right_columns: list of list of integers from right df for join
+            left_metadata: metadata of left dataframe
+            right_metadata: metadata of right dataframe
+            keep_position: keep a POSITION_COLUMN with the position of the row in the left side
+
+        Returns:
+            iterator of Dataframe
+        """
+
+        left_chunks = self._chunks(left_df)
+        right_chunks = self._chunks(right_df)
+        first_left = next(left_chunks, None)
+        first_right = next(right_chunks, None)
+        if first_left is None or first_right is None:
+            raise ValueError("No data to join")
+        temporal = [DefaultJoiner.is_temporal_column(first_left, left_columns[idx][0], left_metadata) or
+                    DefaultJoiner.is_temporal_column(first_right, right_columns[idx][0], right_metadata)
+                    for idx in range(len(left_columns))]
+
+        work_dir = tempfile.mkdtemp(prefix="datamart_join_", dir=self.tmp_dir)
+        try:
+            left_template = self._spill(chunks=itertools.chain([first_left], left_chunks),
+                                        columns=left_columns,
+                                        temporal=temporal,
+                                        path=os.path.join(work_dir, "left"),
+                                        with_position=True)
+            right_template = self._spill(chunks=itertools.chain([first_right], right_chunks),
+                                         columns=right_columns,
+                                         temporal=temporal,
+                                         path=os.path.join(work_dir, "right"))
+
+            position_offset = left_template.shape[1] - 1
+            yielded = False
+            for partition in range(self.n_partitions):
+                left = self._load(os.path.join(work_dir, "left"), partition, left_template)
+                if left.empty:
+                    continue
+                right = self._load(os.path.join(work_dir, "right"), partition, right_template)
+                if right.empty:
+                    # no right row hashed to this partition, every left row is unmatched
+                    joined = DefaultJoiner.assemble(left_df=left,
+                                                    right_df=right,
+                                                    left_columns=left_columns,
+                                                    right_columns=right_columns,
+                                                    left_positions=np.arange(left.shape[0]),
+                                                    right_positions=np.full(left.shape[0], -1, dtype=np.int64))
+                else:
+                    joined = DefaultJoiner.join(left_df=left,
+                                                right_df=right,
+                                                left_columns=left_columns,
+                                                right_columns=right_columns,
+                                                left_metadata=left_metadata,
+                                                right_metadata=right_metadata)
+                yielded = True
+                yield self._position(joined, position_offset, keep_position)
+
+            if not yielded:
+                # no left row at all, yield an empty frame with the columns of the join
+                empty = np.array([], dtype=np.int64)
+                yield self._position(DefaultJoiner.assemble(left_df=left_template,
+                                                            right_df=right_template,
+                                                            left_columns=left_columns,
+                                                            right_columns=right_columns,
+                                                            left_positions=empty,
+                                                            right_positions=empty),
+                                     position_offset, keep_position)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def partition_of(self, keys: pd.Series) -> np.ndarray:
+        """Hash partition of every key.
+
+        Args:
+            keys: normalized join keys
+
+        Returns:
+            array of partition numbers
+        """
+
+        hashes = pd.util.hash_pandas_object(keys.fillna(""), index=False).values
+        return (hashes % np.uint64(self.n_partitions)).astype(np.int64)
+
+    def _position(self, joined: pd.DataFrame, position_offset: int, keep_position: bool) -> pd.DataFrame:
+        position = joined.columns[position_offset]
+        if keep_position:
+            return joined.rename(columns={position: self.POSITION_COLUMN})
+        return joined.drop(position, axis=1)
+
+    def _chunks(self, frames: Frames) -> typing.Iterator[pd.DataFrame]:
+        if isinstance(frames, pd.DataFrame):
+            return (frames.iloc[start:start + self.chunk_size]
+                    for start in range(0, max(frames.shape[0], 1), self.chunk_size))
+        return iter(frames)
+
+    def _spill(self,
+               chunks: typing.Iterable[pd.DataFrame],
+               columns: typing.List[typing.List[int]],
+               temporal: typing.List[bool],
+               path: str,
+               with_position: bool = False
+               ) -> pd.DataFrame:
+        """Hash partition chunks to pickle files under path, return an empty template of the frame.
+
+        """
+
+        os.makedirs(path)
+        template = None
+        position = 0
+        for chunk_idx, chunk in enumerate(chunks):
+            if with_position:
+                chunk = chunk.assign(**{self.POSITION_COLUMN: np.arange(position, position + chunk.shape[0])})
+                position += chunk.shape[0]
+            if template is None:
+                template = chunk.iloc[:0]
+            if chunk.empty:
+                continue
+            partitions = self.partition_of(DefaultJoiner.join_keys(chunk, columns, temporal))
+            for partition in np.unique(partitions):
+                chunk.iloc[partitions == partition].to_pickle(
+                    os.path.join(path, "{}_{}.pkl".format(partition, chunk_idx)))
+        return template
+
+    @staticmethod
+    def _load(path: str, partition: int, template: pd.DataFrame) -> pd.DataFrame:
+        prefix = "{}_".format(partition)
+        pieces = [pd.read_pickle(os.path.join(path, file_name)) for file_name in sorted(os.listdir(path))
+                  if file_name.startswith(prefix)]
+        if not pieces:
+            return template
+        return pd.concat(pieces, axis=0)
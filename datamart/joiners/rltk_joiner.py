@@ -1,24 +1,263 @@
+import numpy as np
 import pandas as pd
+import unicodedata
 from datamart.joiners.joiner_base import JoinerBase
 import typing
 
-"""
-TODO
-Implement RLTK joiner
-"""
-
 
 class RLTKJoiner(JoinerBase):
+    """Fuzzy join, eg. "Los Angeles" in the left dataframe matches "los angeles, CA" in the right one.
+
+    Works on the distinct values of the join columns:
+        1. normalize values, accents stripped, lower case and only alphanumeric tokens, null keys never match
+        2. blocking, only values sharing a token (or a character n-gram of a token) are compared, blocks larger than
+           max_block_size are dropped, so the number of compared pairs does not grow quadratically
+        3. similarity of candidate pairs, jaccard of character q-grams, computed in vectorized batches
+        4. every left value is matched to its most similar right value above threshold
+
+    The joined dataframe is a left join with a SCORE_COLUMN column holding the similarity of each match.
+
+    """
+
+    SCORE_COLUMN = "join_score"
+
+    def __init__(self,
+                 threshold: float = 0.5,
+                 q: int = 3,
+                 blocking: str = "token",
+                 max_block_size: int = 1000,
+                 batch_size: int = 100000
+                 ) -> None:
+        """Init method of RLTKJoiner.
 
-    def __init__(self):
-        pass
+        Args:
+            threshold: minimum similarity for two values to match.
+            q: size of the character q-grams used for similarity.
+            blocking: "token" to block on tokens, "ngram" to block on character q-grams of tokens, which also
+                catches typos but creates more candidate pairs.
+            max_block_size: blocks with more right values are not used for blocking.
+            batch_size: number of candidate pairs to compute similarity for at once.
+
+        Returns:
+
+        """
+
+        if blocking not in ("token", "ngram"):
+            raise ValueError("Blocking should be token or ngram")
+        self.threshold = threshold
+        self.q = q
+        self.blocking = blocking
+        self.max_block_size = max_block_size
+        self.batch_size = batch_size
 
     def join(self,
              left_df: pd.DataFrame,
              right_df: pd.DataFrame,
              left_columns: typing.List[typing.List[int]],
              right_columns: typing.List[typing.List[int]],
-             left_metadata: dict,
-             right_metadata: dict,
+             left_metadata: dict = None,
+             right_metadata: dict = None,
+             **kwargs
              ) -> pd.DataFrame:
-        pass
+        """Fuzzy join two dataframes, all mapped columns on one side are concatenated to a single join key.
+
+        Args:
+            left_df: pandas Dataframe
+            right_df: pandas Dataframe
+            left_columns: list of list of integers from left df for join
+            right_columns: list of list of integers from right df for join
+            left_metadata: metadata of left dataframe, not used
+            right_metadata: metadata of right dataframe, not used
+
+        Returns:
+             Dataframe
+        """
+
+        if len(left_columns) != len(right_columns):
+            raise ValueError("Left and right columns should have the same length")
+
+        left_keys = self.normalize(self._join_key(left_df, left_columns))
+        right_keys = self.normalize(self._join_key(right_df, right_columns))
+
+        left_values, left_codes = self._factorize(left_keys)
+        right_values, right_codes = self._factorize(right_keys)
+
+        matches = self.match(left_values=left_values, right_values=right_values)
+
+        # one more slot for null keys, which have code -1
+        left_match = np.full(len(left_values) + 1, -1, dtype=np.int64)
+        left_score = np.full(len(left_values) + 1, np.nan)
+        left_match[matches["left"].values] = matches["right"].values
+        left_score[matches["left"].values] = matches["score"].values
+
+        left = left_df.reset_index(drop=True)
+        left_key_column = "__rltk_key"
+        left = left.assign(**{left_key_column: left_match[left_codes], self.SCORE_COLUMN: left_score[left_codes]})
+        right = right_df.reset_index(drop=True)
+        # null right keys get -2, so they do not join the unmatched left rows
+        right = right.assign(**{left_key_column: np.where(right_codes >= 0, right_codes, -2)})
+
+        joined = pd.merge(left=left, right=right, on=left_key_column, how="left", suffixes=("_x", "_y"))
+        del joined[left_key_column]
+        return joined
+
+    def match(self, left_values: np.ndarray, right_values: np.ndarray) -> pd.DataFrame:
+        """Match distinct normalized values.
+
+        Args:
+            left_values: array of distinct left values.
+            right_values: array of distinct right values.
+
+        Returns:
+            dataframe with columns left, right (offsets in the value arrays) and score, one row per matched left value
+        """
+
+        candidates = self.candidate_pairs(left_values=left_values, right_values=right_values)
+        if candidates.empty:
+            return pd.DataFrame({"left": [], "right": [], "score": []}).astype({"left": np.int64, "right": np.int64})
+
+        gram_ids = dict()
+        left_grams, left_offsets = self._qgram_sets(left_values, gram_ids)
+        right_grams, right_offsets = self._qgram_sets(right_values, gram_ids)
+
+        left_idx = candidates["left"].values
+        right_idx = candidates["right"].values
+        scores = np.empty(len(candidates))
+        for start in range(0, len(candidates), self.batch_size):
+            end = start + self.batch_size
+            scores[start:end] = self.jaccard(left_grams, left_offsets, left_idx[start:end],
+                                             right_grams, right_offsets, right_idx[start:end])
+        candidates = candidates.assign(score=scores)
+        candidates = candidates[candidates["score"] >= self.threshold]
+        candidates = candidates.sort_values(by=["score", "right"], ascending=[False, True], kind="mergesort")
+        return candidates.drop_duplicates(subset="left").sort_values(by="left").reset_index(drop=True)
+
+    def candidate_pairs(self, left_values: np.ndarray, right_values: np.ndarray) -> pd.DataFrame:
+        """Blocking, pairs of values sharing a blocking key.
+
+        Args:
+            left_values: array of distinct left values.
+            right_values: array of distinct right values.
+
+        Returns:
+            dataframe with columns left and right, offsets in the value arrays
+        """
+
+        left_blocks = self._blocking_keys(left_values)
+        right_blocks = self._blocking_keys(right_values)
+        block_size = right_blocks.groupby("block")["id"].transform("size")
+        right_blocks = right_blocks[block_size <= self.max_block_size]
+        pairs = pd.merge(left_blocks, right_blocks, on="block", suffixes=("_left", "_right"))
+        pairs = pairs[["id_left", "id_right"]].drop_duplicates()
+        pairs.columns = ["left", "right"]
+        return pairs.reset_index(drop=True)
+
+    @staticmethod
+    def jaccard(left_grams: np.ndarray,
+                left_offsets: np.ndarray,
+                left_idx: np.ndarray,
+                right_grams: np.ndarray,
+                right_offsets: np.ndarray,
+                right_idx: np.ndarray
+                ) -> np.ndarray:
+        """Jaccard similarity of q-gram sets for a batch of pairs, vectorized.
+
+        Sets are stored CSR like, grams[offsets[i]:offsets[i + 1]] is the sorted gram id set of value i.
+
+        Args:
+            left_grams: flat array of left gram ids.
+            left_offsets: offsets of left values in left_grams.
+            left_idx: left value of every pair.
+            right_grams: flat array of right gram ids.
+            right_offsets: offsets of right values in right_grams.
+            right_idx: right value of every pair.
+
+        Returns:
+            array of similarities, one for each pair
+        """
+
+        n_pairs = len(left_idx)
+        left_lengths = left_offsets[left_idx + 1] - left_offsets[left_idx]
+        right_lengths = right_offsets[right_idx + 1] - right_offsets[right_idx]
+        n_grams = max(int(left_grams.max()) if len(left_grams) else 0,
+                      int(right_grams.max()) if len(right_grams) else 0) + 1
+
+        def gather(grams, offsets, idx, lengths):
+            pair_ids = np.repeat(np.arange(n_pairs, dtype=np.int64), lengths)
+            starts = np.repeat(offsets[idx] - np.cumsum(lengths) + lengths, lengths)
+            return pair_ids * n_grams + grams[starts + np.arange(lengths.sum())]
+
+        keys = np.concatenate([gather(left_grams, left_offsets, left_idx, left_lengths),
+                               gather(right_grams, right_offsets, right_idx, right_lengths)])
+        keys.sort()
+        duplicated = keys[1:][keys[1:] == keys[:-1]]
+        intersection = np.bincount(duplicated // n_grams, minlength=n_pairs)
+        union = left_lengths + right_lengths - intersection
+        return np.where(union > 0, intersection / np.maximum(union, 1), 0.0)
+
+    @classmethod
+    def normalize(cls, keys: pd.Series) -> pd.Series:
+        """Normalize join keys, accents stripped, lower case, alphanumeric tokens separated by a single space.
+
+        Tokens are unicode aware, "São Paulo" and "Sao Paulo" are the same key and non latin keys are kept.
+
+        Args:
+            keys: pandas Series
+
+        Returns:
+            pandas Series of str, null values stay null
+        """
+
+        null = keys.isnull()
+        if null.all():
+            # empty or all null keys, .str needs string values
+            return pd.Series([np.nan] * len(keys), index=keys.index, dtype=object)
+        text = keys[~null].astype(str)
+        stripped = {value: cls._strip_accents(value) for value in text.unique()}
+        text = text.map(stripped).str.lower().str.findall(r"[^\W_]+").str.join(" ")
+        return text.reindex(keys.index)
+
+    @staticmethod
+    def _strip_accents(value: str) -> str:
+        return "".join(char for char in unicodedata.normalize("NFKD", value) if not unicodedata.combining(char))
+
+    @staticmethod
+    def _factorize(keys: pd.Series) -> typing.Tuple[np.ndarray, np.ndarray]:
+        null = keys.isnull().values
+        values, codes = np.unique(keys.values[~null].astype(str), return_inverse=True)
+        all_codes = np.full(len(keys), -1, dtype=np.int64)
+        all_codes[~null] = codes
+        return values, all_codes
+
+    @staticmethod
+    def _join_key(df: pd.DataFrame, columns: typing.List[typing.List[int]]) -> pd.Series:
+        offsets = [offset for column in columns for offset in column]
+        null = df.iloc[:, offsets].isnull().any(axis=1)
+        key = df.iloc[:, offsets[0]].astype(str)
+        for offset in offsets[1:]:
+            key = key + " " + df.iloc[:, offset].astype(str)
+        return key.where(~null)
+
+    def _blocking_keys(self, values: np.ndarray) -> pd.DataFrame:
+        ids = list()
+        blocks = list()
+        for idx, value in enumerate(values):
+            tokens = set(value.split())
+            if self.blocking == "ngram":
+                tokens = set(gram for token in tokens for gram in self._qgrams(token))
+            ids.extend([idx] * len(tokens))
+            blocks.extend(tokens)
+        return pd.DataFrame({"id": np.array(ids, dtype=np.int64), "block": blocks})
+
+    def _qgrams(self, value: str) -> typing.List[str]:
+        value = " {} ".format(value)
+        return [value[i:i + self.q] for i in range(max(len(value) - self.q + 1, 1))]
+
+    def _qgram_sets(self, values: np.ndarray, gram_ids: dict) -> typing.Tuple[np.ndarray, np.ndarray]:
+        grams = list()
+        offsets = [0]
+        for value in values:
+            this_grams = sorted(set(gram_ids.setdefault(gram, len(gram_ids)) for gram in self._qgrams(value)))
+            grams.extend(this_grams)
+            offsets.append(len(grams))
+        return np.array(grams, dtype=np.int64), np.array(offsets, dtype=np.int64)
@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from datamart.joiners.joiner_base import JoinerBase, DefaultJoiner
+import typing
+
+
+class TemporalJoiner(JoinerBase):
+    """Join on a date column when the two sides have different temporal granularity.
+
+    Eg. daily NOAA data joined to yearly user data. The granularity of each side is the one its metadata declares by
+    semantic type (see SEMANTIC_TYPE_GRANULARITIES), otherwise it is detected from its dates, both sides are floored to the coarser one, the right side is aggregated per (other keys, period) and then an as-of merge
+    (sorted, O(n log n)) matches every left row with the right period at or before it, within tolerance periods.
+
+    The temporal key part is the first one whose column is temporal by dtype or metadata (temporal_coverage or a Time
+    semantic type), other key parts are exact keys normalized like DefaultJoiner.
+
+    """
+
+    METADATA_FEATURES = ["basic"]
+
+    GRANULARITIES = ["second", "day", "month", "year"]
+
+    SEMANTIC_TYPE_GRANULARITIES = {
+        "http://schema.org/DateTime": "second",
+        "http://schema.org/Date": "day"
+    }
+
+    PERIOD_DAYS = {
+        "second": 1 / 86400,
+        "day": 1,
+        "month": 31,
+        "year": 366
+    }
+
+    def __init__(self, tolerance: int = 0, aggregation: str = "mean") -> None:
+        """Init method of TemporalJoiner.
+
+        Args:
+            tolerance: number of periods a left date may be after the matched right period, 0 for the same period.
+            aggregation: pandas aggregation for numeric right columns, eg. mean, sum, max. Other columns take the
+                first value of the period.
+
+        Returns:
+
+        """
+
+        self.tolerance = tolerance
+        self.aggregation = aggregation
+
+    def join(self,
+             left_df: pd.DataFrame,
+             right_df: pd.DataFrame,
+             left_columns: typing.List[typing.List[int]],
+             right_columns: typing.List[typing.List[int]],
+             left_metadata: dict = None,
+             right_metadata: dict = None,
+             **kwargs
+             ) -> pd.DataFrame:
+        """Join two dataframes on a temporal column and optional exact key columns.
+
+        Args:
+            left_df: pandas Dataframe
+            right_df: pandas Dataframe
+            left_columns: list of list of integers from left df for join
+            right_columns: list of list of integers from right df for join
+            left_metadata: metadata of left dataframe
+            right_metadata: metadata of right dataframe
+
+        Returns:
+             Dataframe, left join
+        """
+
+        if len(left_columns) != len(right_columns):
+            raise ValueError("Temporal join needs the same number of key parts on both side")
+
+        temporal_parts = [idx for idx in range(len(left_columns)) if
+                          DefaultJoiner.is_temporal_column(left_df, left_columns[idx][0], left_metadata) or
+                          DefaultJoiner.is_temporal_column(right_df, right_columns[idx][0], right_metadata)]
+        if not temporal_parts:
+            raise ValueError("Temporal join needs a temporal column")
+        time_part = temporal_parts[0]
+
+        left_dates = self.parse_dates(left_df.iloc[:, left_columns[time_part][0]])
+        right_dates = self.parse_dates(right_df.iloc[:, right_columns[time_part][0]])
+        granularity = max(self.metadata_granularity(left_metadata, left_columns[time_part][0]) or
+                          self.detect_granularity(left_dates),
+                          self.metadata_granularity(right_metadata, right_columns[time_part][0]) or
+                          self.detect_granularity(right_dates),
+                          key=self.GRANULARITIES.index)
+
+        other_left = [column for idx, column in enumerate(left_columns) if idx != time_part]
+        other_right = [column for idx, column in enumerate(right_columns) if idx != time_part]
+
+        left = pd.DataFrame({
+            "__key": self._keys(left_df, other_left),
+            "__period": self.floor_dates(left_dates, granularity).values,
+            "__position": np.arange(left_df.shape[0])
+        })
+        right = self.aggregate(right_df=right_df,
+                               keys=self._keys(right_df, other_right),
+                               periods=self.floor_dates(right_dates, granularity),
+                               key_offsets=set(offset for column in right_columns for offset in column))
+
+        left = left[left["__key"].notnull() & left["__period"].notnull()].sort_values(by="__period", kind="mergesort")
+        if left.empty or right.empty:
+            # no right row or no parsable date on one side, every left row is unmatched
+            right_part = right.drop(["__key", "__period"], axis=1).iloc[:0]
+        else:
+            merged = pd.merge_asof(left, right,
+                                   on="__period",
+                                   by="__key",
+                                   direction="backward",
+                                   tolerance=pd.Timedelta(days=self.PERIOD_DAYS[granularity] * self.tolerance))
+            right_part = merged.set_index("__position").drop(["__key", "__period"], axis=1)
+        right_part = right_part.reindex(np.arange(left_df.shape[0])).reset_index(drop=True)
+        left_part = left_df.reset_index(drop=True)
+
+        left_key_names = set(left_df.columns[offset] for column in left_columns for offset in column)
+        overlap = set(left_part.columns).intersection(right_part.columns) - left_key_names
+        left_part.columns = [name + "_x" if name in overlap else name for name in left_part.columns]
+        right_part.columns = [name + "_y" if name in overlap else name for name in right_part.columns]
+
+        return pd.concat([left_part, right_part], axis=1)
+
+    def aggregate(self,
+                  right_df: pd.DataFrame,
+                  keys: pd.Series,
+                  periods: pd.Series,
+                  key_offsets: typing.Set[int]
+                  ) -> pd.DataFrame:
+        """Aggregate non key columns of the right side per (key, period), sorted by period.
+
+        Args:
+            right_df: pandas Dataframe
+            keys: normalized exact keys of right rows
+            periods: floored dates of right rows
+            key_offsets: offsets of key columns, not aggregated
+
+        Returns:
+            Dataframe with __key, __period and the aggregated columns
+        """
+
+        values = right_df.iloc[:, [idx for idx in range(right_df.shape[1]) if idx not in key_offsets]]
+        values = values.reset_index(drop=True)
+        aggregations = {name: self.aggregation if is_numeric_dtype(values[name]) else "first"
+                        for name in values.columns}
+        grouped = values.assign(__key=keys.values, __period=periods.values)
+        grouped = grouped[grouped["__key"].notnull() & grouped["__period"].notnull()]
+        if aggregations:
+            grouped = grouped.groupby(["__key", "__period"], sort=False).agg(aggregations).reset_index()
+        else:
+            grouped = grouped.drop_duplicates()
+        return grouped[["__key", "__period"] + list(values.columns)].sort_values(by="__period", kind="mergesort")
+
+    @classmethod
+    def detect_granularity(cls, dates: pd.Series) -> str:
+        """Detect granularity of dates, the coarsest period all dates start.
+
+        Args:
+            dates: pandas Series of datetime64
+
+        Returns:
+            one of GRANULARITIES
+        """
+
+        dates = dates.dropna()
+        if dates.empty:
+            return "day"
+        if ((dates.dt.hour != 0) | (dates.dt.minute != 0) | (dates.dt.second != 0)).any():
+            return "second"
+        if (dates.dt.day != 1).any():
+            return "day"
+        if (dates.dt.month != 1).any():
+            return "month"
+        return "year"
+
+    @classmethod
+    def metadata_granularity(cls, metadata: dict, offset: int) -> typing.Optional[str]:
+        """Granularity a column declares by semantic type in metadata.
+
+        temporal_coverage only bounds the dates, it does not tell their granularity.
+
+        Args:
+            metadata: metadata dict of the dataframe
+            offset: column offset
+
+        Returns:
+            one of GRANULARITIES, None if not declared
+        """
+
+        variables = (metadata or {}).get("variables") or []
+        if offset >= len(variables):
+            return None
+        for semantic_type in variables[offset].get("semantic_type") or []:
+            if semantic_type in cls.SEMANTIC_TYPE_GRANULARITIES:
+                return cls.SEMANTIC_TYPE_GRANULARITIES[semantic_type]
+        return None
+
+    @staticmethod
+    def floor_dates(dates: pd.Series, granularity: str) -> pd.Series:
+        """Floor dates to the start of their period.
+
+        Args:
+            dates: pandas Series of datetime64
+            granularity: one of GRANULARITIES
+
+        Returns:
+            pandas Series of datetime64
+        """
+
+        if granularity == "year":
+            return dates - pd.to_timedelta(dates.dt.dayofyear - 1, unit="D") - (dates - dates.dt.normalize())
+        if granularity == "month":
+            return dates - pd.to_timedelta(dates.dt.day - 1, unit="D") - (dates - dates.dt.normalize())
+        if granularity == "day":
+            return dates.dt.normalize()
+        return dates
+
+    @staticmethod
+    def parse_dates(column: pd.Series) -> pd.Series:
+        """Parse a column to dates, year numbers like 2018 are the start of the year.
+
+        Args:
+            column: pandas Series
+
+        Returns:
+            pandas Series of datetime64, NaT where not parsable
+        """
+
+        if is_numeric_dtype(column):
+            integral = column.notnull() & (column % 1 == 0)
+            column = column[integral].astype(np.int64).astype(str).reindex(column.index)
+        else:
+            column = column.where(column.isnull(), column.astype(str))
+        return pd.to_datetime(column, errors="coerce")
+
+    @staticmethod
+    def _keys(df: pd.DataFrame, columns: typing.List[typing.List[int]]) -> pd.Series:
+        if not columns:
+            return pd.Series([""] * df.shape[0], dtype=object)
+        return DefaultJoiner.join_keys(df, columns, temporal=[False] * len(columns))
@@ -16,6 +16,11 @@ LOCATION_COLUMN_INDEX = 0
 
 
 class FaoMaterializer(MaterializerBase):
+    PUSHDOWN_CONSTRAINS = {
+        "named_entity": [LOCATION_COLUMN_INDEX],
+        "date_range": True
+    }
+
     def __init__(self, **kwargs):
         """ initialization and loading the city name to city id map
 
@@ -62,7 +67,7 @@ class FaoMaterializer(MaterializerBase):
             if "end" in date_range:
                 date_range_end = parse(date_range["end"]).year
         named_entity = constrains.get("named_entity", {})
-        locations = named_entity.get(LOCATION_COLUMN_INDEX, DEFAULT_LOCATIONS)
+        locations = named_entity.get(LOCATION_COLUMN_INDEX) or DEFAULT_LOCATIONS
         data_type = materialization_arguments.get("type", DEFAULT_DATA_TYPE)
 
         try:
@@ -72,16 +77,11 @@ class FaoMaterializer(MaterializerBase):
             cur.execute("Select * FROM {0} limit 1".format(table))
             colnames = [desc[0] for desc in cur.description]
 
-            constrains_for_query = "({0} >= {1} AND {2} <= {3}) AND (".format(colnames[3],
-                                                                              date_range_start,
-                                                                              colnames[3],
-                                                                              date_range_end)
-
-            for lo in locations:
-                constrains_for_query += "{0} = '{1}' OR ".format(colnames[0], lo)
-            constrains_for_query = constrains_for_query[:-4] + ")"
-            query_builder = "SELECT * From {0} Where {1};".format(table, constrains_for_query)
-            cur.execute(query_builder)
+            # locations may come from user data, they are passed as query parameters and compared case insensitively
+            query_builder = "SELECT * From {0} Where ({1} >= %s AND {1} <= %s) AND lower({2}) IN %s;".format(
+                table, colnames[3], colnames[0])
+            cur.execute(query_builder, (int(date_range_start), int(date_range_end),
+                                        tuple(str(lo).lower() for lo in locations)))
             query_res = cur.fetchall()
             result = pd.DataFrame(columns=[colnames[0], colnames[1], colnames[2], colnames[3], colnames[4]])
             for row in query_res:
@@ -6,8 +6,15 @@ import typing
 class MaterializerBase(ABC):
     """Abstract class of Materializer, should be extended for every Materializer dealing with different data source.
 
+    PUSHDOWN_CONSTRAINS declares the constrains the materializer can apply at its data source, the join planner only
+    derives these from the data being augmented:
+        "named_entity": list of column indexes the materializer can filter by named entities
+        "date_range": True if the materializer can filter by date range
+
     """
 
+    PUSHDOWN_CONSTRAINS = {}
+
     @abstractmethod
     def __init__(self, **kwargs):
         pass
@@ -22,6 +22,11 @@ class NoaaMaterializer(MaterializerBase):
 
     """
 
+    PUSHDOWN_CONSTRAINS = {
+        "named_entity": [CITY_COLUMN_INDEX],
+        "date_range": True
+    }
+
     def __init__(self, **kwargs):
         """ initialization and loading the city name to city id map
 
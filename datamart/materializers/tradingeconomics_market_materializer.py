@@ -12,6 +12,10 @@ class TradingEconomicsMarketMaterializer(MaterializerBase):
 
     """
 
+    PUSHDOWN_CONSTRAINS = {
+        "date_range": True
+    }
+
     def __init__(self, **kwargs):
         """ initialization and loading the city name to city id map
 
@@ -16,6 +16,11 @@ class TradingEconomicsMaterializer(MaterializerBase):
 
     """
 
+    PUSHDOWN_CONSTRAINS = {
+        "named_entity": [LOCATION_COLUMN_INDEX],
+        "date_range": True
+    }
+
     def __init__(self, **kwargs):
         """ initialization and loading the city name to city id map
 
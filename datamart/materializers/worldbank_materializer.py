@@ -10,6 +10,10 @@ LOCATION_COLUMN_INDEX = 5
 
 
 class WorldBankMaterializer(MaterializerBase):
+    PUSHDOWN_CONSTRAINS = {
+        "named_entity": [LOCATION_COLUMN_INDEX],
+        "date_range": True
+    }
 
     def __init__(self, **kwargs):
         MaterializerBase.__init__(self, **kwargs)
@@ -18,6 +22,8 @@ class WorldBankMaterializer(MaterializerBase):
         with open(os.path.join(resources_path, 'country_to_id.json'), 'r') as json_file:
             reader = json.load(json_file)
             self.country_to_id_map = reader
+        # constrains may come in any case, eg. pushed down from a user dataframe
+        self.lower_country_to_id_map = {country.lower(): country_id for country, country_id in reader.items()}
 
     def get(self, metadata: dict = None, constrains: dict = None) -> pd.DataFrame:
         if not constrains:
@@ -69,7 +75,7 @@ class WorldBankMaterializer(MaterializerBase):
 
         appended_data = None
         for location in locations:
-            location_id = self.country_to_id_map.get(location, None)
+            location_id = self.country_to_id_map.get(location, self.lower_country_to_id_map.get(location.lower()))
             if location_id is None:
                 continue
             if not date_range:
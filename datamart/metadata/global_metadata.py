@@ -1,10 +1,21 @@
-from datamart.metadata.metadata_base import MetadataBase
+from datamart.metadata.metadata_base import MetadataBase, metadata_field
 from datamart.metadata.variable_metadata import VariableMetadata
 from datamart.utilities.utils import Utils
 import typing
 
 
 class GlobalMetadata(MetadataBase):
+
+    FIELDS = ("datamart_id", "title", "description", "url", "keywords", "date_published", "date_updated",
+              "provenance", "original_identifier", "implicit_variables", "additional_info", "materialization",
+              "variables", "license")
+
+    __slots__ = tuple("_" + name for name in FIELDS) + ("_variable_objects",)
+
+    # fields copied as is from the description
+    DESCRIPTION_FIELDS = ("title", "description", "url", "keywords", "date_published", "date_updated", "provenance",
+                          "original_identifier", "implicit_variables", "additional_info", "license")
+
     def __init__(self, description: dict, datamart_id: typing.Union[int, None] = None) -> None:
         """Init method of GlobalMetadata.
 
@@ -21,43 +32,18 @@ class GlobalMetadata(MetadataBase):
         if datamart_id and not isinstance(datamart_id, int):
             raise ValueError("datamart id must be integer")
 
-        self._metadata["datamart_id"] = datamart_id
-        if "title" in description:
-            self._metadata["title"] = description["title"]
-
-        if "description" in description:
-            self._metadata["description"] = description["description"]
-
-        if "url" in description:
-            self._metadata["url"] = description["url"]
-
-        if "keywords" in description:
-            self._metadata["keywords"] = description["keywords"]
+        self._datamart_id = datamart_id
+        for name in self.DESCRIPTION_FIELDS:
+            if name in description:
+                setattr(self, "_" + name, description[name])
 
-        if "date_published" in description:
-            self._metadata["date_published"] = description["date_published"]
         if self.date_published:
             self.date_published = Utils.date_validate(self.date_published)
-
-        if "date_updated" in description:
-            self._metadata["date_updated"] = description["date_updated"]
         if self.date_updated:
             self.date_updated = Utils.date_validate(self.date_updated)
 
-        if "provenance" in description:
-            self._metadata["provenance"] = description["provenance"]
-
-        if "original_identifier" in description:
-            self._metadata["original_identifier"] = description["original_identifier"]
-
-        if "implicit_variables" in description:
-            self._metadata["implicit_variables"] = description["implicit_variables"]
-
-        if "additional_info" in description:
-            self._metadata["additional_info"] = description["additional_info"]
-
         try:
-            self._metadata["materialization"] = description["materialization"]
+            self._materialization = description["materialization"]
         except:
             raise ValueError("No materialization found")
 
@@ -65,13 +51,10 @@ class GlobalMetadata(MetadataBase):
             raise ValueError("No python path found in materialization")
 
         if "arguments" not in self.materialization:
-            self._metadata["materialization"]["arguments"] = None
+            self._materialization["arguments"] = None
 
-        self._metadata["variables"] = list()
         self._variables = list()
-
-        if "license" in description:
-            self._metadata["license"] = description["license"]
+        self._variable_objects = list()
 
     @classmethod
     def construct_global(cls, description, datamart_id=None) -> 'GlobalMetadata':
@@ -87,101 +70,24 @@ class GlobalMetadata(MetadataBase):
 
         """
 
-        self._variables.append(variable_metadata)
-        self._metadata["variables"].append(variable_metadata.value)
-
-    @property
-    def datamart_id(self):
-        return self._metadata["datamart_id"]
-
-    @datamart_id.setter
-    def datamart_id(self, value):
-        self._metadata["datamart_id"] = value
-
-    @property
-    def title(self):
-        return self._metadata.get("title", False)
-
-    @title.setter
-    def title(self, value):
-        self._metadata["title"] = value
-
-    @property
-    def description(self):
-        return self._metadata.get("description", False)
-
-    @description.setter
-    def description(self, value):
-        self._metadata["description"] = value
-
-    @property
-    def url(self):
-        return self._metadata.get("url", False)
-
-    @property
-    def keywords(self):
-        return self._metadata.get("keywords", False)
-
-    @keywords.setter
-    def keywords(self, value):
-        self._metadata["keywords"] = value
-
-    @property
-    def date_published(self):
-        return self._metadata.get("date_published", False)
-
-    @date_published.setter
-    def date_published(self, value):
-        self._metadata["date_published"] = value
-
-    @property
-    def date_updated(self):
-        return self._metadata.get("date_updated", False)
-
-    @date_updated.setter
-    def date_updated(self, value):
-        self._metadata["date_updated"] = value
-
-    @property
-    def provenance(self):
-        return self._metadata.get("provenance", False)
-
-    @property
-    def original_identifier(self):
-        return self._metadata.get("original_identifier", False)
-
-    @property
-    def implicit_variables(self):
-        return self._metadata.get("implicit_variables", False)
-
-    @implicit_variables.setter
-    def implicit_variables(self, value):
-        self._metadata["implicit_variables"] = value
-
-    @property
-    def additional_info(self):
-        return self._metadata.get("additional_info", False)
-
-    @additional_info.setter
-    def additional_info(self, value):
-        self._metadata["additional_info"] = value
-
-    @property
-    def materialization(self):
-        return self._metadata["materialization"]
+        self._variable_objects.append(variable_metadata)
+        self._variables.append(variable_metadata.value)
+
+    datamart_id = metadata_field("datamart_id")
+    title = metadata_field("title")
+    description = metadata_field("description")
+    url = metadata_field("url", settable=False)
+    keywords = metadata_field("keywords")
+    date_published = metadata_field("date_published")
+    date_updated = metadata_field("date_updated")
+    provenance = metadata_field("provenance", settable=False)
+    original_identifier = metadata_field("original_identifier", settable=False)
+    implicit_variables = metadata_field("implicit_variables")
+    additional_info = metadata_field("additional_info")
+    materialization = metadata_field("materialization", settable=False)
+    variable_values = metadata_field("variables", settable=False)
+    license = metadata_field("license")
 
     @property
     def variables(self):
-        return self._variables
-
-    @property
-    def variable_values(self):
-        return self._metadata["variables"]
-
-    @property
-    def license(self):
-        return self._metadata.get("license", False)
-
-    @license.setter
-    def license(self, value):
-        self._metadata["license"] = value
+        return self._variable_objects
@@ -1,19 +1,60 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Any, Dict, Tuple
+
+# value of a field that was never set, left out of the document
+MISSING = object()
+
+
+def metadata_field(name: str, default: Any = False, settable: bool = True) -> property:
+    """Property of a metadata field stored in the slot _<name>, default is returned if the field was never set.
+
+    """
+
+    slot = "_" + name
+
+    def getter(self):
+        value = getattr(self, slot)
+        return default if value is MISSING else value
+
+    def setter(self, value):
+        self._set(name, value)
+
+    return property(getter, setter if settable else None)
 
 
 class MetadataBase(ABC):
     """Abstract class of Metadata, should be extended for global and variable metadata.
 
+    Fields are kept in slots, declared in FIELDS in the order they are serialized. The json representation loaded to
+    ES is only built once, on first access of value, and the setters keep it up to date afterwards.
+
     """
 
+    __slots__ = ("_value",)
+
+    FIELDS = ()  # type: Tuple[str, ...]
+
     @abstractmethod
     def __init__(self) -> None:
-        self._metadata = dict()
+        self._value = None
+        for name in self.FIELDS:
+            setattr(self, "_" + name, MISSING)
 
     @property
     def value(self) -> Dict:
         """Return actual json representation of metadata that will be load to ES
 
         """
-        return self._metadata
+
+        if self._value is None:
+            self._value = dict()
+            for name in self.FIELDS:
+                value = getattr(self, "_" + name)
+                if value is not MISSING:
+                    self._value[name] = value
+        return self._value
+
+    def _set(self, name: str, value: Any) -> None:
+        setattr(self, "_" + name, value)
+        if self._value is not None:
+            self._value[name] = value
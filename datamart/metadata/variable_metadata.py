@@ -1,9 +1,15 @@
-from datamart.metadata.metadata_base import MetadataBase
+from datamart.metadata.metadata_base import MetadataBase, metadata_field
 from datamart.utilities.utils import Utils
 import typing
 
 
 class VariableMetadata(MetadataBase):
+
+    FIELDS = ("datamart_id", "name", "description", "semantic_type", "named_entity", "temporal_coverage",
+              "spatial_coverage")
+
+    __slots__ = tuple("_" + name for name in FIELDS)
+
     def __init__(self, description: dict, datamart_id: typing.Union[int, None] = None) -> None:
         """Init method of VariableMetadata.
 
@@ -17,84 +23,23 @@ class VariableMetadata(MetadataBase):
 
         super().__init__()
 
-        self._metadata["datamart_id"] = datamart_id
-
-        if "name" in description:
-            self._metadata["name"] = description["name"]
-
-        if "description" in description:
-            self._metadata["description"] = description["description"]
-
-        self._metadata["semantic_type"] = description.get("semantic_type", [])
-
-        if "named_entity" in description:
-            self._metadata["named_entity"] = description["named_entity"]
-
-        if "temporal_coverage" in description:
-            self._metadata["temporal_coverage"] = description["temporal_coverage"]
+        self._datamart_id = datamart_id
+        self._semantic_type = description.get("semantic_type", [])
+        for name in ("name", "description", "named_entity", "temporal_coverage", "spatial_coverage"):
+            if name in description:
+                setattr(self, "_" + name, description[name])
 
         if self.temporal_coverage is not False:
             self.temporal_coverage = Utils.temporal_coverage_validate(self.temporal_coverage)
 
-        if "spatial_coverage" in description:
-            self._metadata["spatial_coverage"] = description["spatial_coverage"]
-
     @classmethod
     def construct_variable(cls, description, datamart_id=None) -> 'VariableMetadata':
         return cls(description, datamart_id)
 
-    @property
-    def datamart_id(self):
-        return self._metadata["datamart_id"]
-
-    @datamart_id.setter
-    def datamart_id(self, value):
-        self._metadata["datamart_id"] = value
-
-    @property
-    def name(self):
-        return self._metadata.get("name", False)
-
-    @name.setter
-    def name(self, value):
-        self._metadata["name"] = value
-
-    @property
-    def description(self):
-        return self._metadata.get("description", False)
-
-    @description.setter
-    def description(self, value):
-        self._metadata["description"] = value
-
-    @property
-    def semantic_type(self):
-        return self._metadata["semantic_type"]
-
-    @semantic_type.setter
-    def semantic_type(self, value):
-        self._metadata["semantic_type"] = value
-
-    @property
-    def named_entity(self):
-        return self._metadata.get("named_entity", False)
-
-    @named_entity.setter
-    def named_entity(self, value):
-        self._metadata["named_entity"] = value
-
-    @property
-    def temporal_coverage(self):
-        return self._metadata.get("temporal_coverage", False)
-
-    @temporal_coverage.setter
-    def temporal_coverage(self, value):
-        self._metadata["temporal_coverage"] = value
-
-    @property
-    def spatial_coverage(self):
-        return self._metadata.get("spatial_coverage", False)
-
-    @spatial_coverage.setter
-    def spatial_coverage(self, value):
-        self._metadata["spatial_coverage"] = value
+    datamart_id = metadata_field("datamart_id")
+    name = metadata_field("name")
+    description = metadata_field("description")
+    semantic_type = metadata_field("semantic_type")
+    named_entity = metadata_field("named_entity")
+    temporal_coverage = metadata_field("temporal_coverage")
+    spatial_coverage = metadata_field("spatial_coverage")
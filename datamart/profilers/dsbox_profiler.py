@@ -153,7 +153,7 @@ class DSboxProfiler(object):
                 if "ratio_of_missing_values" in self._specified_features:
                     each_res["ratio_of_missing_values"] = pd.isnull(col).sum() / col.size
 
-                col = col.astype(object).fillna('').astype(str)
+                col = (col if col.dtype == object else col.astype(object)).fillna('').astype(str)
 
                 # compute_missing_space Must be put as the first one because it may change the data content,
                 # see function def for details
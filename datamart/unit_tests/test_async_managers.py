@@ -0,0 +1,51 @@
+from datamart.utilities.utils import Utils
+from datamart.es_managers.query_manager import QueryManager
+from datamart.es_managers.query_cache import QueryCache
+from datamart.es_managers.async_query_manager import AsyncQueryManager
+from datamart.augment import Augment
+import unittest
+import asyncio
+import json
+
+
+class FakeES(object):
+
+    def search(self, body, **kwargs):
+        query = json.loads(body)["query"]
+        return {"hits": {"total": 1, "hits": [{"_source": query}]}}
+
+
+class TestAsyncManagers(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.qm = QueryManager(es_host="localhost", es_port=9200, es_index="fake", query_cache=QueryCache(max_size=0))
+        self.qm.es = FakeES()
+        self.aqm = AsyncQueryManager(query_manager=self.qm)
+
+    def tearDown(self):
+        self.aqm.close()
+        self.loop.close()
+
+    @Utils.test_print
+    def test_search_many(self):
+        bodies = [self.qm.form_conjunction_query([self.qm.match_global_datamart_id(datamart_id=i)]) for i in range(3)]
+        results = self.loop.run_until_complete(self.aqm.search_many(bodies))
+        self.assertEqual([json.loads(bodies[i])["query"] for i in range(3)], [x[0]["_source"] for x in results])
+
+    @Utils.test_print
+    def test_aquery(self):
+        with Augment(es_index="fake", query_cache=QueryCache(max_size=0)) as augment:
+            augment.qm.es = FakeES()
+            result = self.loop.run_until_complete(augment.aquery(global_datamart_id=10000))
+            self.assertEqual(result, [{"_source": {"bool": {"must": [{"term": {"datamart_id": 10000}}]}}}])
+            self.assertIsNotNone(augment._aqm._executor)
+        self.assertIsNone(augment._aqm)
+
+    @Utils.test_print
+    def test_lazy_executor(self):
+        augment = Augment(es_index="fake", query_cache=QueryCache(max_size=0))
+        self.assertIsNone(augment._aqm)
+        self.assertIsNone(augment.aqm._executor)
+        augment.close()
+        self.assertIsNone(augment._aqm)
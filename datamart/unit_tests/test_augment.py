@@ -4,6 +4,7 @@ from datamart.augment import Augment
 import pandas as pd
 import numpy as np
 from pandas.util.testing import assert_frame_equal
+import json
 
 
 class TestAugment(unittest.TestCase):
@@ -37,3 +38,173 @@ class TestAugment(unittest.TestCase):
             right_columns=[[0]],
             joiner="default"
         ), expected)
+
+    @Utils.test_print
+    def test_join_metadata_features(self):
+        received = dict()
+
+        class FakeJoiner(object):
+            METADATA_FEATURES = []
+
+            def join(self, **kwargs):
+                received.update(kwargs)
+                return kwargs["left_df"]
+
+        df = self.df[["Age", "Date", "Name"]]
+        self.augment.joiners["fake"] = FakeJoiner()
+        self.augment.join(left_df=df, right_df=df, left_columns=[[0]], right_columns=[[0]], joiner="fake")
+        self.assertIsNone(received["left_metadata"])
+        self.assertIsNone(received["right_metadata"])
+
+        FakeJoiner.METADATA_FEATURES = ["basic"]
+        self.augment.join(left_df=df, right_df=df, left_columns=[[1]], right_columns=[[1]], joiner="fake")
+        variables = received["left_metadata"]["variables"]
+        self.assertIn("temporal_coverage", variables[1])
+        self.assertNotIn("named_entity", variables[2])
+        self.assertFalse(any("dsbox_profiled" in variable for variable in variables))
+
+    @Utils.test_print
+    def test_augment_pipeline(self):
+        df = self.df[["Name", "Age"]]
+        datasets = {
+            1: pd.DataFrame(data={'name': ["tom", "jack"], 'city': ["LA", "NY"]}, columns=['name', 'city']),
+            2: pd.DataFrame(data={'Age': [34, 28], 'Name': ["Jack", "Tom"]}, columns=['Age', 'Name'])
+        }
+
+        def get_dataset_for_join(right_metadata, **kwargs):
+            if right_metadata["datamart_id"] not in datasets:
+                raise ValueError("no dataset")
+            return datasets[right_metadata["datamart_id"]]
+
+        self.augment.get_dataset_for_join = get_dataset_for_join
+        augmented = self.augment.augment_pipeline(left_df=df, selections=[
+            {"metadata": {"datamart_id": 1}, "left_columns": [[0]], "right_columns": [[0]]},
+            {"metadata": {"datamart_id": 3}, "left_columns": [[0]], "right_columns": [[0]]},
+            {"metadata": {"datamart_id": 2}, "left_columns": [[0], [1]], "right_columns": [[1], [0]]}
+        ])
+        self.assertEqual(augmented.columns.tolist(), ["Name", "Age", "city"])
+        self.assertEqual(augmented["city"].tolist()[:2], ["LA", "NY"])
+        self.assertEqual(augmented.shape[0], 4)
+
+    @Utils.test_print
+    def test_join_partitions(self):
+        left_chunks = (self.df.iloc[start:start + 3] for start in range(0, 4, 3))
+        right_df = pd.DataFrame(data={'name': ["Tom", "Ricky", "Tom"], 'city': ["LA", "SF", "NY"]})
+        partitions = list(self.augment.join_partitions(left_df=left_chunks, right_df=right_df,
+                                                       left_columns=[[0]], right_columns=[[0]]))
+        joined = pd.concat(partitions).sort_values(by=["Age", "city"]).reset_index(drop=True)
+        self.assertEqual(joined.columns.tolist(), ["Name", "Age", "Date", "city"])
+        self.assertEqual(joined["Name"].tolist(), ["Tom", "Tom", "Steve", "Jack", "Ricky"])
+        self.assertEqual(joined["city"].tolist(), ["LA", "NY", np.nan, np.nan, "SF"])
+
+    @Utils.test_print
+    def test_query_joinable(self):
+        minhash = self.augment.minhash
+        signature, size = minhash.signature(self.df["Name"])
+        other, other_size = minhash.signature(pd.Series(["tom", "jack", "steve", "ricky", "bob"]))
+        bodies = list()
+
+        class FakeES(object):
+            def search(self, body, **kwargs):
+                bodies.append(json.loads(body))
+                return {"hits": {"total": 2, "hits": [
+                    {"_id": 1, "inner_hits": {"variables": {"hits": {"hits": [
+                        {"_nested": {"offset": 0}, "_source": {"minhash": {"signature": other, "size": other_size}}}
+                    ]}}}},
+                    {"_id": 2, "inner_hits": {"variables": {"hits": {"hits": [
+                        {"_nested": {"offset": 3}, "_source": {"minhash": {"signature": [0] * 128, "size": 3}}}
+                    ]}}}}
+                ]}}
+
+        self.augment.qm.es = FakeES()
+        hits = self.augment.query_joinable(col=self.df["Name"])
+        self.assertEqual([hit["_id"] for hit in hits], [1])
+        self.assertEqual(hits[0]["containment"][0][0], 0)
+        should = bodies[0]["query"]["bool"]["must"][0]["nested"]["query"]["bool"]["should"]
+        self.assertEqual([x["term"]["variables.minhash.lsh"] for x in should], minhash.lsh(signature))
+
+    @Utils.test_print
+    def test_query_temporal_coverage_without_date_range(self):
+        bodies = list()
+
+        class FakeIndices(object):
+            def get_field_mapping(self, index, fields):
+                return {"fake_v1": {"mappings": {"_doc": {}}}}
+
+        class FakeES(object):
+            indices = FakeIndices()
+
+            def search(self, body, **kwargs):
+                bodies.append(json.loads(body))
+                return {"hits": {"total": 0, "hits": []}}
+
+        self.augment.qm.es = FakeES()
+        self.augment.query(temporal_coverage_start="2018-01-01", temporal_coverage_end="2018-12-31")
+        nested = bodies[0]["query"]["bool"]["must"][0]["nested"]
+        self.assertIn("variables.temporal_coverage.start", nested["query"]["bool"]["must"][0]["range"])
+
+    @Utils.test_print
+    def test_query_intersection(self):
+        bodies = list()
+
+        class FakeIndices(object):
+            def exists(self, index):
+                return False
+
+        class FakeES(object):
+            indices = FakeIndices()
+
+            def search(self, body, **kwargs):
+                bodies.append(json.loads(body))
+                return {"hits": {"total": 0, "hits": []}}
+
+        self.augment.qm.es = FakeES()
+        self.augment.query_intersection(queries=[{"col": self.df["Name"]},
+                                                 {"col": self.df["Date"], "global_datamart_id": 10000}],
+                                        names=["name", "date"])
+        must = bodies[0]["query"]["bool"]["must"]
+        self.assertEqual([x["nested"]["inner_hits"]["name"] for x in must if "nested" in x], ["name_col", "date_col"])
+        self.assertIn({"term": {"datamart_id": 10000}}, must)
+
+    @Utils.test_print
+    def test_query_separate_variables(self):
+        summary = {"title": "people", "variables": [{"datamart_id": 20001, "name": "id"},
+                                                    {"datamart_id": 20002, "name": "name"}]}
+        variable = {"datamart_id": 20002, "name": "name", "named_entity": ["tom", "jack", "steve"],
+                    "dataset": {"datamart_id": 20000}}
+
+        class FakeIndices(object):
+            def exists(self, index):
+                return index == "fake_variables"
+
+        class FakeES(object):
+            indices = FakeIndices()
+
+            def search(self, index, body, **kwargs):
+                body = json.loads(body)
+                if index == "fake_variables":
+                    self.variable_body = body
+                    return {"hits": {"total": 1, "hits": [{"_score": 3.0, "_source": variable,
+                                                           "matched_queries": ["tom", "jack"],
+                                                           "highlight": {"named_entity": ["tom", "jack"]}}]}}
+                if any("ids" in query for query in body["query"]["bool"]["must"]):
+                    return {"hits": {"total": 1, "hits": [{"_id": "20000", "_score": 0.5, "_source": summary}]}}
+                return {"hits": {"total": 1, "hits": [{"_id": "1", "_score": 1.0, "_source": {"title": "nested"}}]}}
+
+            def mget(self, index, body, **kwargs):
+                if index == "fake":
+                    return {"docs": [{"_index": "fake_v1", "_id": "20000", "found": True, "_source": summary}]}
+                return {"docs": [{"_id": "20002", "found": True, "_source": variable}]}
+
+        self.augment.qm.es = FakeES()
+        hits = self.augment.query(col=self.df["Name"], query_string="people")
+        self.assertEqual([hit["_id"] for hit in hits], ["20000", "1"])
+        self.assertEqual(Utils.get_inner_hits_info(hits[0])[0]["offset"], 1)
+        self.assertEqual(hits[0]["_source"]["variables"][1]["named_entity"], ["tom", "jack", "steve"])
+        self.assertNotIn("named_entity", summary["variables"][1])
+        self.assertIn("named_entity", self.augment.qm.es.variable_body["query"]["bool"]["should"][0]["match_phrase"])
+
+        estimate = self.augment.estimate_join(left_df=self.df, right_metadata=summary,
+                                              left_columns=[[0]], right_columns=[[1]])
+        self.assertEqual(estimate["key_parts"][0]["method"], "named_entity")
+        self.assertAlmostEqual(estimate["match_rate"], 0.75)
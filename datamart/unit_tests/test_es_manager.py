@@ -0,0 +1,25 @@
+from datamart.utilities.utils import Utils
+from datamart.es_managers.es_manager import ESManager
+from datamart.es_managers.query_manager import QueryManager
+from datamart.es_managers.index_manager import IndexManager
+import unittest
+
+
+class TestESManager(unittest.TestCase):
+
+    def tearDown(self):
+        ESManager.close_clients()
+
+    @Utils.test_print
+    def test_client_reuse(self):
+        qm = QueryManager(es_host="localhost", es_port=9200, es_index="fake")
+        im = IndexManager(es_host="localhost", es_port=9200)
+        self.assertIs(qm.es, im.es)
+        self.assertIsNot(qm.es, IndexManager(es_host="otherhost", es_port=9200).es)
+
+    @Utils.test_print
+    def test_client_settings(self):
+        client = ESManager.get_client(es_host="localhost", es_port=9200, maxsize=5, max_retries=1)
+        self.assertEqual(client.transport.max_retries, 1)
+        self.assertIs(client, ESManager.get_client(es_host="localhost", es_port=9200, max_retries=1, maxsize=5))
+        self.assertIsNot(client, ESManager.get_client(es_host="localhost", es_port=9200))
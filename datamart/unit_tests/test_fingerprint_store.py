@@ -0,0 +1,111 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+from datamart.index_builder import IndexBuilder
+from datamart.utilities.fingerprint_store import FingerprintStore
+from datamart.utilities.utils import Utils
+
+
+class FakeIndexManager(object):
+    def __init__(self):
+        self.calls = list()
+
+    def check_exists(self, index):
+        return True
+
+    def current_global_datamart_id(self, index):
+        return 0
+
+    def increment_sequence(self, name, count, start=None):
+        self.sequence = getattr(self, "sequence", start or 0) + count
+        return self.sequence
+
+    def create_doc(self, **kwargs):
+        self.calls.append(("create", kwargs["id"]))
+
+    def index_doc(self, **kwargs):
+        self.calls.append(("index", kwargs["id"]))
+
+    def delete_doc(self, **kwargs):
+        self.calls.append(("delete", kwargs["id"]))
+
+
+class TestFingerprintStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.description_dir = os.path.join(self.tmp_dir, "descriptions")
+        os.makedirs(self.description_dir)
+        for name in ["a", "b"]:
+            self.write_description(name, {"title": name})
+        self.ib = IndexBuilder()
+        self.ib.im = FakeIndexManager()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_description(self, name, description):
+        description["materialization"] = {"python_path": "noaa_materializer"}
+        with open(os.path.join(self.description_dir, "{}_description.json".format(name)), "w") as f:
+            json.dump(description, f)
+
+    def bulk_indexing(self):
+        self.ib.im.calls = list()
+        self.ib.bulk_indexing(description_dir=self.description_dir, es_index="fake", incremental=True)
+        return self.ib.im.calls
+
+    @Utils.test_print
+    def test_fingerprint(self):
+        path = os.path.join(self.description_dir, "a_description.json")
+        store = FingerprintStore(path=os.path.join(self.tmp_dir, "store.json"))
+        fingerprint = store.fingerprint(path)
+        self.assertEqual(fingerprint, store.fingerprint(path))
+        self.write_description("a", {"title": "changed"})
+        self.assertNotEqual(fingerprint, store.fingerprint(path))
+
+        store.set(path, fingerprint, 10000)
+        store.save()
+        self.assertEqual(FingerprintStore(path=store.path).get(path), {"fingerprint": fingerprint,
+                                                                        "datamart_id": 10000})
+
+    @Utils.test_print
+    def test_incremental_bulk_indexing(self):
+        self.assertEqual(self.bulk_indexing(), [("create", 10000), ("create", 20000)])
+        self.assertEqual(self.bulk_indexing(), [])
+
+        self.write_description("b", {"title": "changed"})
+        self.write_description("c", {"title": "c"})
+        os.remove(os.path.join(self.description_dir, "a_description.json"))
+        self.assertEqual(self.bulk_indexing(), [("index", 20000), ("create", 30000), ("delete", 10000)])
+        self.assertEqual(self.bulk_indexing(), [])
+
+    @Utils.test_print
+    def test_incremental_bulk_indexing_batched_saves(self):
+        self.write_description("c", {"title": "c"})
+        self.ib.FINGERPRINT_SAVE_INTERVAL = 2
+        saves = list()
+        original_save = FingerprintStore.save
+
+        def save(store):
+            saves.append(len(store.entries))
+            original_save(store)
+
+        with mock.patch.object(FingerprintStore, "save", save):
+            self.bulk_indexing()
+        # every 2 datasets, the pending one when the run stops, then after removals
+        self.assertEqual(saves, [2, 3, 3])
+
+        # an interrupted run keeps the fingerprints of the datasets indexed before
+        os.remove(os.path.join(self.description_dir, ".fake_fingerprints.json"))
+        self.write_description("a", {"title": "changed"})
+        self.ib.im.create_doc = mock.Mock(side_effect=[None, KeyboardInterrupt()])
+        with self.assertRaises(KeyboardInterrupt):
+            self.bulk_indexing()
+        store = FingerprintStore(path=os.path.join(self.description_dir, ".fake_fingerprints.json"))
+        self.assertEqual(len(store.entries), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import threading
+from elasticsearch.exceptions import NotFoundError
+from datamart.es_managers.id_allocator import IdAllocator
+from datamart.utilities.utils import Utils
+
+
+class FakeIndexManager(object):
+    """Sequences kept in memory, increments serialized like es does."""
+
+    def __init__(self, max_datamart_id=0):
+        self.max_datamart_id = max_datamart_id
+        self.sequences = dict()
+        self.increments = 0
+        self.lock = threading.Lock()
+
+    def current_global_datamart_id(self, index):
+        return self.max_datamart_id
+
+    def increment_sequence(self, name, count, start=None):
+        with self.lock:
+            if name not in self.sequences:
+                if start is None:
+                    raise NotFoundError(404, "document_missing_exception")
+                self.sequences[name] = start
+            self.increments += 1
+            self.sequences[name] += count
+            return self.sequences[name]
+
+    def raise_sequence(self, name, value):
+        with self.lock:
+            self.sequences[name] = max(self.sequences.get(name, value), value)
+
+
+class TestIdAllocator(unittest.TestCase):
+
+    @Utils.test_print
+    def test_next_id(self):
+        im = FakeIndexManager(max_datamart_id=30000)
+        allocator = IdAllocator(index_manager=im, es_index="fake", interval=10000, block_size=2)
+        self.assertEqual([allocator.next_id() for _ in range(3)], [40000, 50000, 60000])
+        self.assertEqual(im.increments, 2)
+
+        im.max_datamart_id = 100000
+        allocator.reset()
+        self.assertEqual(allocator.next_id(), 110000)
+
+    @Utils.test_print
+    def test_reset_keeps_reserved_blocks(self):
+        im = FakeIndexManager()
+        worker = IdAllocator(index_manager=im, es_index="fake", interval=10000, block_size=5)
+        other = IdAllocator(index_manager=im, es_index="fake", interval=10000, block_size=5)
+        ids = [worker.next_id()]
+        # the reserved block is not written yet, the index is still empty
+        other.reset()
+        ids.extend(other.next_id() for _ in range(5))
+        ids.extend(worker.next_id() for _ in range(4))
+        self.assertEqual(len(set(ids)), 10)
+
+    @Utils.test_print
+    def test_concurrent_workers(self):
+        im = FakeIndexManager()
+        ids = list()
+
+        def worker():
+            # every worker has its own allocator, like separate processes sharing es
+            allocator = IdAllocator(index_manager=im, es_index="fake", interval=10, block_size=7)
+            ids.extend(allocator.next_id() for _ in range(50))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(ids)), 200)
+        self.assertTrue(all(datamart_id % 10 == 0 and datamart_id > 0 for datamart_id in ids))
+
+
+if __name__ == '__main__':
+    unittest.main()
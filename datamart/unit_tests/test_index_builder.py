@@ -366,3 +366,34 @@ class TestIndexBuilder(unittest.TestCase):
         }
 
         self.assertEqual(global_metadata, expected)
+
+    @Utils.test_print
+    def test_add_date_range(self):
+        metadata = {
+            "variables": [
+                {"name": "city"},
+                {"name": "start", "temporal_coverage": {"start": "2014-02-23", "end": "2018-10-01T10:00:00.500"}},
+                {"name": "end", "temporal_coverage": {"start": None, "end": "2023-02-13"}}
+            ]
+        }
+        metadata = self.ib.add_date_range(metadata)
+        self.assertNotIn("date_range", metadata["variables"][0])
+        self.assertEqual(metadata["variables"][1]["date_range"],
+                         {"gte": "2014-02-23T00:00:00", "lte": "2018-10-01T10:00:00"})
+        self.assertNotIn("date_range", metadata["variables"][2])
+        self.assertNotIn("date_range", metadata)
+
+    @Utils.test_print
+    def test_add_minhash(self):
+        data = pd.DataFrame({
+            "city": ["abu dhabi", "ajman", "dubai", "sharjah"],
+            "value": [1.5, 2.5, 3.5, 4.5]
+        }, columns=["city", "value"])
+        metadata = self.ib.add_minhash(metadata={"variables": [{"name": "city"}, {"name": "value"}]}, data=data)
+        signature, size = self.ib.minhash.signature(data["city"])
+        self.assertEqual(metadata["variables"][0]["minhash"], {
+            "signature": signature,
+            "size": 4,
+            "lsh": self.ib.minhash.lsh(signature)
+        })
+        self.assertNotIn("minhash", metadata["variables"][1])
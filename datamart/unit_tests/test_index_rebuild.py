@@ -0,0 +1,184 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from elasticsearch.exceptions import NotFoundError, RequestError
+from datamart.es_managers.index_manager import IndexManager
+from datamart.index_builder import IndexBuilder
+from datamart.utilities.fingerprint_store import FingerprintStore
+from datamart.utilities.metadata_dump import MetadataDumpReader
+from datamart.utilities.utils import Utils
+
+
+class FakeIndexManager(object):
+    def __init__(self):
+        self.indices = {"fake_v1": []}
+        self.aliases = {"fake": ["fake_v1"]}
+        self.sequences = dict()
+        self.version = 1
+        self.fail_bulk = False
+
+    def versioned_index_name(self, alias):
+        self.version += 1
+        return "{}_v{}".format(alias, self.version)
+
+    def check_exists(self, index):
+        return index in self.indices or index in self.aliases
+
+    def create_index(self, index, variables=False):
+        self.indices[index] = []
+
+    @staticmethod
+    def first_index_name(alias):
+        return alias + "_v0"
+
+    def create_index_if_missing(self, index, variables=False):
+        if index in self.indices:
+            return False
+        self.create_index(index=index, variables=variables)
+        return True
+
+    def add_alias(self, alias, index):
+        self.aliases.setdefault(alias, [])
+        if index not in self.aliases[alias]:
+            self.aliases[alias].append(index)
+
+    def delete_index(self, index):
+        for name in index:
+            del self.indices[name]
+
+    def current_global_datamart_id(self, index):
+        return max(self.indices[self.aliases.get(index, [index])[0]] or [0])
+
+    def increment_sequence(self, name, count, start=None):
+        if name not in self.sequences and start is None:
+            raise NotFoundError(404, "document_missing_exception")
+        self.sequences[name] = self.sequences.get(name, start) + count
+        return self.sequences[name]
+
+    def delete_sequence(self, name):
+        self.sequences.pop(name, None)
+
+    def create_doc(self, index, body, **kwargs):
+        self.indices[self.aliases.get(index, [index])[0]].append(json.loads(body)["datamart_id"])
+
+    def create_doc_bulk(self, file, index, **kwargs):
+        if self.fail_bulk:
+            raise ValueError("bulk load failed")
+        self.indices[index].extend(metadata["datamart_id"] for metadata in MetadataDumpReader(file))
+
+    def warm_up(self, index, queries=None):
+        pass
+
+    def swap_alias(self, alias, index):
+        old_indices = self.aliases.get(alias, [])
+        self.aliases[alias] = [index]
+        return old_indices
+
+    def search(self, alias):
+        return self.indices[self.aliases[alias][0]]
+
+
+class FakeIndices(object):
+    def __init__(self, aliases, indices):
+        self.aliases = aliases
+        self.indices = indices
+        self.actions = None
+
+    def exists_alias(self, name):
+        return name in self.aliases
+
+    def get_alias(self, name):
+        return {index: {"aliases": {name: {}}} for index in self.aliases[name]}
+
+    def exists(self, index):
+        return index in self.indices or index in self.aliases
+
+    def update_aliases(self, body):
+        self.actions = body["actions"]
+
+
+class TestIndexRebuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.description_dir = os.path.join(self.tmp_dir, "descriptions")
+        os.makedirs(self.description_dir)
+        for name in ["a", "b"]:
+            with open(os.path.join(self.description_dir, "{}_description.json".format(name)), "w") as f:
+                json.dump({"title": name, "materialization": {"python_path": "noaa_materializer"}}, f)
+        self.ib = IndexBuilder()
+        self.ib.im = FakeIndexManager()
+        self.ib.im.indices["fake_v1"] = [10000]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @Utils.test_print
+    def test_rebuild_index(self):
+        fingerprint_file = os.path.join(self.tmp_dir, "fingerprints.json")
+        new_index = self.ib.rebuild_index(description_dir=self.description_dir, es_index="fake",
+                                          fingerprint_file=fingerprint_file)
+        self.assertEqual(new_index, "fake_v2")
+        # ids come from the sequence of the alias, after the ids workers may have reserved from it
+        self.assertEqual(self.ib.im.search("fake"), [20000, 30000])
+        self.assertNotIn("fake_v1", self.ib.im.indices)
+        self.assertEqual(list(self.ib.im.sequences), ["fake"])
+        self.assertEqual(len(FingerprintStore(path=fingerprint_file).entries), 2)
+
+        self.ib.indexing(description_path=os.path.join(self.description_dir, "a_description.json"), es_index="fake")
+        self.assertEqual(self.ib.im.search("fake"), [20000, 30000, 40000])
+
+    @Utils.test_print
+    def test_rebuild_index_failure(self):
+        self.ib.im.fail_bulk = True
+        with self.assertRaises(ValueError):
+            self.ib.bulk_indexing(description_dir=self.description_dir, es_index="fake", delete_old_es_index=True)
+        self.assertEqual(self.ib.im.aliases["fake"], ["fake_v1"])
+        self.assertEqual(sorted(self.ib.im.indices), ["fake_v1"])
+
+    @Utils.test_print
+    def test_create_missing_index_concurrently(self):
+        other = IndexBuilder()
+        other.im = self.ib.im
+        description_path = os.path.join(self.description_dir, "a_description.json")
+        self.ib.indexing(description_path=description_path, es_index="new")
+        # a second worker finding the index missing before the first one created it
+        self.ib.im.check_exists = lambda index: False
+        other._check_es_index(es_index="new")
+        self.assertEqual(self.ib.im.aliases["new"], ["new_v0"])
+        self.assertEqual(self.ib.im.search("new"), [10000])
+        self.assertIn("fake_v1", self.ib.im.indices)
+
+    @Utils.test_print
+    def test_first_index(self):
+        im = IndexManager(es_host="localhost")
+        im.es = type("FakeES", (object,), {})()
+        im.es.indices = FakeIndices(aliases={}, indices=[])
+        im.es.indices.put_alias = lambda index, name: setattr(im.es.indices, "actions", [(index, name)])
+        im.add_alias(alias="fake", index="fake_v0")
+        self.assertEqual(im.es.indices.actions, [("fake_v0", "fake")])
+
+        def create(index, body):
+            raise RequestError(400, "resource_already_exists_exception", {})
+
+        im.es.indices.create = create
+        self.assertFalse(im.create_index_if_missing(index="fake_v0"))
+
+    @Utils.test_print
+    def test_swap_alias(self):
+        im = IndexManager(es_host="localhost")
+        im.es = type("FakeES", (object,), {})()
+        im.es.indices = FakeIndices(aliases={"fake": ["fake_v1"]}, indices=["fake_v1"])
+        self.assertEqual(im.swap_alias(alias="fake", index="fake_v2"), ["fake_v1"])
+        self.assertEqual(im.es.indices.actions, [{"add": {"index": "fake_v2", "alias": "fake"}},
+                                                 {"remove": {"index": "fake_v1", "alias": "fake"}}])
+
+        im.es.indices = FakeIndices(aliases={}, indices=["fake"])
+        self.assertEqual(im.swap_alias(alias="fake", index="fake_v2"), [])
+        self.assertEqual(im.es.indices.actions, [{"add": {"index": "fake_v2", "alias": "fake"}},
+                                                 {"remove_index": {"index": "fake"}}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from datamart.utilities.indexing_benchmark import IndexingBenchmark, SyntheticDatasetGenerator
+from datamart.utilities.utils import Utils
+
+
+class TestIndexingBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @Utils.test_print
+    def test_synthetic_dataframe(self):
+        data = SyntheticDatasetGenerator().dataframe(rows=500, columns=5, text_length=4, entity_cardinality=20)
+        self.assertEqual(data.shape, (500, 5))
+        self.assertEqual(list(data.columns), ["entity_0", "float_1", "int_2", "date_3", "entity_4"])
+        self.assertLessEqual(data["entity_0"].nunique(), 20)
+        self.assertEqual(set(data["entity_0"].str.len()), {4})
+
+    @Utils.test_print
+    def test_run(self):
+        results_file = os.path.join(self.tmp_dir, "results.ndjson")
+        run = IndexingBenchmark(repeat=1).run([{"rows": 100, "columns": 4}], results_file=results_file)
+        (result,) = run["results"]
+        self.assertEqual(set(result["stages"]), set(IndexingBenchmark.STAGES))
+        self.assertGreater(result["document_bytes"], 0)
+        self.assertEqual(IndexingBenchmark.compare(results_file), [])
+
+    @Utils.test_print
+    def test_compare(self):
+        results_file = os.path.join(self.tmp_dir, "results.ndjson")
+        case = {"rows": 100, "columns": 4}
+        with open(results_file, "w") as f:
+            for commit, seconds in [("a", 1.0), ("b", 1.5)]:
+                f.write(json.dumps({"commit": commit, "results": [
+                    {"case": case, "stages": {"read": 0.1, "construct": seconds}, "total": seconds + 0.1}]}) + "\n")
+        regressions = IndexingBenchmark.compare(results_file, tolerance=0.2)
+        self.assertEqual([(regression["stage"], regression["commit"]) for regression in regressions],
+                         [("construct", "b"), ("total", "b")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import pandas as pd
+from unittest import mock
+from datamart.index_builder import IndexBuilder
+from datamart.indexing_runner import IndexingRunner
+from datamart.utilities.job_queue import IndexJobQueue
+from datamart.utilities.utils import Utils
+
+
+class FakeIndexManager(object):
+    def __init__(self):
+        self.docs = dict()
+
+    def check_exists(self, index):
+        return True
+
+    def current_global_datamart_id(self, index):
+        return 0
+
+    def increment_sequence(self, name, count, start=None):
+        self.sequence = getattr(self, "sequence", start or 0) + count
+        return self.sequence
+
+    def index_doc(self, id, body, **kwargs):
+        self.docs[id] = json.loads(body)["title"]
+
+    def index_dataset(self, metadata, index, variable_index):
+        self.docs[metadata["datamart_id"]] = (metadata["title"], variable_index)
+
+    @staticmethod
+    def variable_index_name(index):
+        return index + "_variables"
+
+
+class TestIndexingRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.description_dir = os.path.join(self.tmp_dir, "descriptions")
+        os.makedirs(self.description_dir)
+        for name in ["a", "b", "c"]:
+            self.write_description(name)
+        self.queue = IndexJobQueue(path=os.path.join(self.tmp_dir, "jobs.sqlite"), max_attempts=2, base_delay=0)
+        self.ib = IndexBuilder()
+        self.ib.im = FakeIndexManager()
+        self.runner = IndexingRunner(self.ib, self.queue, io_workers=2, cpu_workers=2, use_processes=False,
+                                     poll_interval=0.01)
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def write_description(self, name):
+        with open(os.path.join(self.description_dir, "{}_description.json".format(name)), "w") as f:
+            json.dump({"title": name, "materialization": {"python_path": "noaa_materializer"}}, f)
+
+    @Utils.test_print
+    def test_job_queue(self):
+        self.queue.add("a_description.json")
+        self.queue.add("a_description.json")
+        (job,) = self.queue.claim(limit=10)
+        self.assertEqual(self.queue.claim(), [])
+        self.assertTrue(self.queue.fail(job["id"], "error"))
+        self.queue.set_datamart_id(job["id"], 10000)
+        (job,) = self.queue.claim()
+        self.assertEqual((job["attempts"], job["datamart_id"]), (1, 10000))
+        self.assertFalse(self.queue.fail(job["id"], "error"))
+        self.assertEqual(self.queue.counts(), {IndexJobQueue.FAILED: 1})
+
+        # a job leased to a live runner is not taken by another one, an expired lease is
+        self.queue.add("a_description.json", reset=True)
+        (job,) = self.queue.claim()
+        other = IndexJobQueue(path=self.queue.path, lease=0)
+        self.assertEqual(other.requeue_expired(), 0)
+        self.assertEqual(other.claim(), [])
+        self.queue.lease = 0
+        self.queue.renew([job["id"]])
+        (job,) = other.claim()
+        self.queue.complete(job["id"])
+        self.assertEqual(self.queue.counts(), {IndexJobQueue.RUNNING: 1})
+        self.assertEqual(other.requeue_expired(), 1)
+        self.assertEqual(self.queue.counts(), {IndexJobQueue.PENDING: 1})
+        other.close()
+
+    @Utils.test_print
+    def test_run(self):
+        self.assertEqual(self.runner.enqueue_dir(self.description_dir), 3)
+        os.remove(os.path.join(self.description_dir, "c_description.json"))
+        counts = self.runner.run(es_index="fake", query_data_for_indexing=False)
+        self.assertEqual(counts, {IndexJobQueue.DONE: 2, IndexJobQueue.FAILED: 1})
+        self.assertEqual(sorted(self.ib.im.docs.values()), ["a", "b"])
+        self.assertEqual(self.queue.jobs(IndexJobQueue.FAILED)[0]["attempts"], 2)
+
+        # a crashed runner leaves claimed jobs running, they are resumed under the same datamart_id once their
+        # lease expired
+        self.write_description("c")
+        self.queue.add(os.path.join(self.description_dir, "c_description.json"), reset=True)
+        crashed = IndexJobQueue(path=self.queue.path, lease=0)
+        (job,) = crashed.claim()
+        crashed.set_datamart_id(job["id"], 90000)
+        crashed.close()
+        counts = self.runner.run(es_index="fake", query_data_for_indexing=False)
+        self.assertEqual(counts, {IndexJobQueue.DONE: 3})
+        self.assertEqual(self.ib.im.docs[90000], "c")
+
+    @Utils.test_print
+    def test_run_separate_variables_with_fingerprints(self):
+        fingerprint_file = os.path.join(self.tmp_dir, "fingerprints.json")
+        self.runner.enqueue_dir(self.description_dir)
+        counts = self.runner.run(es_index="fake", query_data_for_indexing=False, separate_variables=True,
+                                 fingerprint_file=fingerprint_file)
+        self.assertEqual(counts, {IndexJobQueue.DONE: 3})
+        self.assertEqual(sorted(self.ib.im.docs.values()), [("a", "fake_variables"), ("b", "fake_variables"),
+                                                            ("c", "fake_variables")])
+
+        # an incremental bulk indexing afterwards finds every dataset unchanged
+        self.ib.im.index_doc = self.ib.im.create_doc = self.ib.im.index_dataset = None
+        self.ib.bulk_indexing(description_dir=self.description_dir, es_index="fake", incremental=True,
+                              fingerprint_file=fingerprint_file, separate_variables=True)
+        self.assertEqual(len(self.ib.im.docs), 3)
+
+    @Utils.test_print
+    def test_run_passes_data_paths(self):
+        data_dir = os.path.join(self.tmp_dir, "data")
+        os.makedirs(data_dir)
+        pd.DataFrame({"city": ["la", "ny"], "value": [1, 2]}).to_csv(os.path.join(data_dir, "a.csv"), index=False)
+        self.runner.enqueue_dir(self.description_dir, data_dir=data_dir)
+
+        built = list()
+        build_metadata = self.runner._build_metadata
+
+        def build(description, data_path, datamart_id):
+            built.append((description["title"], data_path, os.path.exists(data_path) if data_path else None))
+            return build_metadata(description, data_path, datamart_id)
+
+        self.runner._build_metadata = build
+        materialized = pd.DataFrame({"city": ["sf"], "value": [3]})
+        with mock.patch.object(Utils, "materialize", return_value=materialized):
+            counts = self.runner.run(es_index="fake", query_data_for_indexing=True)
+        self.assertEqual(counts, {IndexJobQueue.DONE: 3})
+
+        built = sorted(built)
+        self.assertEqual(built[0], ("a", os.path.join(data_dir, "a.csv"), True))
+        # materialized data is spilled to a csv file for the worker, removed once the job is done
+        self.assertTrue(all(path.endswith(".csv") and exists for _, path, exists in built[1:]))
+        self.assertFalse(any(os.path.exists(path) for _, path, _ in built[1:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
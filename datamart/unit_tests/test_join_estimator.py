@@ -0,0 +1,46 @@
+import unittest
+from datamart.joiners.join_estimator import JoinEstimator
+import pandas as pd
+from datamart.utilities.utils import Utils
+
+
+class TestJoinEstimator(unittest.TestCase):
+    def setUp(self):
+        self.left_df = pd.DataFrame(data={
+            "city": ["Los Angeles", " new york", "Shanghai", None],
+            "date": ["2018-01-05", "2018-06-01", "2019-03-01", "2017-12-31"]
+        }, columns=["city", "date"])
+        self.right_metadata = {
+            "variables": [
+                {"name": "city", "named_entity": ["los angeles", "New York", "boston"],
+                 "dsbox_profiled": {"ratio_of_distinct_values": 0.5}},
+                {"name": "date", "temporal_coverage": {"start": "2018-01-01T00:00:00", "end": "2018-12-31T00:00:00"}},
+                {"name": "value"}
+            ]
+        }
+
+    @Utils.test_print
+    def test_estimate(self):
+        estimate = JoinEstimator.estimate(left_df=self.left_df,
+                                          right_metadata=self.right_metadata,
+                                          left_columns=[[0], [1]],
+                                          right_columns=[[0], [1]])
+        self.assertEqual(estimate["key_parts"], [{"method": "named_entity", "match_rate": 0.5},
+                                                 {"method": "temporal_coverage", "match_rate": 0.5}])
+        self.assertEqual(estimate["match_rate"], 0.25)
+        self.assertEqual(estimate["matched_rows"], 1)
+        self.assertEqual(estimate["estimated_rows"], 5)
+
+    @Utils.test_print
+    def test_estimate_unknown(self):
+        estimate = JoinEstimator.estimate(left_df=self.left_df,
+                                          right_metadata=self.right_metadata,
+                                          left_columns=[[0]],
+                                          right_columns=[[2]])
+        self.assertEqual(estimate["key_parts"], [{"method": "unknown", "match_rate": None}])
+        self.assertEqual(estimate["match_rate"], 1.0)
+        self.assertEqual(estimate["estimated_rows"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from datamart.joiners.join_planner import JoinPlanner
+import pandas as pd
+from datamart.utilities.utils import Utils
+
+
+class TestJoinPlanner(unittest.TestCase):
+    def setUp(self):
+        self.right_metadata = {
+            "materialization": {"python_path": "noaa_materializer"},
+            "variables": [
+                {"name": "date", "temporal_coverage": {"start": "2018-01-01T00:00:00", "end": "2018-12-31T00:00:00"}},
+                {"name": "stationId"},
+                {"name": "city"},
+                {"name": "TAVG"}
+            ]
+        }
+        self.left_df = pd.DataFrame(data={
+            "city": ["Los Angeles ", "new york", "Los Angeles", None],
+            "year": [2016, 2017, 2018, 2018],
+            "value": [1, 2, 3, 4]
+        }, columns=["city", "year", "value"])
+
+    @Utils.test_print
+    def test_plan(self):
+        constrains = JoinPlanner.plan(left_df=self.left_df,
+                                      right_metadata=self.right_metadata,
+                                      left_columns=[[0], [1]],
+                                      right_columns=[[2], [0]])
+        expected = {
+            "named_entity": {2: ["Los Angeles", "new york"]},
+            "date_range": {"start": "2016-01-01T00:00:00", "end": "2018-12-31T00:00:00"}
+        }
+        self.assertEqual(constrains, expected)
+
+    @Utils.test_print
+    def test_plan_keep_user_constrains(self):
+        user_constrains = {"named_entity": {2: ["boston"]}, "date_range": {"start": "2018-01-01T00:00:00"}}
+        constrains = JoinPlanner.plan(left_df=self.left_df,
+                                      right_metadata=self.right_metadata,
+                                      left_columns=[[0], [1]],
+                                      right_columns=[[2], [0]],
+                                      constrains=user_constrains)
+        self.assertEqual(constrains, user_constrains)
+
+    @Utils.test_print
+    def test_plan_not_pushdown(self):
+        constrains = JoinPlanner.plan(left_df=self.left_df,
+                                      right_metadata=self.right_metadata,
+                                      left_columns=[[0]],
+                                      right_columns=[[1]])
+        self.assertEqual(constrains, {})
+
+        right_metadata = dict(self.right_metadata, materialization={"python_path": "fbi_materializer"})
+        constrains = JoinPlanner.plan(left_df=self.left_df,
+                                      right_metadata=right_metadata,
+                                      left_columns=[[0]],
+                                      right_columns=[[2]])
+        self.assertEqual(constrains, {})
+
+
+    @Utils.test_print
+    def test_named_entities_keep_case(self):
+        column = pd.Series(["Angola", "afghanistan ", "ANGOLA", "Afghanistan", "", None])
+        self.assertListEqual(JoinPlanner.named_entities(column), ["afghanistan", "Angola"])
+
+
+if __name__ == '__main__':
+    unittest.main()
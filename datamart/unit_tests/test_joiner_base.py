@@ -39,3 +39,121 @@ class TestJoinerBase(unittest.TestCase):
         assert_frame_equal(
             joiner.join(left_df=left_df, right_df=right_df, left_columns=[[0], [1]], right_columns=[[0], [2]]),
             expected)
+
+    @Utils.test_print
+    def test_default_joiner_normalize_keys(self):
+        left_df = pd.DataFrame(data={
+            'year': [2018, 2019, 2020],
+            'city': [" New York", "LOS  ANGELES", "Shanghai"]
+        })
+        right_df = pd.DataFrame(data={
+            'y': ["2018", "2019", "2019"],
+            'c': ["new york", "los angeles", "los angeles"],
+            'extra': [1, 2, 3]
+        })
+        expected = pd.DataFrame(data={
+            'year': [2018, 2019, 2019, 2020],
+            'city': [" New York", "LOS  ANGELES", "LOS  ANGELES", "Shanghai"],
+            'extra': [1, 2, 3, None]
+        })
+        assert_frame_equal(self.joiner.join(left_df=left_df, right_df=right_df, left_columns=[[0], [1]],
+                                            right_columns=[[0], [1]]), expected, check_dtype=False)
+
+    @Utils.test_print
+    def test_default_joiner_zero_padded_keys(self):
+        left_df = pd.DataFrame(data={'zip': ["00501", "501", "02134"]})
+        right_df = pd.DataFrame(data={'zip': [501, "00501"], 'extra': [1, 2]})
+        joined = self.joiner.join(left_df=left_df, right_df=right_df, left_columns=[[0]], right_columns=[[0]])
+        self.assertEqual(joined["extra"].tolist()[:2], [2, 1])
+        self.assertTrue(pd.isnull(joined["extra"].tolist()[2]))
+
+    @Utils.test_print
+    def test_default_joiner_many_to_many_columns(self):
+        left_df = pd.DataFrame(data={
+            'city': ["los angeles", "san diego"],
+            'state': ["CA", "CA"]
+        })
+        right_df = pd.DataFrame(data={
+            'city_state': ["Los Angeles CA", "New York NY"],
+            'extra': [1, 2]
+        })
+        expected = pd.DataFrame(data={
+            'city': ["los angeles", "san diego"],
+            'state': ["CA", "CA"],
+            'extra': [1, None]
+        })
+        assert_frame_equal(self.joiner.join(left_df=left_df, right_df=right_df, left_columns=[[0, 1]],
+                                            right_columns=[[0]]), expected, check_dtype=False)
+
+    @Utils.test_print
+    def test_default_joiner_temporal_metadata(self):
+        left_df = pd.DataFrame(data={'date': ["2018-01-05", "2018/01/06"]})
+        right_df = pd.DataFrame(data={'day': ["Jan 5 2018", "2018-01-06T00:00:00"], 'extra': [1, 2]})
+        left_metadata = {"variables": [{"temporal_coverage": {"start": "2018-01-05", "end": "2018-01-06"}}]}
+        expected = pd.DataFrame(data={'date': ["2018-01-05", "2018/01/06"], 'extra': [1, 2]})
+        assert_frame_equal(self.joiner.join(left_df=left_df, right_df=right_df, left_columns=[[0]],
+                                            right_columns=[[0]], left_metadata=left_metadata), expected)
+
+    @Utils.test_print
+    def test_default_joiner_join_many(self):
+        left_df = pd.DataFrame(data={
+            'city': ["Los Angeles", "new york", None, "shanghai"],
+            'value': [1, 2, 3, 4]
+        }, columns=['city', 'value'])
+        population = pd.DataFrame(data={
+            'name': ["new york", "los angeles", "los angeles"],
+            'value': [8, 4, 5]
+        }, columns=['name', 'value'])
+        area = pd.DataFrame(data={
+            'area': [1214, 784],
+            'name': ["Los Angeles", "New York"]
+        }, columns=['area', 'name'])
+        expected = pd.DataFrame(data={
+            'city': ["Los Angeles", "new york", None, "shanghai"],
+            'value': [1, 2, 3, 4],
+            'value_0': [4, 8, None, None],
+            'area': [1214, 784, None, None]
+        }, columns=['city', 'value', 'value_0', 'area'])
+        joined = self.joiner.join_many(left_df=left_df, rights=[
+            {"right_df": population, "left_columns": [[0]], "right_columns": [[0]]},
+            {"right_df": area, "left_columns": [[0]], "right_columns": [[1]]}
+        ])
+        assert_frame_equal(joined, expected, check_dtype=False)
+
+    @Utils.test_print
+    def test_default_joiner_no_right_keys(self):
+        left_df = pd.DataFrame(data={'city': ["los angeles", None], 'value': [1, 2]}, columns=['city', 'value'])
+        expected = pd.DataFrame(data={'city': ["los angeles", None], 'value': [1, 2], 'extra': [None, None]},
+                                columns=['city', 'value', 'extra'])
+        for right_df in [pd.DataFrame(data={'c': [], 'extra': []}, columns=['c', 'extra']),
+                         pd.DataFrame(data={'c': [None, None], 'extra': [1, 2]}, columns=['c', 'extra'])]:
+            assert_frame_equal(self.joiner.join(left_df=left_df, right_df=right_df, left_columns=[[0]],
+                                                right_columns=[[0]]), expected, check_dtype=False)
+
+    @Utils.test_print
+    def test_default_joiner_empty_left(self):
+        left_df = pd.DataFrame(data={'city': [], 'value': []}, columns=['city', 'value'])
+        right_df = pd.DataFrame(data={'c': ["los angeles"], 'extra': [1]}, columns=['c', 'extra'])
+        joined = self.joiner.join(left_df=left_df, right_df=right_df, left_columns=[[0]], right_columns=[[0]])
+        self.assertListEqual(list(joined.columns), ['city', 'value', 'extra'])
+        self.assertEqual(joined.shape[0], 0)
+
+    @Utils.test_print
+    def test_default_joiner_join_many_empty_right(self):
+        left_df = pd.DataFrame(data={'city': ["Los Angeles", "new york"], 'value': [1, 2]}, columns=['city', 'value'])
+        empty = pd.DataFrame(data={'name': [], 'population': []}, columns=['name', 'population'])
+        null_keys = pd.DataFrame(data={'name': [None], 'area': [1214]}, columns=['name', 'area'])
+        area = pd.DataFrame(data={'name': ["new york"], 'state': ["NY"]}, columns=['name', 'state'])
+        expected = pd.DataFrame(data={
+            'city': ["Los Angeles", "new york"],
+            'value': [1, 2],
+            'population': [None, None],
+            'area': [None, None],
+            'state': [None, "NY"]
+        }, columns=['city', 'value', 'population', 'area', 'state'])
+        joined = self.joiner.join_many(left_df=left_df, rights=[
+            {"right_df": empty, "left_columns": [[0]], "right_columns": [[0]]},
+            {"right_df": null_keys, "left_columns": [[0]], "right_columns": [[0]]},
+            {"right_df": area, "left_columns": [[0]], "right_columns": [[0]]}
+        ])
+        assert_frame_equal(joined, expected, check_dtype=False)
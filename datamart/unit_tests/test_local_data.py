@@ -0,0 +1,65 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import warnings
+import pandas as pd
+from datamart.index_builder import IndexBuilder
+from datamart.utilities.local_data import LocalDataReader
+from datamart.utilities.utils import Utils
+
+
+class TestLocalData(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.df = pd.DataFrame({"id": list(range(30)), "city": ["a", "b", "c"] * 10}, columns=["id", "city"])
+        self.reader = LocalDataReader(sample_rows=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @Utils.test_print
+    def test_read(self):
+        for name, sep, compression in [("data.csv", ",", None), ("data.csv.gz", ",", "gzip"),
+                                       ("data.tsv.bz2", "\t", "bz2")]:
+            path = os.path.join(self.tmp_dir, name)
+            self.df.to_csv(path, sep=sep, index=False, compression=compression)
+            pd.testing.assert_frame_equal(self.reader.read(path), self.df)
+
+    @Utils.test_print
+    def test_read_sampled_dtypes_fallback(self):
+        path = os.path.join(self.tmp_dir, "data.csv")
+        self.df.to_csv(path, index=False)
+        with open(path, "a") as f:
+            f.write(",d\n")
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            data = self.reader.read(path)
+        self.assertEqual(len(data), 31)
+        self.assertTrue(any("Sampled dtypes" in str(warning.message) for warning in caught))
+
+    @Utils.test_print
+    def test_find(self):
+        self.assertIsNone(LocalDataReader.find(self.tmp_dir, "data"))
+        for name in ["data.csv.gz", "data.parquet"]:
+            open(os.path.join(self.tmp_dir, name), "w").close()
+        self.assertEqual(LocalDataReader.find(self.tmp_dir, "data"), os.path.join(self.tmp_dir, "data.parquet"))
+
+    @Utils.test_print
+    def test_index_builder_read_data(self):
+        description_path = os.path.join(self.tmp_dir, "data_description.json")
+        with open(description_path, "w") as f:
+            json.dump({"title": "data", "materialization": {"python_path": "noaa_materializer"}}, f)
+        self.df.to_csv(os.path.join(self.tmp_dir, "data.csv.gz"), index=False, compression="gzip")
+
+        ib = IndexBuilder()
+        ((found_description, data_path),) = list(ib._list_descriptions(self.tmp_dir, self.tmp_dir))
+        self.assertEqual(data_path, os.path.join(self.tmp_dir, "data.csv.gz"))
+        description, data = ib._read_data(found_description, data_path)
+        self.assertEqual(description["title"], "data")
+        pd.testing.assert_frame_equal(data, self.df)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from datamart.metadata.global_metadata import GlobalMetadata
+from datamart.metadata.variable_metadata import VariableMetadata
+from datamart.utilities.utils import Utils
+
+
+class TestMetadata(unittest.TestCase):
+    def setUp(self):
+        self.description = {
+            "title": "a",
+            "date_published": "2018-03-01",
+            "materialization": {"python_path": "noaa_materializer"}
+        }
+
+    @Utils.test_print
+    def test_global_metadata(self):
+        global_metadata = GlobalMetadata.construct_global(self.description, datamart_id=10000)
+        self.assertFalse(hasattr(global_metadata, "__dict__"))
+        self.assertFalse(global_metadata.keywords)
+        variable_metadata = VariableMetadata.construct_variable({"name": "x"}, datamart_id=10001)
+        global_metadata.add_variable_metadata(variable_metadata)
+
+        value = global_metadata.value
+        self.assertEqual(value, {
+            "datamart_id": 10000,
+            "title": "a",
+            "date_published": "2018-03-01T00:00:00",
+            "materialization": {"python_path": "noaa_materializer", "arguments": None},
+            "variables": [{"datamart_id": 10001, "name": "x", "semantic_type": []}]
+        })
+        self.assertIs(global_metadata.value, value)
+
+        # setters keep the built value up to date
+        global_metadata.keywords = ["k"]
+        variable_metadata.named_entity = ["y"]
+        self.assertEqual(value["keywords"], ["k"])
+        self.assertEqual(value["variables"][0]["named_entity"], ["y"])
+
+    @Utils.test_print
+    def test_variable_metadata(self):
+        variable_metadata = VariableMetadata.construct_variable({"named_entity": None,
+                                                                 "temporal_coverage": {"start": "2018-03-01"}})
+        self.assertIsNone(variable_metadata.named_entity)
+        self.assertFalse(variable_metadata.name)
+        self.assertEqual(variable_metadata.temporal_coverage, {"start": "2018-03-01T00:00:00", "end": None})
+
+    @Utils.test_print
+    def test_missing_materialization(self):
+        with self.assertRaises(ValueError):
+            GlobalMetadata.construct_global({"title": "a"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from elasticsearch.serializer import JSONSerializer
+from datamart.es_managers.index_manager import IndexManager
+from datamart.utilities.metadata_dump import MetadataDumpWriter, MetadataDumpReader
+from datamart.utilities.utils import Utils
+
+
+class TestMetadataDump(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.metadata_lst = [{"datamart_id": 10000, "title": "a"}, {"datamart_id": 20000, "title": "b\nc"}]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @Utils.test_print
+    def test_write_read(self):
+        for name in ["metadata.ndjson", "metadata.ndjson.gz"]:
+            path = os.path.join(self.tmp_dir, name)
+            with MetadataDumpWriter(path) as writer:
+                writer.write(self.metadata_lst[0])
+            with MetadataDumpWriter(path, mode="a") as writer:
+                writer.write(self.metadata_lst[1])
+            self.assertEqual(list(MetadataDumpReader(path)), self.metadata_lst)
+
+    @Utils.test_print
+    def test_checksum(self):
+        path = os.path.join(self.tmp_dir, "metadata.ndjson")
+        with MetadataDumpWriter(path) as writer:
+            for metadata in self.metadata_lst:
+                writer.write(metadata)
+        with open(path, "a") as f:
+            f.write('{"datamart_id": 30000}\n')
+        with self.assertRaises(ValueError):
+            list(MetadataDumpReader(path))
+        self.assertEqual(len(list(MetadataDumpReader(path, verify=False))), 3)
+
+    @Utils.test_print
+    def test_append_segments(self):
+        path = os.path.join(self.tmp_dir, "metadata.ndjson")
+        with MetadataDumpWriter(path) as writer:
+            writer.write(self.metadata_lst[0])
+        with MetadataDumpWriter(path, mode="a"):
+            pass
+        with MetadataDumpWriter(path, mode="a") as writer:
+            writer.write(self.metadata_lst[1])
+        segments = MetadataDumpReader.read_checksum(path)
+        self.assertEqual([segment["lines"] for segment in segments], [1, 0, 1])
+        self.assertTrue(MetadataDumpReader(path).verify_checksum())
+        self.assertEqual(list(MetadataDumpReader(path)), self.metadata_lst)
+
+        # dumps without checksum get one on their first append
+        os.remove(MetadataDumpReader.checksum_path(path))
+        with MetadataDumpWriter(path, mode="a") as writer:
+            writer.write({"datamart_id": 30000})
+        self.assertEqual([segment["lines"] for segment in MetadataDumpReader.read_checksum(path)], [2, 1])
+        self.assertTrue(MetadataDumpReader(path).verify_checksum())
+
+        with open(path, "r+") as f:
+            f.write('{"datamart_id": 10001')
+        with self.assertRaises(ValueError):
+            MetadataDumpReader(path).verify_checksum()
+
+    @Utils.test_print
+    def test_read_legacy(self):
+        path = os.path.join(self.tmp_dir, "metadata.out")
+        with open(path, "w") as f:
+            f.write('10000\n{"title": "a"}\n20000\n{"title": "b"}\n')
+        self.assertEqual(list(MetadataDumpReader(path)), [{"datamart_id": 10000, "title": "a"},
+                                                          {"datamart_id": 20000, "title": "b"}])
+
+    @Utils.test_print
+    def test_make_documents(self):
+        documents = list(IndexManager.make_documents(self.metadata_lst, index="fake"))
+        self.assertEqual(documents[1], {"_index": "fake", "_type": "_doc", "_id": 20000,
+                                        "_source": self.metadata_lst[1]})
+
+    @Utils.test_print
+    def test_make_documents_separate_variables(self):
+        minhash = {"signature": [1, 2], "size": 2, "lsh": ["00_a"]}
+        metadata = {"datamart_id": 10000, "title": "a", "variables": [
+            {"datamart_id": 10001, "name": "x", "semantic_type": [], "named_entity": ["b", "c"], "minhash": minhash}]}
+        documents = list(IndexManager.make_documents([metadata], index="fake", variable_index="fake_variables"))
+        self.assertEqual(documents, [
+            {"_index": "fake_variables", "_type": "_doc", "_id": 10001,
+             "_source": {"datamart_id": 10001, "name": "x", "semantic_type": [], "named_entity": ["b", "c"],
+                         "minhash": minhash, "dataset": {"datamart_id": 10000, "title": "a"}}},
+            {"_index": "fake", "_type": "_doc", "_id": 10000,
+             "_source": {"datamart_id": 10000, "title": "a", "variables": [
+                 {"datamart_id": 10001, "name": "x", "semantic_type": [], "minhash": minhash}]}}
+        ])
+
+    @Utils.test_print
+    def test_create_doc_bulk(self):
+        class FakeIndices(object):
+            def __init__(self):
+                self.settings = {"refresh_interval": "5s", "number_of_replicas": "1"}
+                self.history = []
+
+            def get_settings(self, index):
+                return {"fake_v1": {"settings": {"index": dict(self.settings)}}}
+
+            def put_settings(self, index, body):
+                self.history.append(dict(body["index"]))
+                self.settings.update(body["index"])
+
+            def refresh(self, index):
+                pass
+
+        class FakeES(object):
+            def __init__(self):
+                self.indices = FakeIndices()
+                self.transport = type("FakeTransport", (object,), {"serializer": JSONSerializer()})
+                self.refresh_intervals = []
+
+            def bulk(self, body, **kwargs):
+                self.refresh_intervals.append(self.indices.settings["refresh_interval"])
+                actions = [json.loads(line) for line in body.strip().split("\n")[::2]]
+                return {"errors": True, "items": [{"index": {"_id": action["index"]["_id"],
+                                                             "status": 400 if action["index"]["_id"] == 20000
+                                                             else 201}} for action in actions]}
+
+        path = os.path.join(self.tmp_dir, "metadata.ndjson")
+        with MetadataDumpWriter(path) as writer:
+            for metadata in self.metadata_lst:
+                writer.write(metadata)
+
+        im = IndexManager(es_host="localhost")
+        im.es = FakeES()
+        report = im.create_doc_bulk(file=path, index="fake", chunk_size=1)
+        self.assertEqual((report["docs"], report["failed"], len(report["errors"])), (2, 1, 1))
+        self.assertEqual(im.es.refresh_intervals, ["-1", "-1"])
+        self.assertEqual(im.es.indices.settings, {"refresh_interval": "5s", "number_of_replicas": "1"})
+
+        with open(path, "a") as f:
+            f.write('{"datamart_id": 30000}\n')
+        im.es = FakeES()
+        with self.assertRaises(ValueError):
+            im.create_doc_bulk(file=path, index="fake", chunk_size=1)
+        self.assertEqual(im.es.refresh_intervals, [])
+        self.assertEqual(im.es.indices.history, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from datamart.utilities.minhash import MinHash
+import pandas as pd
+from datamart.utilities.utils import Utils
+
+
+class TestMinHash(unittest.TestCase):
+    def setUp(self):
+        self.minhash = MinHash()
+        self.column = pd.Series(["city{}".format(idx) for idx in range(1000)])
+
+    @Utils.test_print
+    def test_signature(self):
+        signature, size = self.minhash.signature(pd.concat([self.column, self.column.str.upper() + " ", pd.Series([None])]))
+        self.assertEqual(size, 1000)
+        self.assertEqual(len(signature), 128)
+        self.assertEqual((signature, size), self.minhash.signature(self.column))
+        self.assertEqual(self.minhash.signature(pd.Series([None, ""])), ([], 0))
+
+    @Utils.test_print
+    def test_lsh(self):
+        signature, _ = self.minhash.signature(self.column)
+        other, _ = self.minhash.signature(self.column[:900])
+        unrelated, _ = self.minhash.signature(pd.Series(["town{}".format(idx) for idx in range(1000)]))
+        bands = self.minhash.lsh(signature)
+        self.assertEqual(len(bands), 64)
+        self.assertTrue(set(bands) & set(self.minhash.lsh(other)))
+        self.assertFalse(set(bands) & set(self.minhash.lsh(unrelated)))
+
+    @Utils.test_print
+    def test_containment(self):
+        query, query_size = self.minhash.signature(self.column[:200])
+        other, other_size = self.minhash.signature(self.column[50:350])
+        self.assertAlmostEqual(self.minhash.containment(query, query_size, other, other_size), 0.75, delta=0.15)
+        self.assertEqual(self.minhash.containment([], 0, other, other_size), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
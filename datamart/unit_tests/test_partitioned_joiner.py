@@ -0,0 +1,74 @@
+import unittest
+from datamart.joiners.joiner_base import JoinerPrepare, DefaultJoiner
+from datamart.joiners.partitioned_joiner import PartitionedJoiner
+import pandas as pd
+import numpy as np
+import tempfile
+import shutil
+import os
+from pandas.testing import assert_frame_equal
+from datamart.utilities.utils import Utils
+
+
+class TestPartitionedJoiner(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.joiner = PartitionedJoiner(n_partitions=4, chunk_size=7, tmp_dir=self.tmp_dir)
+        self.left_df = pd.DataFrame(data={
+            'city': ["los angeles", "New york", "Shanghai", "SAFDA", "manchester"] * 5,
+            'year': list(range(2000, 2025))
+        })
+        self.right_df = pd.DataFrame(data={
+            'a_city': ["Los Angeles", "new york", "shanghai", "manchester"] * 10,
+            'extra': list(range(40)),
+            'z_year': ["20{:02d}".format(i % 30) for i in range(40)]
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @Utils.test_print
+    def test_joiner_prepare(self):
+        self.assertIsInstance(JoinerPrepare.prepare_joiner(joiner="partitioned"), PartitionedJoiner)
+
+    @Utils.test_print
+    def test_join_same_as_default(self):
+        expected = DefaultJoiner.join(left_df=self.left_df, right_df=self.right_df,
+                                      left_columns=[[0], [1]], right_columns=[[0], [2]])
+        assert_frame_equal(self.joiner.join(left_df=self.left_df, right_df=self.right_df,
+                                            left_columns=[[0], [1]], right_columns=[[0], [2]]), expected)
+        self.assertListEqual(os.listdir(self.tmp_dir), [])
+
+    @Utils.test_print
+    def test_join_chunks(self):
+        expected = DefaultJoiner.join(left_df=self.left_df, right_df=self.right_df,
+                                      left_columns=[[0]], right_columns=[[0]])
+        right_chunks = (self.right_df.iloc[start:start + 9] for start in range(0, 40, 9))
+        partitions = list(self.joiner.join_partitions(left_df=self.left_df, right_df=right_chunks,
+                                                      left_columns=[[0]], right_columns=[[0]]))
+        self.assertEqual(sum(partition.shape[0] for partition in partitions), expected.shape[0])
+        self.assertListEqual(list(partitions[0].columns), list(expected.columns))
+        joined = pd.concat(partitions).sort_values(by=["year", "extra"]).reset_index(drop=True)
+        assert_frame_equal(joined, expected.sort_values(by=["year", "extra"]).reset_index(drop=True))
+
+    @Utils.test_print
+    def test_join_skewed_partitions(self):
+        joiner = PartitionedJoiner(n_partitions=8, chunk_size=7, tmp_dir=self.tmp_dir)
+        right_df = self.right_df.iloc[:1]
+        expected = DefaultJoiner.join(left_df=self.left_df, right_df=right_df,
+                                      left_columns=[[0]], right_columns=[[0]])
+        assert_frame_equal(joiner.join(left_df=self.left_df, right_df=right_df,
+                                       left_columns=[[0]], right_columns=[[0]]), expected, check_dtype=False)
+
+    @Utils.test_print
+    def test_join_empty_sides(self):
+        empty_right = self.right_df.iloc[:0]
+        expected = DefaultJoiner.join(left_df=self.left_df, right_df=empty_right,
+                                      left_columns=[[0]], right_columns=[[0]])
+        assert_frame_equal(self.joiner.join(left_df=self.left_df, right_df=empty_right,
+                                            left_columns=[[0]], right_columns=[[0]]), expected, check_dtype=False)
+
+        joined = self.joiner.join(left_df=self.left_df.iloc[:0], right_df=self.right_df,
+                                  left_columns=[[0]], right_columns=[[0]])
+        self.assertListEqual(list(joined.columns), ["city", "year", "extra", "z_year"])
+        self.assertEqual(joined.shape[0], 0)
@@ -0,0 +1,109 @@
+from datamart.utilities.utils import Utils
+from datamart.es_managers.query_cache import QueryCache
+from datamart.es_managers.query_manager import QueryManager
+import unittest
+import tempfile
+import shutil
+import os
+import time
+
+
+class FakeES(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, **kwargs):
+        self.calls += 1
+        return {"hits": {"total": 1, "hits": [{"_source": {"datamart_id": 10000}}]}}
+
+
+class TestQueryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.original_generation_dir = QueryCache.GENERATION_DIR
+        QueryCache.GENERATION_DIR = os.path.join(self.tmp_dir, "generation")
+        self.result = [{"_source": {"datamart_id": 10000}}]
+
+    def tearDown(self):
+        QueryCache.GENERATION_DIR = self.original_generation_dir
+        shutil.rmtree(self.tmp_dir)
+
+    @Utils.test_print
+    def test_make_key(self):
+        key1 = QueryCache.make_key("datamart", '{"query": {"term": {"a": 1}}, "size": 1}', size=10)
+        key2 = QueryCache.make_key("datamart", {"size": 1, "query": {"term": {"a": 1}}}, size=10)
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, QueryCache.make_key("datamart", '{"query": {"term": {"a": 1}}}', size=11))
+        self.assertNotEqual(key1, QueryCache.make_key("other", '{"query": {"term": {"a": 1}}}', size=10))
+
+    @Utils.test_print
+    def test_lru(self):
+        cache = QueryCache(max_size=2)
+        for i in range(3):
+            cache.put(str(i), index="datamart", result=self.result)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("0", index="datamart"), (False, None))
+        self.assertEqual(cache.get("2", index="datamart"), (True, self.result))
+
+    @Utils.test_print
+    def test_invalidation(self):
+        cache = QueryCache()
+        cache.put("key", index="datamart", result=self.result)
+        QueryCache.bump_generation("other")
+        self.assertEqual(cache.get("key", index="datamart"), (True, self.result))
+        QueryCache.bump_generation(["datamart"])
+        self.assertEqual(cache.get("key", index="datamart"), (False, None))
+
+    @Utils.test_print
+    def test_bump_without_cache(self):
+        QueryCache.bump_generation("datamart")
+        QueryCache(max_size=0)
+        QueryCache.bump_generation("datamart")
+        self.assertFalse(QueryCache.enabled())
+        self.assertFalse(os.path.exists(QueryCache.GENERATION_DIR))
+        QueryCache()
+        QueryCache.bump_generation("datamart")
+        self.assertTrue(QueryCache.enabled())
+        self.assertNotEqual(QueryCache.generation("datamart"), "")
+
+    @Utils.test_print
+    def test_ttl(self):
+        cache = QueryCache(ttl=0.05, cache_dir=os.path.join(self.tmp_dir, "cache"))
+        cache.put("key", index="datamart", result=self.result)
+        self.assertEqual(cache.get("key", index="datamart"), (True, self.result))
+        time.sleep(0.1)
+        self.assertEqual(cache.get("key", index="datamart"), (False, None))
+
+        cache = QueryCache(ttl=None)
+        cache.put("key", index="datamart", result=self.result)
+        time.sleep(0.1)
+        self.assertEqual(cache.get("key", index="datamart"), (True, self.result))
+
+    @Utils.test_print
+    def test_disk_cache(self):
+        cache_dir = os.path.join(self.tmp_dir, "cache")
+        QueryCache(cache_dir=cache_dir).put("key", index="datamart", result=None)
+        self.assertEqual(QueryCache(cache_dir=cache_dir).get("key", index="datamart"), (True, None))
+        QueryCache.bump_generation("datamart")
+        self.assertEqual(QueryCache(cache_dir=cache_dir).get("key", index="datamart"), (False, None))
+
+    @Utils.test_print
+    def test_query_manager_search(self):
+        qm = QueryManager(es_host="localhost", es_port=9200, es_index="datamart", query_cache=QueryCache())
+        qm.es = FakeES()
+        self.assertEqual(qm.search(body=qm.match_all()), self.result)
+        self.assertEqual(qm.search(body=qm.match_all()), self.result)
+        self.assertEqual(qm.es.calls, 1)
+        QueryCache.bump_generation("datamart")
+        qm.search(body=qm.match_all())
+        self.assertEqual(qm.es.calls, 2)
+
+    @Utils.test_print
+    def test_query_manager_no_cache(self):
+        qm = QueryManager(es_host="localhost", es_port=9200, es_index="datamart")
+        qm.es = FakeES()
+        qm.search(body=qm.match_all())
+        qm.search(body=qm.match_all())
+        self.assertEqual(qm.es.calls, 2)
@@ -118,6 +118,103 @@ class TestQueryManager(unittest.TestCase):
     @Utils.test_print
     def test_match_temporal_coverage(self):
         query = QueryManager.match_temporal_coverage(start="2018-09-23", end="2018-09-30T00:00:00")
+        expected = {
+            "nested": {
+                "path": "variables",
+                "inner_hits": {"_source": ["temporal_coverage"]},
+                "query": {
+                    "range": {
+                        "variables.date_range": {
+                            "gte": "2018-09-23T00:00:00",
+                            "lte": "2018-09-30T00:00:00",
+                            "relation": "contains",
+                            "format": "yyyy-MM-dd'T'HH:mm:ss"
+                        }
+                    }
+                }
+            }
+        }
+
+        self.assertEqual(expected, query)
+
+        # one sided queries and indices without date_range are queried on temporal_coverage
+        self.assertEqual(QueryManager.match_temporal_coverage(start="2018-09-23", end="2018-09-30T00:00:00",
+                                                              date_range=False),
+                         QueryManager.match_temporal_coverage_nested(start="2018-09-23", end="2018-09-30T00:00:00"))
+        self.assertEqual(QueryManager.match_temporal_coverage(end="2018-09-30", relation="intersects"),
+                         QueryManager.match_temporal_coverage_nested(end="2018-09-30"))
+
+    @Utils.test_print
+    def test_match_temporal_coverage_invalid(self):
+        query = QueryManager.match_temporal_coverage(start="2222s", end="2018-09-30T00:00:00", relation="intersects")
+        self.assertEqual(query, QueryManager.match_temporal_coverage_nested(end="2018-09-30T00:00:00"))
+        self.assertIsNone(QueryManager.match_temporal_coverage(start="2222s"))
+
+    @Utils.test_print
+    def test_match_temporal_coverage_relations(self):
+        query = QueryManager.match_temporal_coverage_nested(start="2018-09-23", end="2018-09-30",
+                                                            relation="intersects")
+        must = query["nested"]["query"]["bool"]["must"]
+        self.assertEqual(must[0]["range"]["variables.temporal_coverage.start"]["lte"], "2018-09-30T00:00:00")
+        self.assertEqual(must[1]["range"]["variables.temporal_coverage.end"]["gte"], "2018-09-23T00:00:00")
+
+        query = QueryManager.match_temporal_coverage_nested(start="2018-09-23", end="2018-09-30", relation="within")
+        must = query["nested"]["query"]["bool"]["must"]
+        self.assertEqual(must[0]["range"]["variables.temporal_coverage.start"]["gte"], "2018-09-23T00:00:00")
+        self.assertEqual(must[1]["range"]["variables.temporal_coverage.end"]["lte"], "2018-09-30T00:00:00")
+
+    @Utils.test_print
+    def test_variable_index_exists(self):
+        class FakeIndices(object):
+            calls = 0
+            exists_ = False
+
+            def exists(self, index):
+                self.calls += 1
+                return self.exists_
+
+        class FakeES(object):
+            indices = FakeIndices()
+
+        qm = QueryManager(es_host="localhost", es_port=9200, es_index="fake")
+        qm.es = FakeES()
+        self.assertFalse(qm.variable_index_exists())
+        self.assertIsNone(qm.search_with_variables(queries=[], variable_queries=[("col", {})]))
+        self.assertEqual(qm.es.indices.calls, 1)
+
+        qm.INDEX_CHECK_TTL = 0
+        qm.es.indices.exists_ = True
+        self.assertTrue(qm.variable_index_exists())
+        qm.es.indices.exists_ = False
+        self.assertTrue(qm.variable_index_exists())
+        self.assertEqual(qm.es.indices.calls, 2)
+
+    @Utils.test_print
+    def test_date_range_indexed(self):
+        class FakeIndices(object):
+            calls = 0
+            mappings = {"fake_v1": {"mappings": {}}}
+
+            def get_field_mapping(self, index, fields):
+                self.calls += 1
+                return self.mappings
+
+        class FakeES(object):
+            indices = FakeIndices()
+
+        qm = QueryManager(es_host="localhost", es_port=9200, es_index="fake")
+        qm.es = FakeES()
+        self.assertFalse(qm.date_range_indexed())
+        qm.es.indices.mappings = {"fake_v2": {"mappings": {"_doc": {"variables.date_range": {}}}}}
+        self.assertFalse(qm.date_range_indexed())
+        self.assertEqual(qm.es.indices.calls, 1)
+
+        qm.INDEX_CHECK_TTL = 0
+        self.assertTrue(qm.date_range_indexed())
+
+    @Utils.test_print
+    def test_match_temporal_coverage_nested(self):
+        query = QueryManager.match_temporal_coverage_nested(start="2018-09-23", end="2018-09-30T00:00:00")
         expected = {
             "nested": {
                 "path": "variables",
@@ -150,8 +247,8 @@ class TestQueryManager(unittest.TestCase):
         self.assertEqual(expected, query)
 
     @Utils.test_print
-    def test_match_temporal_coverage_invalid(self):
-        query = QueryManager.match_temporal_coverage(start="2222s", end="2018-09-30T00:00:00")
+    def test_match_temporal_coverage_nested_invalid(self):
+        query = QueryManager.match_temporal_coverage_nested(start="2222s", end="2018-09-30T00:00:00")
         expected = {
             "nested": {
                 "path": "variables",
@@ -333,3 +430,112 @@ class TestQueryManager(unittest.TestCase):
                                 "minimum_should_match": 1}}}}]}}}
 
         self.assertEqual(json.dumps(expected), query)
+
+    @Utils.test_print
+    def test_form_intersection_query(self):
+        query = QueryManager.form_intersection_query([
+            ("city", QueryManager.match_some_terms_from_variables_array(terms=["los angeles"])),
+            ("state", QueryManager.match_key_value_pairs(key_value_pairs=[("variables.named_entity", "california")])),
+            ("id", QueryManager.match_global_datamart_id(datamart_id=10000))
+        ])
+        must = json.loads(query)["query"]["bool"]["must"]
+        self.assertEqual(len(must), 3)
+        self.assertEqual(must[0]["nested"]["inner_hits"]["name"], "city")
+        self.assertEqual(must[0]["nested"]["inner_hits"]["_source"], ["named_entity"])
+        self.assertEqual(must[1]["bool"]["must"][0]["nested"]["inner_hits"]["name"], "state")
+        self.assertEqual(must[2], {"term": {"datamart_id": 10000}})
+
+    @Utils.test_print
+    def test_match_lsh_bands(self):
+        query = QueryManager.match_lsh_bands(bands=["00_a", "01_b"], minimum_should_match=1)
+        expected = {
+            "nested": {
+                "path": "variables",
+                "inner_hits": {"_source": ["name", "minhash.signature", "minhash.size"], "size": 100},
+                "query": {
+                    "bool": {
+                        "should": [
+                            {"term": {"variables.minhash.lsh": "00_a"}},
+                            {"term": {"variables.minhash.lsh": "01_b"}}
+                        ],
+                        "minimum_should_match": 1
+                    }
+                }
+            }
+        }
+
+        self.assertEqual(expected, query)
+
+    @Utils.test_print
+    def test_match_some_terms_from_variables(self):
+        query = QueryManager.match_some_terms_from_variables(terms=["los angeles", "NEW YORK"])
+        expected = {
+            "bool": {
+                "should": [
+                    {"match_phrase": {"named_entity": {"query": "los angeles", "_name": "los angeles"}}},
+                    {"match_phrase": {"named_entity": {"query": "new york", "_name": "new york"}}}
+                ],
+                "minimum_should_match": 1
+            }
+        }
+        self.assertEqual(expected, query)
+
+    @Utils.test_print
+    def test_group_variable_hits(self):
+        variable_hits = [
+            {"_score": 2.0, "_source": {"datamart_id": 10002, "named_entity": ["a"], "dataset": {"datamart_id": 10000}},
+             "matched_queries": ["a"], "highlight": {"named_entity": ["a"]}},
+            {"_score": 3.0, "_source": {"datamart_id": 20001, "dataset": {"datamart_id": 20000}},
+             "matched_queries": ["b"], "highlight": {"named_entity": ["b"]}},
+            {"_score": 2.5, "_source": {"datamart_id": 10003, "named_entity": ["c"], "dataset": {"datamart_id": 10000}},
+             "matched_queries": ["c"], "highlight": {"named_entity": ["c"]}},
+            {"_score": 1.0, "_source": {"datamart_id": 30001, "dataset": {"datamart_id": 30000}}}
+        ]
+        summary = {"title": "x", "variables": [{"datamart_id": 10001}, {"datamart_id": 10002},
+                                               {"datamart_id": 10003}]}
+        dataset_docs = [{"_index": "fake_v1", "_id": "10000", "_source": summary},
+                        {"_index": "fake_v1", "_id": "20000", "_source": {"title": "y"}}]
+        results = QueryManager.group_variable_hits(variable_hits, dataset_docs)
+        self.assertEqual([result["_id"] for result in results], ["20000", "10000"])
+        self.assertEqual([result["_score"] for result in results], [3.0, 2.5])
+        self.assertEqual(Utils.get_inner_hits_info(results[1]), [
+            {"offset": 1, "matched_queries": ["a"], "highlight": {"variables.named_entity": ["a"]}},
+            {"offset": 2, "matched_queries": ["c"], "highlight": {"variables.named_entity": ["c"]}}
+        ])
+        self.assertEqual(Utils.get_inner_hits_info(results[0])[0]["offset"], 0)
+        self.assertEqual(results[1]["_source"]["variables"], [{"datamart_id": 10001},
+                                                              {"datamart_id": 10002, "named_entity": ["a"]},
+                                                              {"datamart_id": 10003, "named_entity": ["c"]}])
+        self.assertEqual(summary["variables"][1], {"datamart_id": 10002})
+
+    @Utils.test_print
+    def test_search_with_variables(self):
+        variables = {
+            "city": [{"_score": 2.0, "_source": {"datamart_id": 10001, "dataset": {"datamart_id": 10000}}},
+                     {"_score": 1.0, "_source": {"datamart_id": 20001, "dataset": {"datamart_id": 20000}}}],
+            "state": [{"_score": 1.5, "_source": {"datamart_id": 10002, "dataset": {"datamart_id": 10000}}}]
+        }
+
+        class FakeIndices(object):
+            def exists(self, index):
+                return True
+
+        class FakeES(object):
+            indices = FakeIndices()
+
+            def search(self, index, body, **kwargs):
+                key = next(iter(json.loads(body)["query"]))
+                return {"hits": {"total": len(variables[key]), "hits": variables[key]}}
+
+            def mget(self, index, body, **kwargs):
+                return {"docs": [{"_index": "fake_v1", "_id": str(datamart_id), "found": True,
+                                  "_source": {"variables": [{}, {}]}} for datamart_id in body["ids"]]}
+
+        qm = QueryManager(es_host="localhost", es_port=9200, es_index="fake")
+        qm.es = FakeES()
+        results = qm.search_with_variables(queries=[], variable_queries=[("city_col", {"city": {}}),
+                                                                         ("state_col", {"state": {}})])
+        self.assertEqual([result["_id"] for result in results], ["10000"])
+        self.assertEqual(results[0]["_score"], 3.5)
+        self.assertEqual(Utils.get_inner_hits_info(results[0], nested_key="city_col")[0]["offset"], 0)
+        self.assertEqual(Utils.get_inner_hits_info(results[0], nested_key="state_col")[0]["offset"], 1)
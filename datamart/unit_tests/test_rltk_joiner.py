@@ -0,0 +1,94 @@
+import unittest
+from datamart.joiners.joiner_base import JoinerPrepare
+from datamart.joiners.rltk_joiner import RLTKJoiner
+import pandas as pd
+import numpy as np
+from pandas.testing import assert_frame_equal
+from datamart.utilities.utils import Utils
+
+
+class TestRLTKJoiner(unittest.TestCase):
+    def setUp(self):
+        self.left_df = pd.DataFrame(data={
+            'city': ["Los Angeles", "New York", "Shanghai", "Nowhere", "los angeles"],
+            'value': [1, 2, 3, 4, 5]
+        })
+        self.right_df = pd.DataFrame(data={
+            'a_city': ["los angeles, CA", "new york city", "Shang hai", "LA"],
+            'population': [4, 8, 24, 1]
+        })
+
+    @Utils.test_print
+    def test_joiner_prepare(self):
+        self.assertIsInstance(JoinerPrepare.prepare_joiner(joiner="rltk"), RLTKJoiner)
+
+    @Utils.test_print
+    def test_token_blocking_join(self):
+        joined = RLTKJoiner().join(left_df=self.left_df, right_df=self.right_df,
+                                   left_columns=[[0]], right_columns=[[0]])
+        self.assertListEqual(joined["population"].tolist()[:2], [4, 8])
+        self.assertTrue(np.isnan(joined["population"].tolist()[2]))
+        self.assertEqual(joined["population"].tolist()[4], 4)
+        self.assertAlmostEqual(joined[RLTKJoiner.SCORE_COLUMN][0], 11 / 14)
+        self.assertTrue(joined[RLTKJoiner.SCORE_COLUMN][[2, 3]].isnull().all())
+
+    @Utils.test_print
+    def test_ngram_blocking_join(self):
+        joined = RLTKJoiner(blocking="ngram").join(left_df=self.left_df, right_df=self.right_df,
+                                                   left_columns=[[0]], right_columns=[[0]])
+        self.assertListEqual(joined["population"].tolist()[:3], [4, 8, 24])
+
+    @Utils.test_print
+    def test_normalize(self):
+        normalized = RLTKJoiner.normalize(pd.Series(["São Paulo", "Sao  Paulo!", "東京都", "Ｔｏｋｙｏ", np.nan, None]))
+        self.assertListEqual(normalized.tolist()[:4], ["sao paulo", "sao paulo", "東京都", "tokyo"])
+        self.assertTrue(normalized[[4, 5]].isnull().all())
+
+    @Utils.test_print
+    def test_unicode_and_null_keys_join(self):
+        left_df = pd.DataFrame(data={'city': ["São Paulo", "東京", np.nan], 'value': [1, 2, 3]})
+        right_df = pd.DataFrame(data={'a_city': ["Sao Paulo", "大阪", "東京", np.nan], 'population': [12, 19, 14, 0]})
+        joined = RLTKJoiner().join(left_df=left_df, right_df=right_df, left_columns=[[0]], right_columns=[[0]])
+        self.assertEqual(len(joined), 3)
+        self.assertListEqual(joined["population"].tolist()[:2], [12, 14])
+        self.assertTrue(np.isnan(joined["population"][2]))
+        self.assertTrue(np.isnan(joined[RLTKJoiner.SCORE_COLUMN][2]))
+
+    @Utils.test_print
+    def test_empty_right(self):
+        right_df = pd.DataFrame(data={'a_city': [], 'population': []}, columns=['a_city', 'population'])
+        joined = RLTKJoiner().join(left_df=self.left_df, right_df=right_df, left_columns=[[0]], right_columns=[[0]])
+        self.assertListEqual(joined["value"].tolist(), [1, 2, 3, 4, 5])
+        self.assertTrue(joined[["population", RLTKJoiner.SCORE_COLUMN]].isnull().all().all())
+
+    @Utils.test_print
+    def test_null_right_keys(self):
+        right_df = pd.DataFrame(data={'a_city': [None, np.nan], 'population': [4, 8]}, columns=['a_city', 'population'])
+        joined = RLTKJoiner().join(left_df=self.left_df, right_df=right_df, left_columns=[[0]], right_columns=[[0]])
+        self.assertEqual(joined.shape[0], 5)
+        self.assertTrue(joined["population"].isnull().all())
+
+    @Utils.test_print
+    def test_empty_left(self):
+        left_df = pd.DataFrame(data={'city': [], 'value': []}, columns=['city', 'value'])
+        joined = RLTKJoiner().join(left_df=left_df, right_df=self.right_df, left_columns=[[0]], right_columns=[[0]])
+        self.assertListEqual(list(joined.columns), ['city', 'value', RLTKJoiner.SCORE_COLUMN, 'a_city', 'population'])
+        self.assertEqual(joined.shape[0], 0)
+
+    @Utils.test_print
+    def test_max_block_size(self):
+        candidates = RLTKJoiner(max_block_size=1).candidate_pairs(
+            left_values=np.array(["los angeles", "new york"]),
+            right_values=np.array(["los angeles ca", "los gatos", "new york city"]))
+        expected = pd.DataFrame({"left": [0, 1], "right": [0, 2]})
+        assert_frame_equal(candidates, expected)
+
+    @Utils.test_print
+    def test_jaccard(self):
+        joiner = RLTKJoiner()
+        gram_ids = dict()
+        left_grams, left_offsets = joiner._qgram_sets(np.array(["abc", "xyz"]), gram_ids)
+        right_grams, right_offsets = joiner._qgram_sets(np.array(["abc", "abd"]), gram_ids)
+        scores = joiner.jaccard(left_grams, left_offsets, np.array([0, 0, 1]),
+                                right_grams, right_offsets, np.array([0, 1, 0]))
+        np.testing.assert_allclose(scores, [1.0, 1 / 5, 0.0])
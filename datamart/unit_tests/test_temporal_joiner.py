@@ -0,0 +1,83 @@
+import unittest
+from datamart.joiners.joiner_base import JoinerPrepare
+from datamart.joiners.temporal_joiner import TemporalJoiner
+import pandas as pd
+import numpy as np
+from pandas.testing import assert_frame_equal
+from datamart.utilities.utils import Utils
+
+
+class TestTemporalJoiner(unittest.TestCase):
+    def setUp(self):
+        self.joiner = TemporalJoiner()
+        dates = pd.date_range("2018-01-01", "2019-12-31", freq="D").strftime("%Y-%m-%d")
+        self.daily_df = pd.DataFrame(data={
+            'date': np.tile(dates, 2),
+            'city': ["LA"] * len(dates) + ["NY"] * len(dates),
+            'temperature': [1.0] * len(dates) + [3.0] * len(dates)
+        })
+        self.daily_df.loc[self.daily_df["date"] >= "2019-01-01", "temperature"] += 1
+        self.yearly_df = pd.DataFrame(data={
+            'city': ["la", "ny", "la", "la"],
+            'year': [2018, 2018, 2019, 2020]
+        })
+        self.yearly_metadata = {"variables": [{}, {"temporal_coverage": {"start": "2018", "end": "2020"}}]}
+
+    @Utils.test_print
+    def test_joiner_prepare(self):
+        self.assertIsInstance(JoinerPrepare.prepare_joiner(joiner="temporal"), TemporalJoiner)
+
+    @Utils.test_print
+    def test_detect_granularity(self):
+        self.assertEqual(self.joiner.detect_granularity(self.joiner.parse_dates(self.yearly_df["year"])), "year")
+        self.assertEqual(self.joiner.detect_granularity(self.joiner.parse_dates(self.daily_df["date"])), "day")
+        self.assertEqual(self.joiner.detect_granularity(pd.to_datetime(pd.Series(["2018-01", "2018-02"]))),
+                         "month")
+
+    @Utils.test_print
+    def test_join_daily_to_yearly(self):
+        expected = pd.DataFrame(data={
+            'city': ["la", "ny", "la", "la"],
+            'year': [2018, 2018, 2019, 2020],
+            'temperature': [1.0, 3.0, 2.0, np.nan]
+        })
+        assert_frame_equal(self.joiner.join(left_df=self.yearly_df, right_df=self.daily_df,
+                                            left_columns=[[0], [1]], right_columns=[[1], [0]],
+                                            left_metadata=self.yearly_metadata), expected)
+
+    @Utils.test_print
+    def test_join_with_tolerance(self):
+        joined = TemporalJoiner(tolerance=1).join(left_df=self.yearly_df, right_df=self.daily_df,
+                                                  left_columns=[[0], [1]], right_columns=[[1], [0]],
+                                                  left_metadata=self.yearly_metadata)
+        self.assertListEqual(joined["temperature"].tolist(), [1.0, 3.0, 2.0, 2.0])
+
+    @Utils.test_print
+    def test_metadata_granularity(self):
+        metadata = {"variables": [{"semantic_type": ["https://metadata.datadrivendiscovery.org/types/Time",
+                                                     "http://schema.org/Date"]}, {}]}
+        self.assertEqual(self.joiner.metadata_granularity(metadata, 0), "day")
+        self.assertIsNone(self.joiner.metadata_granularity(metadata, 1))
+        self.assertIsNone(self.joiner.metadata_granularity(None, 0))
+
+        # first days of the year declared as dates are not taken as years
+        right_df = pd.DataFrame(data={'date': ["2018-01-01", "2019-01-01"], 'temperature': [1.0, 2.0]})
+        left_df = pd.DataFrame(data={'date': ["2018-01-01", "2018-03-01"]})
+        joined = self.joiner.join(left_df=left_df, right_df=right_df, left_columns=[[0]], right_columns=[[0]],
+                                  right_metadata=metadata)
+        self.assertListEqual(joined["temperature"].tolist()[:1], [1.0])
+        self.assertTrue(np.isnan(joined["temperature"][1]))
+
+    @Utils.test_print
+    def test_join_empty_right(self):
+        expected = self.yearly_df.assign(temperature=np.nan)
+        for right_df in [self.daily_df.iloc[:0], self.daily_df.assign(date="not a date")]:
+            joined = self.joiner.join(left_df=self.yearly_df, right_df=right_df,
+                                      left_columns=[[0], [1]], right_columns=[[1], [0]],
+                                      left_metadata=self.yearly_metadata)
+            assert_frame_equal(joined, expected, check_dtype=False)
+
+    @Utils.test_print
+    def test_no_temporal_column(self):
+        with self.assertRaises(ValueError):
+            self.joiner.join(left_df=self.yearly_df, right_df=self.daily_df, left_columns=[[0]], right_columns=[[1]])
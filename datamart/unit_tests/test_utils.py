@@ -1,8 +1,10 @@
 from datamart.utilities.utils import Utils
 import unittest, os, json
+import warnings
 from datamart.materializers.materializer_base import MaterializerBase
 from datamart.materializers.noaa_materializer import NoaaMaterializer
 import pandas as pd
+import numpy as np
 from pandas.util.testing import assert_frame_equal
 
 
@@ -200,6 +202,33 @@ class TestUtils(unittest.TestCase):
             df=self.df
         ), expected)
 
+    @Utils.test_print
+    def test_infer_object_columns(self):
+        df = pd.DataFrame({"a": pd.Series([1, 2], dtype=object), "b": ["x", "y"], "c": [1.5, 2.5]},
+                          columns=["a", "b", "c"])
+        df = Utils.infer_object_columns(df)
+        self.assertEqual(df.dtypes.tolist(), [np.dtype("int64"), np.dtype(object), np.dtype("float64")])
+
+    @Utils.test_print
+    def test_infer_object_columns_slice(self):
+        df = pd.DataFrame({"a": pd.Series([1, 2, 3], dtype=object), "b": ["x", "y", "z"], "c": [1.5, 2.5, 3.5]},
+                          columns=["a", "b", "c"])
+        sliced = df.iloc[:, [0, 2]]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            inferred = Utils.infer_object_columns(sliced)
+        self.assertEqual(inferred.dtypes.tolist(), [np.dtype("int64"), np.dtype("float64")])
+        self.assertEqual(sliced.dtypes.tolist(), [np.dtype(object), np.dtype("float64")])
+        self.assertEqual(df.dtypes.tolist(), [np.dtype(object), np.dtype(object), np.dtype("float64")])
+        unchanged = df.iloc[:, [1, 2]]
+        self.assertIs(Utils.infer_object_columns(unchanged), unchanged)
+
+    @Utils.test_print
+    def test_peak_memory(self):
+        result, peak = Utils.peak_memory(lambda n: np.ones(n).sum(), 10 ** 6)
+        self.assertEqual(result, 10 ** 6)
+        self.assertGreaterEqual(peak, 8 * 10 ** 6)
+
     @Utils.test_print
     def test_get_dataset(self):
         fake_matadata = {
@@ -295,3 +324,12 @@ class TestUtils(unittest.TestCase):
             'keywords': ['Age', 'Date', 'Name']
         }
         self.assertEqual(Utils.generate_metadata_from_dataframe(data=self.df), expected)
+
+    @Utils.test_print
+    def test_generate_metadata_from_dataframe_columns(self):
+        df = self.df[["Age", "Date", "Name"]]
+        metadata = Utils.generate_metadata_from_dataframe(data=df, columns=[1])
+        self.assertEqual(metadata["variables"][0], {'datamart_id': None, 'semantic_type': [], 'name': 'Age'})
+        self.assertEqual(metadata["variables"][1]["temporal_coverage"],
+                         {'start': '2014-02-23T00:00:00', 'end': '2023-02-13T00:00:00'})
+        self.assertNotIn("named_entity", metadata["variables"][2])
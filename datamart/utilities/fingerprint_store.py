@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import tempfile
+import typing
+
+
+class FingerprintStore(object):
+    """Fingerprints of indexed description and data files, with the datamart_id they were indexed as.
+
+    Stored as one json file, {description path: {"fingerprint": str, "datamart_id": int}}. A description fingerprint
+    is the sha1 of its json content, plus size and mtime of its data file if any, or a sha1 of the data content when
+    hash_data is set, which also catches rewrites keeping size and mtime.
+
+    """
+
+    def __init__(self, path: str, hash_data: bool = False) -> None:
+        """Init method of FingerprintStore.
+
+        Args:
+            path: path of the json file, created on first save.
+            hash_data: fingerprint data files by content instead of size and mtime.
+
+        Returns:
+
+        """
+
+        self.path = path
+        self.hash_data = hash_data
+        self.entries = dict()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+
+    def fingerprint(self, description_path: str, data_path: str = None) -> str:
+        """Fingerprint of a description file and its data file.
+
+        Args:
+            description_path: path of description json file.
+            data_path: path of data file.
+
+        Returns:
+            str
+        """
+
+        sha1 = hashlib.sha1()
+        with open(description_path, "r") as f:
+            sha1.update(json.dumps(json.load(f), sort_keys=True).encode("utf-8"))
+        if data_path and os.path.exists(data_path):
+            if self.hash_data:
+                with open(data_path, "rb") as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        sha1.update(block)
+            else:
+                stat = os.stat(data_path)
+                sha1.update("{}:{}".format(stat.st_size, stat.st_mtime_ns).encode("utf-8"))
+        return sha1.hexdigest()
+
+    def get(self, description_path: str) -> typing.Optional[dict]:
+        """Stored entry of a description file.
+
+        Args:
+            description_path: path of description json file.
+
+        Returns:
+            dict with fingerprint and datamart_id, None if never stored
+        """
+
+        return self.entries.get(self._key(description_path))
+
+    def is_unchanged(self, description_path: str, fingerprint: str) -> bool:
+        entry = self.get(description_path)
+        return entry is not None and entry["fingerprint"] == fingerprint
+
+    def set(self, description_path: str, fingerprint: str, datamart_id: int) -> None:
+        self.entries[self._key(description_path)] = {"fingerprint": fingerprint, "datamart_id": datamart_id}
+
+    def remove(self, description_path: str) -> typing.Optional[dict]:
+        return self.entries.pop(self._key(description_path), None)
+
+    def save(self) -> None:
+        """Atomically write the store to its json file.
+
+        """
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _key(description_path: str) -> str:
+        return os.path.abspath(description_path)
@@ -0,0 +1,312 @@
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import typing
+import numpy as np
+import pandas as pd
+from datamart.index_builder import IndexBuilder
+from datamart.utilities.utils import Utils
+
+
+class SyntheticDatasetGenerator(object):
+    """Generate datasets of controlled size for benchmarks, with their description json.
+
+    Columns cycle through the kinds profiled differently at indexing: named entities (text values drawn from
+    entity_cardinality distinct entities of text_length characters), floats, integers and dates.
+
+    """
+
+    KINDS = ("entity", "float", "int", "date")
+
+    def __init__(self, seed: int = 0) -> None:
+        self.seed = seed
+
+    def dataframe(self,
+                  rows: int,
+                  columns: int,
+                  text_length: int = 8,
+                  entity_cardinality: int = 100
+                  ) -> pd.DataFrame:
+        """Synthetic dataframe.
+
+        Args:
+            rows: number of rows.
+            columns: number of columns.
+            text_length: number of characters of entity values.
+            entity_cardinality: number of distinct values of entity columns.
+
+        Returns:
+            pandas DataFrame
+        """
+
+        random_state = np.random.RandomState(self.seed)
+        alphabet = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+        entities = np.array(["".join(random_state.choice(alphabet, size=text_length))
+                             for _ in range(entity_cardinality)], dtype=object)
+        dates = pd.date_range("2000-01-01", periods=max(rows, 1), freq="D").strftime("%Y-%m-%d").values
+
+        data = dict()
+        names = list()
+        for col in range(columns):
+            kind = self.KINDS[col % len(self.KINDS)]
+            name = "{}_{}".format(kind, col)
+            names.append(name)
+            if kind == "entity":
+                data[name] = entities[random_state.randint(0, entity_cardinality, size=rows)]
+            elif kind == "float":
+                data[name] = random_state.randn(rows)
+            elif kind == "int":
+                data[name] = random_state.randint(0, 1000, size=rows)
+            else:
+                data[name] = dates[:rows]
+        return pd.DataFrame(data, columns=names)
+
+    @staticmethod
+    def description(data: pd.DataFrame, title: str) -> dict:
+        """Description json of a synthetic dataframe, variables are left to the profiler.
+
+        Args:
+            data: synthetic dataframe.
+            title: title of the dataset.
+
+        Returns:
+            description dict
+        """
+
+        return {
+            "title": title,
+            "description": "synthetic dataset with {} rows and {} columns".format(*data.shape),
+            "materialization": {"python_path": "noaa_materializer", "arguments": None}
+        }
+
+    def write(self, directory: str, name: str, **size) -> typing.Tuple[str, str]:
+        """Write a synthetic dataset as <name>_description.json and <name>.csv.
+
+        Args:
+            directory: output dir.
+            name: name of the dataset.
+            size: rows, columns, text_length and entity_cardinality, see dataframe
+
+        Returns:
+            Tuple of (description path, data path)
+        """
+
+        data = self.dataframe(**size)
+        description_path = os.path.join(directory, "{}_description.json".format(name))
+        data_path = os.path.join(directory, "{}.csv".format(name))
+        with open(description_path, "w") as f:
+            json.dump(self.description(data, title=name), f)
+        data.to_csv(data_path, index=False)
+        return description_path, data_path
+
+
+class BulkSink(object):
+    """Index manager stand-in keeping documents in memory, so benchmarks measure indexing without es.
+
+    """
+
+    def __init__(self) -> None:
+        self.docs = dict()
+        self.bytes = 0
+        self._sequences = dict()
+
+    def check_exists(self, index: str) -> bool:
+        return True
+
+    def current_global_datamart_id(self, index: str) -> int:
+        return 0
+
+    def increment_sequence(self, name: str, count: int, start: int = None) -> int:
+        self._sequences[name] = self._sequences.get(name, start or 0) + count
+        return self._sequences[name]
+
+    def create_doc(self, index: str, body: typing.Union[str, dict], id: int, **kwargs) -> None:
+        document = body if isinstance(body, str) else json.dumps(body)
+        self.docs[id] = document
+        self.bytes += len(document.encode("utf-8"))
+
+    index_doc = create_doc
+
+
+class IndexingBenchmark(object):
+    """Time each stage of IndexBuilder.indexing on synthetic datasets, and keep the results to compare commits.
+
+    Stages are timed separately, in the order indexing runs them: read (description and data files), validate
+    (description and final metadata against the schema), construct (global and variable metadata), profile, minhash,
+    date_range, serialize and write (to a BulkSink). Each case is run repeat times and the median is kept. Results are
+    appended as one json line per run to a results file, with the git commit they were measured on.
+
+        benchmark = IndexingBenchmark()
+        results = benchmark.run([{"rows": 10000, "columns": 8}], results_file="benchmark.ndjson")
+        regressions = IndexingBenchmark.compare("benchmark.ndjson")
+
+    """
+
+    STAGES = ("read", "validate", "construct", "profile", "minhash", "date_range", "serialize", "write")
+
+    def __init__(self, index_builder: IndexBuilder = None, repeat: int = 3, seed: int = 0) -> None:
+        """Init method of IndexingBenchmark.
+
+        Args:
+            index_builder: IndexBuilder to benchmark, its index manager is replaced by a BulkSink.
+            repeat: number of runs of each case.
+            seed: seed of the synthetic datasets.
+
+        Returns:
+
+        """
+
+        self.ib = index_builder or IndexBuilder()
+        self.ib.im = BulkSink()
+        self.ib.id_allocator = None
+        self.repeat = repeat
+        self.generator = SyntheticDatasetGenerator(seed=seed)
+
+    def run(self, cases: typing.List[dict], results_file: str = None) -> dict:
+        """Run the benchmark cases.
+
+        Args:
+            cases: list of dataset sizes, dict of rows, columns and optionally text_length and entity_cardinality.
+            results_file: path of the results file the run is appended to.
+
+        Returns:
+            dict of the run, with environment and results of every case
+        """
+
+        run = {
+            "commit": self.git_commit(),
+            "time": datetime.datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "repeat": self.repeat,
+            "results": [self.run_case(**case) for case in cases]
+        }
+        if results_file:
+            with open(results_file, "a") as f:
+                f.write(json.dumps(run) + "\n")
+        return run
+
+    def run_case(self, rows: int, columns: int, text_length: int = 8, entity_cardinality: int = 100) -> dict:
+        """Run one case, repeat times.
+
+        Args:
+            rows: number of rows.
+            columns: number of columns.
+            text_length: number of characters of entity values.
+            entity_cardinality: number of distinct values of entity columns.
+
+        Returns:
+            dict of the case, median seconds of every stage, total, rows per second, peak memory and document size
+        """
+
+        case = {"rows": rows, "columns": columns, "text_length": text_length,
+                "entity_cardinality": entity_cardinality}
+        print("==== Benchmarking indexing of {}".format(case))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            description_path, data_path = self.generator.write(tmp_dir, "synthetic", **case)
+            timings = {stage: list() for stage in self.STAGES}
+            for _ in range(self.repeat):
+                for stage, seconds in self.time_stages(description_path, data_path).items():
+                    timings[stage].append(seconds)
+            _, peak_bytes = Utils.peak_memory(self.time_stages, description_path, data_path)
+
+        stages = {stage: statistics.median(values) for stage, values in timings.items()}
+        total = sum(stages.values())
+        return {
+            "case": case,
+            "stages": stages,
+            "total": total,
+            "rows_per_second": rows / total if total else 0.0,
+            "peak_bytes": peak_bytes,
+            "document_bytes": len(next(iter(self.ib.im.docs.values())).encode("utf-8"))
+        }
+
+    def time_stages(self, description_path: str, data_path: str) -> typing.Dict[str, float]:
+        """Index one dataset through the stages of IndexBuilder.indexing, timing each of them.
+
+        Args:
+            description_path: path of description json file.
+            data_path: path of data file.
+
+        Returns:
+            dict of stage to seconds
+        """
+
+        ib = self.ib
+        timings = dict()
+        last = time.perf_counter()
+
+        def lap(stage):
+            nonlocal last
+            now = time.perf_counter()
+            timings[stage] = timings.get(stage, 0.0) + now - last
+            last = now
+
+        with open(description_path, "r") as f:
+            description = json.load(f)
+        data = ib.data_reader.read(data_path)
+        lap("read")
+        Utils.validate_schema(description)
+        lap("validate")
+        ib._check_id_allocator(es_index="benchmark")
+        metadata = ib.construct_global_metadata(description=description, data=data)
+        lap("construct")
+        metadata = ib.profile(data=data, metadata=metadata)
+        lap("profile")
+        metadata = ib.add_minhash(metadata=metadata, data=data)
+        lap("minhash")
+        metadata = ib.add_date_range(metadata)
+        lap("date_range")
+        Utils.validate_schema(metadata)
+        lap("validate")
+        document = json.dumps(metadata)
+        lap("serialize")
+        ib.im.create_doc(index="benchmark", doc_type="_doc", body=document, id=metadata["datamart_id"])
+        lap("write")
+        return timings
+
+    @staticmethod
+    def compare(results_file: str, tolerance: float = 0.2) -> typing.List[dict]:
+        """Compare the last run of a results file to the previous one.
+
+        Args:
+            results_file: path of the results file.
+            tolerance: relative slow down of a stage reported as a regression.
+
+        Returns:
+            list of regressions, dict of case, stage, previous and current seconds, empty if less than two runs
+        """
+
+        with open(results_file, "r") as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+        if len(runs) < 2:
+            return []
+
+        previous = {json.dumps(result["case"], sort_keys=True): result for result in runs[-2]["results"]}
+        regressions = list()
+        for result in runs[-1]["results"]:
+            before = previous.get(json.dumps(result["case"], sort_keys=True))
+            if not before:
+                continue
+            for stage in list(result["stages"]) + ["total"]:
+                current = result["total"] if stage == "total" else result["stages"][stage]
+                reference = before["total"] if stage == "total" else before["stages"].get(stage)
+                if reference and current > reference * (1 + tolerance):
+                    regressions.append({"case": result["case"], "stage": stage, "previous": reference,
+                                        "current": current, "previous_commit": runs[-2]["commit"],
+                                        "commit": runs[-1]["commit"]})
+        return regressions
+
+    @staticmethod
+    def git_commit() -> typing.Optional[str]:
+        try:
+            return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                           cwd=os.path.dirname(os.path.abspath(__file__)),
+                                           stderr=subprocess.DEVNULL).decode("utf-8").strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
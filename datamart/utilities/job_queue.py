@@ -0,0 +1,204 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import typing
+import uuid
+
+
+class IndexJobQueue(object):
+    """Persistent queue of indexing jobs in a SQLite file, one job per description file.
+
+    A job is pending until a runner claims it, then running until it is done or fails. A failed job is retried after an
+    exponential backoff, base_delay * 2 ** (attempts - 1) seconds, until max_attempts is reached. The datamart_id given
+    to a job is kept, so a retried or resumed job replaces its document instead of creating a new one.
+
+    Several runners can share the queue file, each IndexJobQueue is a distinct owner. A claimed job is leased to its
+    owner for lease seconds, the owner renews the lease while working on it. Only jobs whose lease expired, eg. left
+    running by a crashed runner, are claimed again by other owners, see requeue_expired.
+
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, path: str, max_attempts: int = 5, base_delay: float = 5.0, lease: float = 600.0) -> None:
+        """Init method of IndexJobQueue.
+
+        Args:
+            path: path of the SQLite file, created if it does not exist.
+            max_attempts: number of attempts before a job is marked failed.
+            base_delay: delay in seconds before the first retry, doubled for every following one.
+            lease: seconds a claimed job stays with its owner without renewal, see renew.
+
+        Returns:
+
+        """
+
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.lease = lease
+        self.owner = "{}:{}:{}".format(socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                description_path TEXT UNIQUE NOT NULL,
+                data_path TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL DEFAULT 0,
+                datamart_id INTEGER,
+                error TEXT,
+                owner TEXT,
+                lease_expiry REAL
+            )""")
+        columns = set(row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)"))
+        for column, column_type in (("owner", "TEXT"), ("lease_expiry", "REAL")):
+            if column not in columns:
+                # queue files created before leases
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN {} {}".format(column, column_type))
+
+    def add(self, description_path: str, data_path: str = None, reset: bool = False) -> None:
+        """Add a job, a job for the same description file is kept unless reset.
+
+        Args:
+            description_path: path of description json file.
+            data_path: path of data file.
+            reset: make an existing job pending again, with its attempts reset and its datamart_id kept
+
+        Returns:
+
+        """
+
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO jobs (description_path, data_path, status) VALUES (?, ?, ?)",
+                               (description_path, data_path, self.PENDING))
+            if reset:
+                self._conn.execute("UPDATE jobs SET data_path = ?, status = ?, attempts = 0, next_attempt = 0, "
+                                   "error = NULL WHERE description_path = ?",
+                                   (data_path, self.PENDING, description_path))
+
+    def claim(self, limit: int = 1) -> typing.List[dict]:
+        """Claim pending jobs due now and running jobs whose lease expired, they are running until completed or
+        failed.
+
+        Args:
+            limit: max number of jobs claimed.
+
+        Returns:
+            list of job dict
+        """
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                rows = self._conn.execute("SELECT * FROM jobs WHERE (status = ? AND next_attempt <= ?) OR "
+                                          "(status = ? AND (lease_expiry IS NULL OR lease_expiry <= ?)) ORDER BY id "
+                                          "LIMIT ?", (self.PENDING, now, self.RUNNING, now, limit)).fetchall()
+                self._conn.executemany("UPDATE jobs SET status = ?, owner = ?, lease_expiry = ? WHERE id = ?",
+                                       [(self.RUNNING, self.owner, now + self.lease, row["id"]) for row in rows])
+                self._conn.execute("COMMIT")
+            except:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [dict(row) for row in rows]
+
+    def set_datamart_id(self, job_id: int, datamart_id: int) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET datamart_id = ? WHERE id = ?", (datamart_id, job_id))
+
+    def renew(self, job_ids: typing.List[int]) -> None:
+        """Extend the lease of running jobs of this owner.
+
+        Args:
+            job_ids: ids of the jobs.
+
+        Returns:
+
+        """
+
+        with self._lock:
+            self._conn.executemany("UPDATE jobs SET lease_expiry = ? WHERE id = ? AND owner = ? AND status = ?",
+                                   [(time.time() + self.lease, job_id, self.owner, self.RUNNING)
+                                    for job_id in job_ids])
+
+    def complete(self, job_id: int) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, error = NULL, owner = NULL WHERE id = ? AND owner = ?",
+                               (self.DONE, job_id, self.owner))
+
+    def fail(self, job_id: int, error: str) -> bool:
+        """Record a failed attempt, the job is retried after a backoff unless it reached max_attempts.
+
+        Nothing is recorded if the job is no longer leased to this owner.
+
+        Args:
+            job_id: id of the job.
+            error: error message.
+
+        Returns:
+            True if the job will be retried
+        """
+
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM jobs WHERE id = ? AND owner = ?",
+                                     (job_id, self.owner)).fetchone()
+            if row is None:
+                return False
+            attempts = row[0] + 1
+            retry = attempts < self.max_attempts
+            self._conn.execute("UPDATE jobs SET status = ?, attempts = ?, next_attempt = ?, error = ?, owner = NULL "
+                               "WHERE id = ?", (self.PENDING if retry else self.FAILED, attempts,
+                                                time.time() + self.base_delay * 2 ** (attempts - 1), error, job_id))
+        return retry
+
+    def requeue_expired(self) -> int:
+        """Make running jobs whose lease expired pending again, eg. left by a crashed runner. Jobs of live runners
+        keep renewing their lease and are not requeued.
+
+        Returns:
+            number of jobs requeued
+        """
+
+        with self._lock:
+            return self._conn.execute("UPDATE jobs SET status = ?, owner = NULL WHERE status = ? AND "
+                                      "(lease_expiry IS NULL OR lease_expiry <= ?)",
+                                      (self.PENDING, self.RUNNING, time.time())).rowcount
+
+    def next_attempt(self) -> typing.Optional[float]:
+        """Time of the earliest pending job, None if there is no pending job.
+
+        """
+
+        with self._lock:
+            return self._conn.execute("SELECT MIN(next_attempt) FROM jobs WHERE status = ?",
+                                      (self.PENDING,)).fetchone()[0]
+
+    def counts(self) -> typing.Dict[str, int]:
+        """Number of jobs per status.
+
+        """
+
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def jobs(self, status: str = None) -> typing.List[dict]:
+        with self._lock:
+            if status:
+                rows = self._conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id", (status,)).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,129 @@
+import os
+import pandas as pd
+import typing
+import warnings
+
+
+class LocalDataReader(object):
+    """Read dataset files already on disk, so indexing profiles them instead of materializing them again.
+
+    Parquet files (.parquet, .pq) carry their dtypes and are memory mapped when pyarrow is installed. Csv and tsv files,
+    optionally compressed (.gz, .bz2, .zip, .xz), are read in one pass with the dtypes inferred on a sample of rows,
+    which skips the per chunk type guessing of pandas, uncompressed ones are memory mapped.
+
+    """
+
+    PARQUET_EXTENSIONS = (".parquet", ".pq")
+    TEXT_EXTENSIONS = {".csv": ",", ".tsv": "\t"}
+    COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".zip": "zip", ".xz": "xz"}
+
+    def __init__(self, sample_rows: int = 10000) -> None:
+        """Init method of LocalDataReader.
+
+        Args:
+            sample_rows: number of rows csv dtypes are inferred on.
+
+        Returns:
+
+        """
+
+        self.sample_rows = sample_rows
+
+    @classmethod
+    def extensions(cls) -> typing.List[str]:
+        """Supported file extensions, in order of preference.
+
+        Returns:
+            list of str
+        """
+
+        text = [ext + compression for ext in cls.TEXT_EXTENSIONS for compression in [""] + list(
+            cls.COMPRESSION_EXTENSIONS)]
+        return list(cls.PARQUET_EXTENSIONS) + text
+
+    @classmethod
+    def find(cls, data_dir: str, name: str) -> typing.Optional[str]:
+        """Path of the data file of a dataset in data_dir, eg. <data_dir>/<name>.parquet or <data_dir>/<name>.csv.gz.
+
+        Args:
+            data_dir: dir of data files.
+            name: file name without extension.
+
+        Returns:
+            path, None if no supported file exists
+        """
+
+        for ext in cls.extensions():
+            path = os.path.join(data_dir, name + ext)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def read(self, path: str) -> pd.DataFrame:
+        """Read a data file, the format is given by its extension, csv if unknown.
+
+        Args:
+            path: path of the data file.
+
+        Returns:
+            pandas DataFrame
+        """
+
+        if path.lower().endswith(self.PARQUET_EXTENSIONS):
+            return self.read_parquet(path)
+        return self.read_csv(path)
+
+    @staticmethod
+    def read_parquet(path: str) -> pd.DataFrame:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            return pd.read_parquet(path)
+        return pq.read_table(path, memory_map=True).to_pandas()
+
+    def read_csv(self, path: str) -> pd.DataFrame:
+        """Read a csv or tsv file, optionally compressed, with dtypes inferred on the first sample_rows rows.
+
+        Args:
+            path: path of the data file.
+
+        Returns:
+            pandas DataFrame
+        """
+
+        sep, compression = self._text_format(path)
+        kwargs = {"sep": sep, "compression": compression, "memory_map": compression is None}
+        sample = pd.read_csv(path, nrows=self.sample_rows, **kwargs)
+        if len(sample) < self.sample_rows:
+            return sample
+
+        try:
+            return pd.read_csv(path, dtype=self.sample_dtypes(sample), **kwargs)
+        except (ValueError, TypeError, OverflowError):
+            # values past the sample do not fit the sampled dtypes, eg. text or missing values in an integer column
+            warnings.warn("Sampled dtypes do not fit {}, reading without them".format(path))
+            return pd.read_csv(path, low_memory=False, **kwargs)
+
+    @staticmethod
+    def sample_dtypes(sample: pd.DataFrame) -> typing.Dict[str, typing.Any]:
+        """Dtypes to read a whole csv with, from the dtypes of a sample.
+
+        Columns with duplicated names are left to pandas, dtype is keyed by name.
+
+        Args:
+            sample: first rows of the csv.
+
+        Returns:
+            dict of column name to dtype
+        """
+
+        duplicated = set(sample.columns[sample.columns.duplicated()])
+        return {name: dtype for name, dtype in sample.dtypes.items() if name not in duplicated}
+
+    @classmethod
+    def _text_format(cls, path: str) -> typing.Tuple[str, typing.Optional[str]]:
+        root, ext = os.path.splitext(path.lower())
+        compression = cls.COMPRESSION_EXTENSIONS.get(ext)
+        if compression:
+            root, ext = os.path.splitext(root)
+        return cls.TEXT_EXTENSIONS.get(ext, ","), compression
@@ -0,0 +1,222 @@
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import os
+import typing
+
+
+class MetadataDumpWriter(object):
+    """Write metadata to a NDJSON dump, one metadata json per line, with its datamart_id inline.
+
+    The file is gzip compressed if the path ends with .gz. A sidecar file <path>.sha256 holds one json line per write
+    session, the sha256 and number of lines of the uncompressed content written, appended on close. Appending to a
+    dump neither reads its content nor rewrites its checksum file. The handle stays open and buffered until close, use
+    it as a context manager for a bulk run:
+
+        with MetadataDumpWriter("metadata.ndjson.gz") as writer:
+            for metadata in ...:
+                writer.write(metadata)
+
+    """
+
+    def __init__(self, path: str, mode: str = "w", buffer_size: int = 1 << 20) -> None:
+        """Init method of MetadataDumpWriter.
+
+        Args:
+            path: path of the dump file.
+            mode: "w" to overwrite, "a" to append to an existing dump.
+            buffer_size: write buffer size in bytes.
+
+        Returns:
+
+        """
+
+        if mode not in ("w", "a"):
+            raise ValueError("Mode should be w or a")
+        self.path = path
+        self.sha256 = hashlib.sha256()
+        self.lines = 0
+        self._segments = list()
+        self._checksum_mode = "a" if mode == "a" and os.path.exists(path) else "w"
+        if self._checksum_mode == "a" and not os.path.exists(MetadataDumpReader.checksum_path(path)):
+            # dump written without checksum, checksum its content once as the first segment
+            self._segments.append(MetadataDumpReader.checksum_lines(MetadataDumpReader.open_text(path)))
+            self._checksum_mode = "w"
+        if path.endswith(".gz"):
+            self._out = io.BufferedWriter(gzip.open(path, mode + "b"), buffer_size=buffer_size)
+        else:
+            self._out = open(path, mode + "b", buffering=buffer_size)
+        self._closed = False
+
+    def write(self, metadata: dict, document: str = None) -> None:
+        """Append one metadata, it must have a datamart_id.
+
+        Args:
+            metadata: metadata dict
+            document: json of metadata if already serialized, eg. for es
+
+        Returns:
+
+        """
+
+        if metadata.get("datamart_id") is None:
+            raise ValueError("Metadata without datamart_id can not be dumped")
+        line = (document or json.dumps(metadata)) + "\n"
+        self.sha256.update(line.encode("utf-8"))
+        self.lines += 1
+        self._out.write(line.encode("utf-8"))
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._out.close()
+        segments = self._segments + [{"sha256": self.sha256.hexdigest(), "lines": self.lines}]
+        with open(MetadataDumpReader.checksum_path(self.path), self._checksum_mode) as f:
+            for segment in segments:
+                f.write(json.dumps(segment) + "\n")
+        self._closed = True
+
+    def __enter__(self) -> 'MetadataDumpWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class MetadataDumpReader(object):
+    """Stream metadata from a dump written by MetadataDumpWriter, the checksum is verified once the dump is read.
+    Use verify_checksum to check a dump before acting on its content, eg. loading it to es.
+
+    Dumps in the former format, a datamart_id line followed by a metadata json line, are read as well, without
+    checksum.
+
+    """
+
+    def __init__(self, path: str, verify: bool = True) -> None:
+        """Init method of MetadataDumpReader.
+
+        Args:
+            path: path of the dump file.
+            verify: verify the checksum if the dump has a sidecar checksum file.
+
+        Returns:
+
+        """
+
+        self.path = path
+        self.verify = verify
+
+    def __iter__(self) -> typing.Iterator[dict]:
+        """Metadata of the dump, in order.
+
+        Raises:
+            ValueError if the content does not match the checksum
+        """
+
+        lines = self.open_text(self.path)
+        segments = self.read_checksum(self.path) if self.verify else None
+        if segments is not None:
+            lines = self._verified(lines, segments)
+
+        legacy_id = None
+        for line in lines:
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if legacy_id is None and stripped.isdigit():
+                legacy_id = int(stripped)
+                continue
+            metadata = json.loads(stripped)
+            if legacy_id is not None:
+                metadata.setdefault("datamart_id", legacy_id)
+                legacy_id = None
+            yield metadata
+
+    def verify_checksum(self) -> bool:
+        """Check the whole dump against its checksum, without parsing it.
+
+        Returns:
+            True if the dump matches, False if it has no checksum file
+
+        Raises:
+            ValueError if the content does not match the checksum
+        """
+
+        segments = self.read_checksum(self.path)
+        if segments is None:
+            return False
+        for _ in self._verified(self.open_text(self.path), segments):
+            pass
+        return True
+
+    def _verified(self, lines: typing.Iterator[str], segments: typing.List[dict]) -> typing.Iterator[str]:
+        """Lines checked against the checksum segments as they are read.
+
+        Raises:
+            ValueError at the end of the first segment which does not match, or on lines after the last one
+        """
+
+        lines = iter(lines)
+        for segment in segments:
+            sha256 = hashlib.sha256()
+            for line in itertools.islice(lines, segment["lines"]):
+                sha256.update(line.encode("utf-8"))
+                yield line
+            if sha256.hexdigest() != segment["sha256"]:
+                break
+        else:
+            if next(lines, None) is None:
+                return
+        raise ValueError("Checksum mismatch, metadata dump {} is corrupted".format(self.path))
+
+    @staticmethod
+    def checksum_lines(lines: typing.Iterable[str]) -> dict:
+        """Checksum segment of lines.
+
+        Args:
+            lines: lines, with their line break
+
+        Returns:
+            dict with sha256 and lines
+        """
+
+        sha256 = hashlib.sha256()
+        count = 0
+        for line in lines:
+            sha256.update(line.encode("utf-8"))
+            count += 1
+        return {"sha256": sha256.hexdigest(), "lines": count}
+
+    @classmethod
+    def read_checksum(cls, path: str) -> typing.Optional[typing.List[dict]]:
+        """Checksum segments of a dump.
+
+        Args:
+            path: path of the dump file.
+
+        Returns:
+            list of dict with sha256 and lines, None if the dump has no checksum file
+        """
+
+        try:
+            with open(cls.checksum_path(path), "r") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except (IOError, OSError):
+            return None
+
+    @staticmethod
+    def open_text(path: str) -> typing.Iterator[str]:
+        """Lines of a dump file, gzip compressed if the path ends with .gz.
+
+        """
+
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield line
+
+    @staticmethod
+    def checksum_path(path: str) -> str:
+        return path + ".sha256"
@@ -0,0 +1,129 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import typing
+
+
+class MinHash(object):
+    """MinHash signatures of the distinct values of a column, and LSH bands of the signatures.
+
+    Values are normalized like named entities (stripped, lower cased) before hashing. Two columns with jaccard
+    similarity s share at least one LSH band with probability 1 - (1 - s ** rows) ** bands, so candidate joinable
+    columns are found with exact term lookups on the bands, then ranked by the containment estimated from the
+    signatures.
+
+    """
+
+    # Mersenne prime, a * x + b with a, b, x below it fits in uint64
+    PRIME = (1 << 31) - 1
+
+    def __init__(self, num_perm: int = 128, bands: int = 64, seed: int = 1, chunk_size: int = 10000) -> None:
+        """Init method of MinHash.
+
+        Args:
+            num_perm: number of hash functions, length of signatures.
+            bands: number of LSH bands, must divide num_perm.
+            seed: seed of the hash functions, signatures are only comparable with the same seed.
+            chunk_size: number of values hashed at once.
+
+        Returns:
+
+        """
+
+        if num_perm % bands:
+            raise ValueError("Bands should divide num_perm")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.chunk_size = chunk_size
+        random_state = np.random.RandomState(seed)
+        self._a = random_state.randint(1, self.PRIME, size=num_perm).astype(np.uint64)
+        self._b = random_state.randint(0, self.PRIME, size=num_perm).astype(np.uint64)
+
+    def signature(self, column: pd.Series) -> typing.Tuple[typing.List[int], int]:
+        """MinHash signature of the distinct values of a column.
+
+        Args:
+            column: pandas Series
+
+        Returns:
+            Tuple of (signature, number of distinct values), signature is empty for a column without values
+        """
+
+        values = self.normalize(column)
+        if values.empty:
+            return [], 0
+        hashes = (pd.util.hash_pandas_object(values, index=False).values % np.uint64(self.PRIME))
+        signature = np.full(self.num_perm, self.PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), self.chunk_size):
+            chunk = hashes[start:start + self.chunk_size]
+            permuted = (np.outer(chunk, self._a) + self._b) % np.uint64(self.PRIME)
+            signature = np.minimum(signature, permuted.min(axis=0))
+        return signature.astype(np.int64).tolist(), len(values)
+
+    def lsh(self, signature: typing.List[int]) -> typing.List[str]:
+        """LSH bands of a signature, one term per band, prefixed with the band number.
+
+        Args:
+            signature: MinHash signature
+
+        Returns:
+            list of str
+        """
+
+        if not signature:
+            return []
+        signature = np.asarray(signature, dtype=np.int64)
+        return ["{:02d}_{}".format(band, hashlib.md5(
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()).hexdigest()[:16])
+                for band in range(self.bands)]
+
+    @staticmethod
+    def jaccard(signature: typing.List[int], other: typing.List[int]) -> float:
+        """Estimated jaccard similarity of two sets from their signatures.
+
+        Args:
+            signature: MinHash signature
+            other: MinHash signature of the same length
+
+        Returns:
+            float between 0 and 1
+        """
+
+        if not signature or len(signature) != len(other):
+            return 0.0
+        return float(np.mean(np.asarray(signature) == np.asarray(other)))
+
+    @classmethod
+    def containment(cls, signature: typing.List[int], size: int, other: typing.List[int], other_size: int) -> float:
+        """Estimated share of the first set contained in the other one.
+
+        Args:
+            signature: MinHash signature of the query set
+            size: number of distinct values of the query set
+            other: MinHash signature of the other set
+            other_size: number of distinct values of the other set
+
+        Returns:
+            float between 0 and 1
+        """
+
+        if not size:
+            return 0.0
+        jaccard = cls.jaccard(signature, other)
+        return min(1.0, jaccard * (size + other_size) / ((1 + jaccard) * size))
+
+    @staticmethod
+    def normalize(column: pd.Series) -> pd.Series:
+        """Distinct normalized values of a column.
+
+        Args:
+            column: pandas Series
+
+        Returns:
+            pandas Series of str
+        """
+
+        values = column.dropna().astype(str).str.strip().str.lower()
+        values = values[values != ""]
+        return pd.Series(values.unique())
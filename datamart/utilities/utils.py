@@ -1,5 +1,6 @@
 import warnings
 import dateutil.parser
+import functools
 from datamart.materializers.materializer_base import MaterializerBase
 import importlib
 import os
@@ -10,6 +11,7 @@ from termcolor import colored
 import typing
 import pandas as pd
 import tempfile
+import tracemalloc
 from datetime import datetime
 from datamart.utilities.timeout import timeout
 
@@ -35,10 +37,12 @@ class Utils:
 
     DEFAULT_START_DATE = "1900-01-01T00:00:00"
 
-    @staticmethod
-    def date_validate(date_text: str) -> typing.Optional[str]:
+    @classmethod
+    def date_validate(cls, date_text: str) -> typing.Optional[str]:
         """Validate if a string is a valid date.
 
+        Parsed dates are cached, the same few dates come back in every metadata of a bulk indexing.
+
         Args:
             date_text: date string.
 
@@ -46,12 +50,18 @@ class Utils:
             string of valid date or None
         """
 
+        date = cls._parse_date(date_text)
+        if date is None:
+            warnings.warn("Incorrect datetime format")
+        return date
+
+    @staticmethod
+    @functools.lru_cache(maxsize=65536)
+    def _parse_date(date_text: str) -> typing.Optional[str]:
         try:
-            this_datetime = dateutil.parser.parse(date_text)
+            return dateutil.parser.parse(date_text).isoformat()
         except ValueError:
-            warnings.warn("Incorrect datetime format")
             return None
-        return this_datetime.isoformat()
 
     @classmethod
     def temporal_coverage_validate(cls, coverage: dict) -> dict:
@@ -78,6 +88,27 @@ class Utils:
             coverage['end'] = None
         return coverage
 
+    @classmethod
+    def date_range_from_temporal_coverage(cls, coverage: dict) -> typing.Optional[dict]:
+        """Convert a temporal_coverage to the date_range value indexed in es.
+
+        Args:
+            coverage: dict of temporal_coverage.
+
+        Returns:
+            dict with gte and/or lte in yyyy-mm-ddTHH:MM:SS, None if coverage has no valid date
+        """
+
+        if not coverage:
+            return None
+        date_range = dict()
+        for key, bound in (("start", "gte"), ("end", "lte")):
+            if coverage.get(key):
+                date = cls.date_validate(coverage[key])
+                if date:
+                    date_range[bound] = date[:19]
+        return date_range or None
+
     @classmethod
     def load_materializer(cls, materializer_module: str) -> MaterializerBase:
         """Given the python path to the materializer_module, return a materializer instance.
@@ -89,6 +120,21 @@ class Utils:
             materializer instance
         """
 
+        materializer_class = cls.load_materializer_class(materializer_module=materializer_module)
+        materializer = materializer_class(tmp_file_dir=cls.TMP_FILE_DIR)
+        return materializer
+
+    @staticmethod
+    def load_materializer_class(materializer_module: str) -> typing.Type[MaterializerBase]:
+        """Given the python path to the materializer_module, return the materializer class.
+
+        Args:
+            materializer_module: Path to materializer_module file.
+
+        Returns:
+            materializer class
+        """
+
         module = importlib.import_module(materializer_module)
         md = module.__dict__
         lst = [
@@ -99,14 +145,11 @@ class Utils:
                     md[c].__module__ == module.__name__)
         ]
         try:
-            materializer_class = lst[0]
+            return lst[0]
         except:
             raise ValueError(colored("No materializer class found in {}".format(
                 os.path.join(os.path.dirname(__file__), 'materializers', materializer_module))), 'red')
 
-        materializer = materializer_class(tmp_file_dir=cls.TMP_FILE_DIR)
-        return materializer
-
     @classmethod
     @timeout(seconds=MATERIALIZATION_TIME_OUT, error_message="Materialization times out")
     def materialize(cls,
@@ -158,6 +201,34 @@ class Utils:
 
         return __decorator
 
+    @staticmethod
+    def peak_memory(func: typing.Callable, *args, **kwargs) -> typing.Tuple[typing.Any, int]:
+        """Call a function and measure the peak memory allocated during the call, numpy buffers included.
+
+        Args:
+            func: function to call
+            args: positional arguments of func
+            kwargs: keyword arguments of func
+
+        Returns:
+            Tuple of (result of func, peak memory in bytes)
+        """
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        # peak is measured from the start of the call only, reset_peak is new in python 3.9
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        try:
+            result = func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        return result, max(peak - start, 0)
+
     @classmethod
     def is_categorical_column(cls, col: pd.Series) -> bool:
         """check if column is categorical.
@@ -244,6 +315,9 @@ class Utils:
     def get_metadata_intersection(*metadata_lst) -> list:
         """Get the intersect metadata list.
 
+       Every list has to be fetched entirely first, prefer Augment.query_intersection which lets elasticsearch
+       intersect the queries and only returns the intersected docs.
+
        Args:
            metadata_lst: all metadata list returned by multiple queries
 
@@ -293,13 +367,42 @@ class Utils:
 
         df = cls.materialize(metadata=metadata, constrains=constrains)
 
-        if variables:
+        # selecting every column in order would only copy the dataframe
+        if variables and list(variables) != list(range(df.shape[1])):
             df = df.iloc[:, variables]
 
         if metadata.get("implicit_variables", None):
             df = cls.append_columns_for_implicit_variables(metadata["implicit_variables"], df)
 
-        return df.infer_objects()
+        return cls.infer_object_columns(df)
+
+    @staticmethod
+    def infer_object_columns(df: pd.DataFrame) -> pd.DataFrame:
+        """Like infer_objects, only object columns are converted and other columns are not copied.
+
+         Args:
+             df: pandas Dataframe, not modified
+
+         Returns:
+              df itself if no column is converted, a new Dataframe otherwise
+         """
+
+        if not df.columns.is_unique:
+            return df.infer_objects()
+
+        converted = dict()
+        for name in df.columns[(df.dtypes == object).values]:
+            inferred = df[name].infer_objects()
+            if inferred.dtype != object:
+                converted[name] = inferred
+        if not converted:
+            return df
+
+        # a shallow copy shares the other columns, and is not a view of df, eg. when df is an iloc slice
+        result = df.copy(deep=False)
+        for name, inferred in converted.items():
+            result[name] = inferred
+        return result
 
     @staticmethod
     def calculate_dsbox_features(data: pd.DataFrame, metadata: typing.Union[dict, None]) -> dict:
@@ -319,11 +422,12 @@ class Utils:
         return DSboxProfiler().profile(inputs=data, metadata=metadata)
 
     @classmethod
-    def generate_metadata_from_dataframe(cls, data: pd.DataFrame) -> dict:
+    def generate_metadata_from_dataframe(cls, data: pd.DataFrame, columns: typing.List[int] = None) -> dict:
         """Generate a default metadata just from the data, without the dataset schema
 
          Args:
              data: pandas Dataframe
+             columns: offsets of columns to profile, default to all, other variables only get a name
 
          Returns:
               metadata dict
@@ -332,11 +436,15 @@ class Utils:
 
         global_metadata = GlobalMetadata.construct_global(description=cls.DEFAULT_DESCRIPTION)
         for col_offset in range(data.shape[1]):
-            variable_metadata = BasicProfiler.basic_profiling_column(
-                description={},
-                variable_metadata=VariableMetadata.construct_variable(description={}),
-                column=data.iloc[:, col_offset]
-            )
+            variable_metadata = VariableMetadata.construct_variable(description={})
+            if columns is None or col_offset in columns:
+                variable_metadata = BasicProfiler.basic_profiling_column(
+                    description={},
+                    variable_metadata=variable_metadata,
+                    column=data.iloc[:, col_offset]
+                )
+            else:
+                variable_metadata.name = data.columns[col_offset]
             global_metadata.add_variable_metadata(variable_metadata)
         global_metadata = BasicProfiler.basic_profiling_entire(global_metadata=global_metadata,
                                                                               data=data)
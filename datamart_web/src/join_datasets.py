@@ -15,12 +15,13 @@ class JoinDatasets(object):
 
     def default_join(self, request, old_df):
 
-        left_metadata = Utils.generate_metadata_from_dataframe(data=old_df)
-
         query_data = json.loads(request.form['data'])
         selected_metadata = query_data["selected_metadata"]
         columns_mapping = query_data["columns_mapping"]
 
+        left_metadata = Utils.generate_metadata_from_dataframe(
+            data=old_df, columns=[offset for x in columns_mapping for offset in x["old_cols"]])
+
         if "constrains" in query_data:
             try:
                 constrains = query_data["constrains"]
@@ -36,17 +37,19 @@ class JoinDatasets(object):
                 "message": "Default join should perform after default search using default search result"
             })
 
-        constrains["named_entity"] = Utils.get_named_entity_constrain_from_inner_hits(matches)
+        # push the join keys of the provided dataframe down to the materializer
+        constrains = self.augment.plan_constrains(
+            left_df=old_df,
+            right_metadata=selected_metadata["_source"],
+            left_columns=[x["old_cols"] for x in columns_mapping],
+            right_columns=[x["new_cols"] for x in columns_mapping],
+            left_metadata=left_metadata,
+            constrains=constrains
+        )
 
-        # get temporal coverage from provided dataframe
-        if left_metadata.get("variables", []):
-            for variable in left_metadata["variables"]:
-                if variable.get("temporal_coverage") and variable["temporal_coverage"].get("start") and variable["temporal_coverage"].get("end"):
-                    constrains["date_range"] = {
-                      "start": variable["temporal_coverage"]["start"],
-                      "end": variable["temporal_coverage"]["end"]
-                    }
-                    break
+        named_entity = constrains.setdefault("named_entity", {})
+        for offset, entities in Utils.get_named_entity_constrain_from_inner_hits(matches).items():
+            named_entity.setdefault(offset, entities)
 
         try:
             new_df = Utils.get_dataset(
@@ -27,8 +27,21 @@ class SearchMetadata(object):
                     query_string=query_string
                 )
                 if this_column_result:
+                    datasets_metadata = this_column_result[:10]
                     ret["result"].append({
                         "column_idx": idx,
-                        "datasets_metadata": this_column_result[:10]
+                        "datasets_metadata": datasets_metadata,
+                        "join_estimates": [self.estimate_join(old_df, idx, x) for x in datasets_metadata]
                     })
         return ret
+
+    def estimate_join(self, old_df, column_idx, dataset_metadata):
+        matches = Utils.get_inner_hits_info(hitted_es_result=dataset_metadata)
+        if not matches:
+            return None
+        return self.augment.estimate_join(
+            left_df=old_df,
+            right_metadata=dataset_metadata["_source"],
+            left_columns=[[column_idx]],
+            right_columns=[[matches[0]["offset"]]]
+        )
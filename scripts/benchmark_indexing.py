@@ -0,0 +1,39 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import argparse
+import itertools
+import json
+from datamart.utilities.indexing_benchmark import IndexingBenchmark
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the stages of indexing on synthetic datasets')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000], help='Numbers of rows')
+    parser.add_argument('--columns', type=int, nargs='+', default=[8], help='Numbers of columns')
+    parser.add_argument('--text_length', type=int, nargs='+', default=[8], help='Lengths of entity values')
+    parser.add_argument('--entity_cardinality', type=int, nargs='+', default=[100],
+                        help='Numbers of distinct values of entity columns')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each case, the median is kept')
+    parser.add_argument('--results_file', default='indexing_benchmark.ndjson',
+                        help='File the results are appended to, one json line per run')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Relative slow down against the previous run reported as a regression')
+
+    args = parser.parse_args()
+    cases = [{"rows": rows, "columns": columns, "text_length": text_length, "entity_cardinality": cardinality}
+             for rows, columns, text_length, cardinality in itertools.product(
+                 args.rows, args.columns, args.text_length, args.entity_cardinality)]
+
+    run = IndexingBenchmark(repeat=args.repeat).run(cases, results_file=args.results_file)
+    for result in run["results"]:
+        print(json.dumps(result["case"]))
+        for stage, seconds in result["stages"].items():
+            print("  {:<12}{:.4f}s".format(stage, seconds))
+        print("  {:<12}{:.4f}s, {:.0f} rows/s, peak {:.1f}MB".format(
+            "total", result["total"], result["rows_per_second"], result["peak_bytes"] / 1024 / 1024))
+
+    regressions = IndexingBenchmark.compare(args.results_file, tolerance=args.tolerance)
+    for regression in regressions:
+        print("Regression {case} {stage}: {previous:.4f}s at {previous_commit} -> {current:.4f}s at {commit}".format(
+            **regression))
+    sys.exit(1 if regressions else 0)